@@ -27,6 +27,7 @@ import s3fs
 
 from grid import Bounds
 from itscube_types import BatchVars, \
+    CompOutput, \
     CubeJson, \
     FilenamePrefix, \
     datacube_filename_zarr, \
@@ -45,6 +46,11 @@ class DataCubeCompositeBatch:
 
     COMPOSITES_TO_GENERATE = []
 
+    # Flag to update existing composites incrementally for the layers added to
+    # the datacubes since composites were created. If not set, existing composites
+    # are skipped.
+    UPDATE_EXISTING_COMPOSITES = False
+
     def __init__(self, grid_size: int, batch_job: str, batch_queue: str, is_dry_run: bool):
         """
         Initialize object.
@@ -219,8 +225,10 @@ class DataCubeCompositeBatch:
                     composite_exists = self.s3.ls(os.path.join(s3_bucket, composite_dir, composite_filename))
                     if len(composite_exists) != 0:
                         num_existing_composites += 1
-                        logging.info(f"Composite {os.path.join(composite_dir, composite_filename)} exists, skipping composite generation.")
-                        continue
+
+                        if not DataCubeCompositeBatch.UPDATE_EXISTING_COMPOSITES:
+                            logging.info(f"Composite {os.path.join(composite_dir, composite_filename)} exists, skipping composite generation.")
+                            continue
 
                     cube_params = {
                         'inputCube': cube_filename,
@@ -229,6 +237,10 @@ class DataCubeCompositeBatch:
                         'targetBucket': os.path.join(s3_bucket, composite_dir),
                         'chunkSize': str(DataCubeCompositeBatch.X_Y_CHUNK)
                     }
+
+                    if len(composite_exists) != 0:
+                        # Update existing composite using its state
+                        cube_params['previousState'] = os.path.join(s3_bucket, composite_dir, composite_filename, CompOutput.STATE_FILE)
                     logging.info(f'Cube params: {cube_params}')
 
                     # Submit AWS Batch job
@@ -474,6 +486,12 @@ def parse_args():
         default='',
         help="Path token to be present in datacube S3 target path in order for the datacube to be processed [%(default)s]."
     )
+    parser.add_argument(
+        '--updateExistingComposites',
+        action='store_true',
+        help="Update existing composites incrementally for the layers added to the datacubes instead of skipping them. "
+             "AWS Batch job definition should pass 'previousState' parameter to the composites generation."
+    )
     parser.add_argument(
         '--excludeCubesFile',
         type=Path,
@@ -512,6 +530,7 @@ def parse_args():
     BatchVars.HTTP_PREFIX = args.urlPath
     BatchVars.PATH_TOKEN  = args.pathToken
     DataCubeCompositeBatch.X_Y_CHUNK = args.chunkSize
+    DataCubeCompositeBatch.UPDATE_EXISTING_COMPOSITES = args.updateExistingComposites
 
     epsg_codes = list(map(str, json.loads(args.epsgCode))) if args.epsgCode is not None else None
     if epsg_codes and len(epsg_codes):
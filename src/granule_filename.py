@@ -0,0 +1,261 @@
+"""
+Parser of ITS_LIVE image pair granule filenames.
+
+Optical format granule filename:
+LC08_L1TP_011002_20150821_20170405_01_T1_X_LC08_L1TP_011002_20150720_20170406_01_T1_G0240V01_P038.nc
+
+Radar format granule filename:
+S1A_IW_SLC__1SSH_20170221T204710_20170221T204737_015387_0193F6_AB07_X_S1B_IW_SLC__1SSH_20170227T204628_20170227T204655_004491_007D11_6654_G0240V02_P094.nc
+
+Single filenames are parsed by parse_filename(): tokens of the most recently
+parsed filenames are cached, so repeated parsing of the same granule (duplicate
+resolution, catalog generation, NSIDC metadata) does not re-tokenize the filename.
+Lists of filenames are parsed by parse_filenames() with NumPy string operations
+over all filenames at once.
+"""
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+import os
+import re
+
+# Token to separate image names within the filename
+SPLIT_IMAGES_TOKEN = '_X_'
+
+# Token to separate fields within each image name
+IMAGE_TOKEN = '_'
+
+# Date format as it appears in granules filenames of optical format
+DATE_FORMAT = "%Y%m%d"
+
+# Date and time format as it appears in granules filenames of radar format
+DATE_TIME_FORMAT = "%Y%m%dT%H%M%S"
+
+# Optical format image name has fewer tokens than radar format image name
+NUM_OPTICAL_TOKENS = 9
+
+# Token of percent valid pixels that ends ITS_LIVE filename: P followed by
+# the percentage (some granules filenames don't have it)
+PERCENT_VALID_TOKEN = re.compile(r'P\d+')
+
+# Maximum number of parsed filenames to cache (for filenames parsed one at a time)
+CACHE_SIZE = 2**12
+
+# Record of the parsed granule filename:
+# * optical format: first/second dates are acquisition/processing dates, and
+#   key is path/row of the image
+# * radar format: first/second dates are start/stop date and time, and key is
+#   product unique ID of the image
+# * pair_id: unique identifier of the image pair, which is the filename with
+#   processing dates (optical format) and percent valid pixels removed
+# * percent_valid: None if filename does not have percent valid pixels
+GRANULE_DTYPE = np.dtype([
+    ('url', object),
+    ('is_optical', bool),
+    ('sensor_1', object),
+    ('first_date_1', 'datetime64[s]'),
+    ('second_date_1', 'datetime64[s]'),
+    ('key_1', object),
+    ('sensor_2', object),
+    ('first_date_2', 'datetime64[s]'),
+    ('second_date_2', 'datetime64[s]'),
+    ('key_2', object),
+    ('version', object),
+    ('percent_valid', object),
+    ('pair_id', object)
+])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def split_filename(basename: str):
+    """
+    Split granule filename into tokens of the first and second image names.
+    """
+    image_1, image_2 = basename.split(SPLIT_IMAGES_TOKEN)
+
+    return tuple(image_1.split(IMAGE_TOKEN)), tuple(image_2.split(IMAGE_TOKEN))
+
+
+def to_date(token: str):
+    """
+    Convert YYYYMMDD or YYYYMMDDTHHMMSS token of the filename to datetime object.
+    """
+    if len(token) == 8:
+        return datetime(int(token[:4]), int(token[4:6]), int(token[6:8]))
+
+    return datetime.strptime(token, DATE_TIME_FORMAT)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_basename(basename: str):
+    """
+    Parse granule filename into the tuple of GRANULE_DTYPE fields (but URL).
+    """
+    tokens_1, tokens_2 = split_filename(basename)
+
+    # Last tokens of the second image name are specific to ITS_LIVE filename:
+    # version and optional percent valid pixels
+    last_token = os.path.splitext(tokens_2[-1])[0]
+    percent_valid = None
+
+    if PERCENT_VALID_TOKEN.fullmatch(last_token):
+        percent_valid = int(last_token[1:])
+        tokens_2 = tokens_2[:-1]
+
+    else:
+        tokens_2 = tokens_2[:-1] + (last_token,)
+
+    version = tokens_2[-1]
+
+    if len(tokens_1) < NUM_OPTICAL_TOKENS:
+        # Optical format granule: get acquisition/processing dates and path&row
+        # for both images
+        return (
+            True,
+            tokens_1[0],
+            to_date(tokens_1[3]),
+            to_date(tokens_1[4]),
+            tokens_1[2],
+            tokens_2[0],
+            to_date(tokens_2[3]),
+            to_date(tokens_2[4]),
+            tokens_2[2],
+            version,
+            percent_valid,
+            IMAGE_TOKEN.join(tokens_1[:4] + tokens_1[5:] + tokens_2[:4] + tokens_2[5:])
+        )
+
+    # Radar format granule: get start/end date/time and product unique ID
+    # for both images
+    return (
+        False,
+        tokens_1[0],
+        to_date(tokens_1[-5]),
+        to_date(tokens_1[-4]),
+        tokens_1[-1],
+        tokens_2[0],
+        to_date(tokens_2[-6]),
+        to_date(tokens_2[-5]),
+        tokens_2[-2],
+        version,
+        percent_valid,
+        IMAGE_TOKEN.join(tokens_1 + tokens_2)
+    )
+
+
+def parse_filename(filename: str):
+    """
+    Parse granule filename or URL into the tuple of GRANULE_DTYPE fields.
+    """
+    return (filename,) + parse_basename(os.path.basename(filename))
+
+
+def split_tokens(values, num_tokens: int, from_end: bool = False):
+    """
+    Split first (or last if from_end=True) num_tokens tokens off each image
+    name in the array.
+
+    Returns list of num_tokens arrays of the tokens (in the order they appear
+    within the image name) and array of the rest of the image names.
+    """
+    tokens = []
+    rest = values
+
+    for _ in range(num_tokens):
+        if from_end:
+            rest, _, each_token = np.char.rpartition(rest, IMAGE_TOKEN).T
+            tokens.insert(0, each_token)
+
+        else:
+            each_token, _, rest = np.char.partition(rest, IMAGE_TOKEN).T
+            tokens.append(each_token)
+
+    return tokens, rest
+
+
+def to_dates(tokens):
+    """
+    Convert array of YYYYMMDD or YYYYMMDDTHHMMSS tokens of the filenames to
+    datetime64[s] array.
+    """
+    date_tokens, _, time_tokens = np.char.partition(tokens, 'T').T
+
+    date_values = date_tokens.astype(np.int64)
+    time_values = np.where(time_tokens == '', '0', time_tokens).astype(np.int64)
+
+    months = (date_values // 10000 - 1970) * 12 + date_values // 100 % 100 - 1
+    days = months.astype('datetime64[M]').astype('datetime64[D]') + (date_values % 100 - 1).astype('timedelta64[D]')
+    seconds = time_values // 10000 * 3600 + time_values // 100 % 100 * 60 + time_values % 100
+
+    return days.astype('datetime64[s]') + seconds.astype('timedelta64[s]')
+
+
+def parse_filenames(filenames: list):
+    """
+    Parse granule filenames or URLs into NumPy record array of GRANULE_DTYPE.
+
+    All filenames are parsed at once by NumPy string operations over the array
+    of filenames (see parse_basename() for the tokens of the filename).
+    """
+    granules = np.recarray(len(filenames), dtype=GRANULE_DTYPE)
+    if len(filenames) == 0:
+        return granules
+
+    urls = np.asarray(filenames, dtype=str)
+    granules.url = urls
+
+    basenames = np.char.rpartition(urls, '/')[:, 2]
+    image_1, _, image_2 = np.char.partition(basenames, SPLIT_IMAGES_TOKEN).T
+
+    # Last tokens of the second image name are specific to ITS_LIVE filename:
+    # version and optional percent valid pixels
+    no_extension, separator, _ = np.char.rpartition(image_2, '.').T
+    image_2 = np.where(separator == '', image_2, no_extension)
+    [last_token], rest = split_tokens(image_2, 1, from_end=True)
+
+    has_percent_valid = np.char.startswith(last_token, 'P') & \
+        np.char.isdigit(np.char.replace(last_token, 'P', '', count=1))
+
+    granules.percent_valid = None
+    granules.percent_valid[has_percent_valid] = [int(each[1:]) for each in last_token[has_percent_valid]]
+
+    # Second image name with the version as its last token
+    image_2 = np.where(has_percent_valid, rest, image_2)
+    [granules.version], image_2_no_version = split_tokens(image_2, 1, from_end=True)
+
+    is_optical = (np.char.count(image_1, IMAGE_TOKEN) + 1) < NUM_OPTICAL_TOKENS
+    is_radar = ~is_optical
+    granules.is_optical = is_optical
+
+    # Image pair identifier: it's the filename without percent valid pixels,
+    # and without processing dates for optical format granules
+    pair_id = np.char.add(np.char.add(image_1, IMAGE_TOKEN), image_2).astype(object)
+    optical_pair_id = []
+
+    for index, each_image, each_name in [(1, image_1, image_1), (2, image_2_no_version, image_2)]:
+        granules[f'sensor_{index}'] = np.char.partition(each_image, IMAGE_TOKEN)[:, 0]
+
+        # Optical format granule: acquisition/processing dates and path&row
+        optical_tokens, optical_rest = split_tokens(each_name[is_optical], 5)
+        granules[f'first_date_{index}'][is_optical] = to_dates(optical_tokens[3])
+        granules[f'second_date_{index}'][is_optical] = to_dates(optical_tokens[4])
+        granules[f'key_{index}'][is_optical] = optical_tokens[2]
+
+        each_pair_id = optical_tokens[0]
+        for each_token in optical_tokens[1:4]:
+            each_pair_id = np.char.add(np.char.add(each_pair_id, IMAGE_TOKEN), each_token)
+
+        optical_pair_id.append(
+            np.where(optical_rest == '', each_pair_id, np.char.add(np.char.add(each_pair_id, IMAGE_TOKEN), optical_rest))
+        )
+
+        # Radar format granule: start/end date/time and product unique ID
+        radar_tokens, _ = split_tokens(each_image[is_radar], 5, from_end=True)
+        granules[f'first_date_{index}'][is_radar] = to_dates(radar_tokens[0])
+        granules[f'second_date_{index}'][is_radar] = to_dates(radar_tokens[1])
+        granules[f'key_{index}'][is_radar] = radar_tokens[4]
+
+    pair_id[is_optical] = np.char.add(np.char.add(optical_pair_id[0], IMAGE_TOKEN), optical_pair_id[1])
+    granules.pair_id = pair_id
+
+    return granules
@@ -4,12 +4,16 @@ bounding polygon and datetime period provided by the caller.
 
 Authors: Masha Liukis, Alex Gardner, Mark Fahnestock
 """
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import copy
 from dateutil.parser import parse
 from datetime import datetime, timedelta
 import gc
 import geopandas as gpd
 import glob
+import h5py
+import itertools
 import json
 import logging
 import os
@@ -23,16 +27,19 @@ import zarr
 import dask
 # from dask.distributed import Client, performance_report
 from dask.diagnostics import ProgressBar
+import fsspec
 import numpy as np
 import pandas as pd
 import rioxarray
 import s3fs
 import subprocess
+import sys
 from tqdm import tqdm
 import xarray as xr
 from urllib.parse import urlparse
 
 # Local modules
+import granule_filename
 import itslive_utils
 from grid import Bounds, Grid
 from itscube_types import \
@@ -41,10 +48,10 @@ from itscube_types import \
     BinaryFlag, \
     FileExtension, \
     Output, \
+    CubeCheckpoint, \
     CubeOutput, \
     ShapeFile, \
     to_int_type
-import zarr_to_netcdf
 
 # Set up logging
 logging.basicConfig(
@@ -68,6 +75,155 @@ Y_ATTRS = {
 }
 
 
+class LayersAccumulator:
+    """
+    Class to accumulate 3D data variables of the datacube layers before they
+    are written to the Zarr store. Data of each layer is written directly into
+    its slot of preallocated (num_layers, len(grid_y), len(grid_x)) arrays
+    of the datatype the variable is stored with in the datacube.
+    """
+    # 3D data variables of the datacube
+    VARS = [
+        DataVars.V,
+        DataVars.V_ERROR,
+        DataVars.VX,
+        DataVars.VY,
+        DataVars.VA,
+        DataVars.VR,
+        DataVars.M11,
+        DataVars.M12,
+        DataVars.CHIP_SIZE_HEIGHT,
+        DataVars.CHIP_SIZE_WIDTH,
+        DataVars.INTERP_MASK
+    ]
+
+    def __init__(self, grid_x, grid_y):
+        """
+        Initialize object.
+
+        grid_x: X coordinates of the datacube grid.
+        grid_y: Y coordinates of the datacube grid.
+        """
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+
+        # Buffers are allocated on the first added layer
+        self.data = {}
+
+        # Flag per layer if chip_size_width is used in place of chip_size_height
+        self.chip_size_width_as_height = None
+
+        self.num_layers = 0
+
+    def capacity(self):
+        """
+        Number of layers the buffers can hold.
+        """
+        return 0 if self.chip_size_width_as_height is None else len(self.chip_size_width_as_height)
+
+    def allocate(self, num_layers: int):
+        """
+        Allocate buffers to hold "num_layers" layers, copy already accumulated
+        layers if any.
+        """
+        logging.info(f'Allocating datacube buffers for {num_layers} layers')
+
+        for each_var in LayersAccumulator.VARS:
+            buffer = np.empty(
+                (num_layers, len(self.grid_y), len(self.grid_x)),
+                dtype=DataVars.INT_TYPE[each_var]
+            )
+            if self.num_layers:
+                buffer[:self.num_layers] = self.data[each_var][:self.num_layers]
+
+            self.data[each_var] = buffer
+
+        flags = np.zeros(num_layers, dtype=bool)
+        if self.num_layers:
+            flags[:self.num_layers] = self.chip_size_width_as_height[:self.num_layers]
+
+        self.chip_size_width_as_height = flags
+
+    def clear(self):
+        """
+        Reset number of accumulated layers, buffers are kept to be re-used
+        by the next set of layers.
+        """
+        self.num_layers = 0
+
+    @staticmethod
+    def grid_index(values, grid):
+        """
+        Return indices of the coordinate values within the grid and mask of
+        values that appear in the grid. Only values identical to the grid
+        coordinates are placed into the grid.
+        """
+        cell_size = grid[1] - grid[0]
+        index = np.rint((values - grid[0])/cell_size).astype(int)
+        valid = (index >= 0) & (index < len(grid))
+        valid[valid] = grid[index[valid]] == values[valid]
+
+        return index[valid], valid
+
+    def add(self, ds: xr.Dataset, capacity: int):
+        """
+        Write 3D data variables of the layer into next slot of the buffers.
+        Data variables that are not present in the layer are set to missing
+        value for the variable.
+
+        ds: Cube layer as returned by ITSCube.preprocess_dataset().
+        capacity: Number of layers to allocate buffers for if buffers
+            need to be allocated.
+        """
+        if self.num_layers == self.capacity():
+            self.allocate(max(capacity, 2*self.num_layers))
+
+        index = self.num_layers
+
+        x_index, x_valid = LayersAccumulator.grid_index(ds.x.values, self.grid_x)
+        y_index, y_valid = LayersAccumulator.grid_index(ds.y.values, self.grid_y)
+        cube_cells = np.ix_(y_index, x_index)
+        layer_cells = np.ix_(y_valid, x_valid)
+
+        # Optical legacy granules might not have chip_size_height set, use
+        # chip_size_width instead
+        self.chip_size_width_as_height[index] = np.ma.masked_equal(
+            ds.chip_size_height.values,
+            ITSCube.CHIP_SIZE_HEIGHT_NO_VALUE
+        ).count() == 0
+
+        for each_var in LayersAccumulator.VARS:
+            missing_value = DataVars.INT_MISSING_VALUE[each_var]
+            self.data[each_var][index] = missing_value
+
+            ds_var = each_var
+            if each_var == DataVars.CHIP_SIZE_HEIGHT and self.chip_size_width_as_height[index]:
+                ds_var = DataVars.CHIP_SIZE_WIDTH
+
+            if ds_var not in ds:
+                continue
+
+            self.data[each_var][index][cube_cells] = to_int_type(
+                ds[ds_var].transpose(Coords.Y, Coords.X).values[layer_cells].astype(np.float64),
+                data_type=DataVars.INT_TYPE[each_var],
+                fill_value=missing_value
+            )
+
+        self.num_layers += 1
+
+    def data_array(self, var_name: str, mid_date_coord, attrs: dict):
+        """
+        Return xr.DataArray for accumulated layers of the data variable.
+        """
+        return xr.DataArray(
+            data=self.data[var_name][:self.num_layers],
+            coords=[mid_date_coord, self.grid_y, self.grid_x],
+            dims=[Coords.MID_DATE, Coords.Y, Coords.X],
+            name=var_name,
+            attrs=attrs
+        )
+
+
 class ITSCube:
     """
     Class to build ITS_LIVE cube: time series of velocity pairs within a
@@ -107,9 +263,98 @@ class ITSCube:
     # Local path to the skipped granules info
     SKIPPED_GRANULES_FILE = ''
 
+    # Local path to the checkpoint manifest of the datacube being created or
+    # updated: records processed granules, skipped granules and number of layers
+    # committed to the local Zarr store after each write to the store
+    CHECKPOINT_FILE = ''
+
+    # S3 path to keep the copy of the checkpoint manifest and of the local Zarr
+    # store objects that differ from the original datacube in (next to the target
+    # datacube): both are synced to S3 each time the checkpoint is written, so
+    # interrupted datacube creation or update can be resumed on another EC2
+    # instance (spot instance replacement). Is set only if requested.
+    CHECKPOINT_S3 = ''
+
+    # Suffix of the directory (next to the local Zarr store) to stage objects
+    # of the store to copy to the checkpoint in S3
+    CHECKPOINT_STAGING_SUFFIX = '.checkpoint_staging'
+
+    # Flag to resume interrupted datacube creation or update from its checkpoint
+    # manifest
+    RESUME = False
+
+    # Flag to copy only chunks of existing datacube that will be modified by the
+    # update from S3 bucket, and to copy back only new or modified objects of the
+    # updated datacube. Is valid only if updated datacube is written to the same
+    # S3 location as original datacube.
+    INCREMENTAL_SYNC = False
+
+    # Local path to the manifest of objects copied from S3 bucket for the
+    # incremental update of the datacube
+    SYNC_FILE = ''
+
+    # Suffix of the directory (next to the local Zarr store) to keep original
+    # objects of the store that are re-written by in place deletion of layers
+    LAYERS_BACKUP_SUFFIX = '.delete_layers_backup'
+
+    # Manifest of the layers backup: affected arrays with their mid_date axis
+    # and first re-written chunk along mid_date dimension
+    LAYERS_BACKUP_MANIFEST = 'manifest.json'
+
+    # Attribute of Zarr arrays that stores names of the array dimensions
+    ARRAY_DIMENSIONS_ATTR = '_ARRAY_DIMENSIONS'
+
+    # Metadata objects of Zarr store
+    ZARRAY = '.zarray'
+    ZATTRS = '.zattrs'
+    ZMETADATA = '.zmetadata'
+    ZMETADATA_KEY = 'metadata'
+
     # Engine to read xarray data into from NetCDF filecompression
     NC_ENGINE = 'h5netcdf'
 
+    # Flag to pre-screen granules by reading only their projection and x/y
+    # coordinates before reading full granules: allows to skip granules
+    # in other than target projection or with no overlap with the datacube
+    # without reading the data
+    PRESCREEN_GRANULES = True
+
+    # Attribute of the "mapping" data variable that stores EPSG code of the granule
+    SPATIAL_EPSG_ATTR = 'spatial_epsg'
+
+    # Modes to read granules from S3 bucket:
+    # * full: open granule through s3fs file object, which fetches large blocks
+    #   of the file regardless of the datacube extent
+    # * byte_range: use HDF5 chunk index of the granule (in a form of kerchunk
+    #   references) to issue range requests only for the data chunks that
+    #   intersect with the datacube extent
+    READ_FULL = 'full'
+    READ_BYTE_RANGE = 'byte_range'
+    READ_MODE = READ_FULL
+
+    # Block size (in bytes) to read HDF5 metadata of the granule with when
+    # generating kerchunk references: keep it small as only HDF5 headers and
+    # chunk index b-trees are read
+    HDF5_METADATA_BLOCK_SIZE = 512 * 1024
+
+    # Data chunks of the granule smaller than this number of bytes are inlined into
+    # kerchunk references (for example, x and y coordinates)
+    INLINE_THRESHOLD = 4096
+
+    # Kerchunk can't handle scalar "mapping" and "img_pair_info" data variables
+    # of the granule (see kerchunk/gen_refs.py): use empty scalar array in place of
+    # their data to preserve data variables and their attributes
+    SCALAR_ZARRAY = {
+        'chunks': [],
+        'compressor': None,
+        'dtype': '|u1',
+        'fill_value': 0,
+        'filters': None,
+        'order': 'C',
+        'shape': [],
+        'zarr_format': 2
+    }
+
     # Date format as it appears in granules filenames:
     # (LC08_L1TP_011002_20150821_20170405_01_T1_X_LC08_L1TP_011002_20150720_20170406_01_T1_G0240V01_P038.nc)
     DATE_FORMAT = "%Y%m%d"
@@ -122,6 +367,11 @@ class ITSCube:
     # Number of granules to write to the file at a time.
     NUM_GRANULES_TO_WRITE = 1000
 
+    # Maximum number of granules being read by workers or waiting to be added
+    # to the datacube at a time: bounds memory used by read but not yet written
+    # to the store layers while granules are streamed through the workers
+    NUM_PENDING_GRANULES = 200
+
     # Grid cell size for the datacube.
     CELL_SIZE = 240.0
 
@@ -240,14 +490,20 @@ class ITSCube:
         self.logger.info(f"Polygon's longitude/latitude coordinates: {self.polygon_coords}")
 
         # Lists to store filtered by region/start_date/end_date velocity pairs
-        # and corresponding metadata (middle dates (+ date separation in days as milliseconds),
-        # original granules URLs)
+        # metadata (attributes of the layers, middle dates (+ date separation
+        # in days as milliseconds), original granules URLs)
         self.ds = []
 
+        # 3D data of filtered velocity pairs
+        self.layers_data = LayersAccumulator(self.grid_x, self.grid_y)
+
         self.dates = []
         self.urls = []
         self.num_urls_from_api = None
 
+        # Granules that were added to the datacube or skipped
+        self.processed_urls = []
+
         # Keep track of skipped granules due to:
         # * no data coverage for the cube
         # * other than target projection
@@ -273,6 +529,20 @@ class ITSCube:
         # Number of layers for cube generation based on the searchAPI query return
         self.max_number_of_layers = 0
 
+        # Datacube the local store was copied from and files of the local store
+        # as copied (see init_checkpoint_base()), and files of the local store
+        # kept in the checkpoint in S3 bucket (see sync_checkpoint_to_s3())
+        self.checkpoint_base = {
+            CubeCheckpoint.BASE_URL: None,
+            CubeCheckpoint.BASE_ETAG: None,
+            CubeCheckpoint.BASE_FIRST_LAYER: None,
+            CubeCheckpoint.BASE_FILES: {}
+        }
+        self.checkpoint_s3 = {
+            CubeCheckpoint.S3_FILES: {},
+            CubeCheckpoint.REMOVED_FILES: []
+        }
+
         # Find corresponding to EPSG land ice mask file for the cube
         found_row = ITSCube.SHAPE_FILE.loc[ITSCube.SHAPE_FILE[ShapeFile.EPSG] == int(projection)]
         if len(found_row) != 1:
@@ -296,6 +566,7 @@ class ITSCube:
         self.layers = None
         self.dates = []
         self.urls = []
+        self.layers_data.clear()
 
         # Call Python's garbage collector
         gc.collect()
@@ -309,6 +580,7 @@ class ITSCube:
         self.clear_vars()
 
         self.num_urls_from_api = None
+        self.processed_urls = []
         # Keep track of skipped granules due to:
         # * no data coverage for the cube
         # * other than target projection
@@ -399,7 +671,6 @@ class ITSCube:
         """
         # Need to remove duplicate granules for the middle date: some granules
         # have newer processing date, keep those.
-        keep_urls = {}
         skipped_double_granules = []
 
         # Unique granules to return
@@ -422,86 +693,110 @@ class ITSCube:
             granules = list(set(found_urls).difference(landsat89_granules))
             logging.info(f'Number of non-Landsat89 granules: {len(granules)}')
 
-        for each_url in tqdm(landsat89_granules, ascii=True, desc=f'Skipping duplicate Landsat89 granules out of {len(landsat89_granules)} granules...'):
-            # Extract acquisition and processing dates
-            url_proc_1, url_proc_2, granule_id = \
-                ITSCube.get_tokens_from_filename(each_url)
-            # logging.info(f'ID={granule_id} for granule={each_url}')
-
-            # There is a granule for the mid_date already, check which processing
-            # time is newer, keep the one with newer processing date
-            if granule_id in keep_urls:
-                # Flag if newly found URL should be kept
-                keep_found_url = False
-
-                for found_url in keep_urls[granule_id]:
-                    # Check already found URLs for processing time
-                    found_proc_1, found_proc_2, found_granule_id = \
-                        ITSCube.get_tokens_from_filename(found_url)
-
-                    # IDs must match
-                    if granule_id != found_granule_id:
-                        raise RuntimeError(f'Mismatching IDs for each_url={each_url}: {granule_id} vs. found_url={found_url}: {found_granule_id}')
-
-                    # If both granules have identical processing time,
-                    # keep them both - granules might be in different projections,
-                    # any other than target projection will be handled later
-                    if url_proc_1 == found_proc_1 and \
-                            url_proc_2 == found_proc_2:
-                        keep_urls[granule_id].append(each_url)
-                        keep_found_url = True
-                        break
-
-                # There are no "identical" granules for "each_url", check if
-                # new granule has newer processing dates
-                if not keep_found_url:
-                    # Check if any of the found URLs have older processing time
-                    # than newly found URL
-                    remove_urls = []
-                    for found_url in keep_urls[granule_id]:
-                        # Check already found URL for processing time
-                        found_proc_1, found_proc_2, _ = \
-                            ITSCube.get_tokens_from_filename(found_url)
-
-                        if url_proc_1 >= found_proc_1 and \
-                                url_proc_2 >= found_proc_2:
-                            # The granule will need to be replaced with a newer
-                            # processed one
-                            remove_urls.append(found_url)
-
-                        elif url_proc_1 > found_proc_1:
-                            # There are few cases when proc_1 is newer in
-                            # each_url and proc_2 is newer in found_url, then
-                            # keep the granule with newer proc_1
-                            remove_urls.append(found_url)
-
-                    if len(remove_urls):
-                        # Some of the URLs need to be removed due to newer
-                        # processed granule
-                        logging.info(f"Skipping {remove_urls} in favor of new {each_url}")
-                        skipped_double_granules.extend(remove_urls)
-
-                        # Remove older processed granules
-                        keep_urls[granule_id][:] = [each for each in keep_urls[granule_id] if each not in remove_urls]
-                        # Add new granule with newer processing date
-                        keep_urls[granule_id].append(each_url)
+        logging.info(f'Skipping duplicate Landsat89 granules out of {len(landsat89_granules)} granules...')
 
-                    else:
-                        # New granule has older processing date, don't include
-                        logging.info(f"Skipping new {each_url} in favor of {keep_urls[granule_id]}")
-                        skipped_double_granules.append(each_url)
+        # Parse processing dates and IDs of all granules once
+        proc_1, proc_2, ids = ITSCube.get_tokens_from_filenames(landsat89_granules)
 
-            else:
-                # This is a granule for new ID, append it to URLs to keep
-                keep_urls.setdefault(granule_id, []).append(each_url)
+        # Group granules by ID: order groups by the first granule of each ID
+        # and preserve order of granules within each group
+        _, first_index, group_index, group_size = np.unique(
+            ids,
+            return_index=True,
+            return_inverse=True,
+            return_counts=True
+        )
+        group_order = np.argsort(first_index)
+        group_members = np.split(np.argsort(group_index, kind='stable'), np.cumsum(group_size)[:-1])
+
+        # Skipped granules along with index of the granule that triggered the skip
+        skipped_by_index = []
+
+        for each_group in group_order:
+            members = group_members[each_group]
+
+            if len(members) == 1:
+                # The only granule for the ID
+                granules.append(landsat89_granules[members[0]])
+                continue
 
-        for each in keep_urls.values():
-            granules.extend(each)
+            granules.extend(ITSCube.resolve_duplicate_l89_granules(
+                landsat89_granules,
+                proc_1,
+                proc_2,
+                members,
+                skipped_by_index
+            ))
+
+        # Report skipped granules in the order granules were examined
+        skipped_by_index.sort(key=lambda each: each[0])
+        for _, each_skipped in skipped_by_index:
+            skipped_double_granules.extend(each_skipped)
 
         logging.info(f'Keeping {len(granules)} unique granules, skipping {len(skipped_double_granules)} Landsat89 granules')
 
         return granules, skipped_double_granules
 
+    @staticmethod
+    def resolve_duplicate_l89_granules(urls: list, proc_1: np.ndarray, proc_2: np.ndarray, members: np.ndarray, skipped: list):
+        """
+        Resolve duplicate granules of the same ID: keep granules with the newest
+        processing dates.
+
+        urls: Granules URLs.
+        proc_1, proc_2: Processing dates of the first and second images of each granule.
+        members: Indices of the granules with the same ID in the order the
+            granules were found.
+        skipped: List to append tuples of the index of the examined granule and
+            granules skipped because of it to.
+
+        Returns indices of the granules to keep.
+        """
+        keep_index = [members[0]]
+
+        for each_index in members[1:]:
+            each_url = urls[each_index]
+            url_proc_1 = proc_1[each_index]
+            url_proc_2 = proc_2[each_index]
+
+            # If both granules have identical processing time,
+            # keep them both - granules might be in different projections,
+            # any other than target projection will be handled later
+            if any(url_proc_1 == proc_1[found] and url_proc_2 == proc_2[found] for found in keep_index):
+                keep_index.append(each_index)
+                continue
+
+            # There are no "identical" granules for "each_url", check if
+            # new granule has newer processing dates: check if any of the found
+            # URLs have older processing time than newly found URL
+            remove_index = [
+                found for found in keep_index
+                # The granule will need to be replaced with a newer processed one
+                if (url_proc_1 >= proc_1[found] and url_proc_2 >= proc_2[found]) or
+                # There are few cases when proc_1 is newer in each_url and
+                # proc_2 is newer in found_url, then keep the granule with newer proc_1
+                url_proc_1 > proc_1[found]
+            ]
+
+            if len(remove_index):
+                # Some of the URLs need to be removed due to newer
+                # processed granule
+                remove_urls = [urls[found] for found in remove_index]
+                logging.info(f"Skipping {remove_urls} in favor of new {each_url}")
+                skipped.append((each_index, remove_urls))
+
+                # Remove older processed granules and add new granule with newer
+                # processing date
+                keep_index = [found for found in keep_index if found not in remove_index]
+                keep_index.append(each_index)
+
+            else:
+                # New granule has older processing date, don't include
+                logging.info(f"Skipping new {each_url} in favor of {[urls[found] for found in keep_index]}")
+                skipped.append((each_index, [each_url]))
+
+        return [urls[each] for each in keep_index]
+
     def exclude_processed_granules(self, found_urls: list, cube_ds: xr.Dataset, skipped_granules: dict):
         """
         * Exclude datacube granules, and all skipped granules in existing datacube
@@ -595,34 +890,28 @@ class ITSCube:
         identifier for the image pair by removing processing dates, percent valid
         pixels fields and file extension.
         """
-        files = os.path.basename(filename).split(ITSCube.SPLIT_IMAGES_TOKEN)
-
-        # Get acquisition, processing date, path_row for both images from url and index_url
-        url_tokens = os.path.basename(files[0]).split(ITSCube.IMAGE_TOKEN)
+        tokens = dict(zip(granule_filename.GRANULE_DTYPE.names, granule_filename.parse_filename(filename)))
 
-        url_proc_date_1 = datetime.strptime(url_tokens[4], ITSCube.DATE_FORMAT)
+        return tokens['second_date_1'], tokens['second_date_2'], tokens['pair_id']
 
-        # Remove processing date from the first image name: don't replace date
-        # token with an empty string as acquisition and processing dates can be
-        # the same
-        id_tokens = url_tokens[:4]
-        id_tokens.extend(url_tokens[5:])
-
-        url_tokens = os.path.basename(files[1]).split(ITSCube.IMAGE_TOKEN)
-        url_proc_date_2 = datetime.strptime(url_tokens[4], ITSCube.DATE_FORMAT)
-
-        # Remove processing date and _Pxxx.nc from the second image name
-        id_tokens.extend(url_tokens[:4])
-        id_tokens.extend(url_tokens[5:8])
+    @staticmethod
+    def get_tokens_from_filenames(filenames: list):
+        """
+        Extract processing dates for two images and unique identifier of the
+        image pair (see get_tokens_from_filename()) for all filenames at once.
 
-        id = ITSCube.IMAGE_TOKEN.join(id_tokens)
+        Returns arrays of processing dates of first and second images, and
+        array of image pair identifiers.
+        """
+        granules = granule_filename.parse_filenames(filenames)
 
-        return url_proc_date_1, url_proc_date_2, id
+        return granules.second_date_1, granules.second_date_2, granules.pair_id
 
     def add_layer(self, is_empty, layer_projection, mid_date, url, data):
         """
         Examine the layer if it qualifies to be added as a cube layer.
         """
+        self.processed_urls.append(url)
 
         if data is not None:
             # "Duplicate" granules are handled apriori for newly constructed
@@ -630,7 +919,8 @@ class ITSCube:
             #  (see self.exclude_processed_granules() method).
             # print(f"Adding {url} for {mid_date}")
             self.dates.append(mid_date)
-            self.ds.append(data)
+            self.layers_data.add(data, ITSCube.NUM_GRANULES_TO_WRITE)
+            self.ds.append(ITSCube.layer_metadata(data))
             self.urls.append(url)
 
         else:
@@ -642,6 +932,39 @@ class ITSCube:
                 # Layer corresponds to other than target projection
                 self.skipped_granules[DataVars.SKIP_PROJECTION].setdefault(layer_projection, []).append(url)
 
+    @staticmethod
+    def layer_metadata(ds: xr.Dataset):
+        """
+        Return xr.Dataset that preserves only attributes of the cube layer and
+        of its data variables: data of the layer is stored by LayersAccumulator.
+        """
+        return xr.Dataset(
+            data_vars={
+                each: ([], np.uint8(0), copy.deepcopy(ds[each].attrs)) for each in ds.data_vars
+            },
+            attrs=copy.deepcopy(ds.attrs)
+        )
+
+    def get_layers_var(self, var_name: str, mid_date_coord, attrs_var_name: str = None):
+        """
+        Return xr.DataArray for accumulated layers of the data variable. Attributes
+        of the data variable are inherited from the first layer, if the variable
+        is present in the layer.
+
+        var_name: Name of the data variable.
+        mid_date_coord: Middle date coordinate for collected data.
+        attrs_var_name: Name of the data variable to inherit attributes from if
+            other than "var_name".
+        """
+        if attrs_var_name is None:
+            attrs_var_name = var_name
+
+        attrs = {}
+        if attrs_var_name in self.ds[0]:
+            attrs = copy.deepcopy(self.ds[0][attrs_var_name].attrs)
+
+        return self.layers_data.data_array(var_name, mid_date_coord, attrs)
+
     @staticmethod
     def init_output_store(output_dir: str):
         """
@@ -738,7 +1061,15 @@ class ITSCube:
         """
         self.logger.info(f"ITS_LIVE search API parameters: {api_params}")
 
-        if ITSCube.exists(output_dir, output_bucket):
+        checkpoint = None
+        if ITSCube.RESUME:
+            checkpoint = ITSCube.read_checkpoint(output_dir)
+
+        if checkpoint is not None:
+            # Resume interrupted datacube creation or update
+            self.update_parallel(api_params, output_dir, output_bucket, num_granules, checkpoint)
+
+        elif ITSCube.exists(output_dir, output_bucket):
             # Datacube exists, update
             self.update_parallel(api_params, output_dir, output_bucket, num_granules)
 
@@ -746,7 +1077,715 @@ class ITSCube:
             # Create new datacube
             self.create_parallel(api_params, output_dir, output_bucket, num_granules)
 
-    def update_parallel(self, api_params: dict, output_dir: str, output_bucket: str, num_granules=None):
+    def write_checkpoint(self, output_dir: str, pending_delete: list = None):
+        """
+        Write checkpoint manifest for the layers committed to the local Zarr store.
+        The manifest is written to the temporary file first, which then replaces
+        existing manifest: manifest is never partially written.
+
+        pending_delete: Granules of the layers about to be deleted from the store
+            by delete_layers(). It's recorded before layers are deleted, so
+            interrupted deletion is always detected on resume. Next checkpoint
+            clears it.
+
+        If ITSCube.CHECKPOINT_S3 is set, objects of the local store that changed
+        since previous checkpoint are copied to S3 before the manifest.
+        """
+        num_layers = 0
+        last_mid_date = None
+
+        if os.path.exists(output_dir):
+            mid_date = zarr.open_group(output_dir, mode='r')[Coords.MID_DATE]
+            num_layers = mid_date.shape[0]
+
+            if num_layers:
+                last_mid_date = int(mid_date[-1])
+
+        if len(ITSCube.CHECKPOINT_S3):
+            self.sync_checkpoint_to_s3(output_dir)
+
+        checkpoint = {
+            CubeCheckpoint.PROCESSED_GRANULES: self.processed_urls,
+            CubeCheckpoint.SKIPPED_GRANULES: self.skipped_granules,
+            CubeCheckpoint.NUM_LAYERS: num_layers,
+            CubeCheckpoint.LAST_MID_DATE: last_mid_date,
+            CubeCheckpoint.DATE_CREATED: self.date_created,
+            CubeCheckpoint.DATE_UPDATED: self.date_updated,
+            CubeCheckpoint.PENDING_DELETE: pending_delete or [],
+            **self.checkpoint_base,
+            **self.checkpoint_s3
+        }
+
+        ITSCube.write_checkpoint_file(checkpoint)
+
+        self.logger.info(f"Wrote checkpoint for {len(self.processed_urls)} processed granules, {num_layers} layers to {ITSCube.CHECKPOINT_FILE}")
+
+        if len(ITSCube.CHECKPOINT_S3):
+            s3_checkpoint_file = os.path.join(ITSCube.CHECKPOINT_S3, os.path.basename(ITSCube.CHECKPOINT_FILE))
+            ITSCube.run_aws_command(
+                ["awsv2", "s3", "cp", ITSCube.CHECKPOINT_FILE, s3_checkpoint_file],
+                f"Failed to copy {ITSCube.CHECKPOINT_FILE} to {s3_checkpoint_file}"
+            )
+
+    @staticmethod
+    def write_checkpoint_file(checkpoint: dict):
+        """
+        Write checkpoint manifest to the temporary file, which then replaces
+        existing manifest.
+        """
+        tmp_checkpoint_file = f'{ITSCube.CHECKPOINT_FILE}.tmp'
+        with open(tmp_checkpoint_file, 'w') as fh:
+            json.dump(checkpoint, fh, indent=3)
+
+        os.replace(tmp_checkpoint_file, ITSCube.CHECKPOINT_FILE)
+
+    @staticmethod
+    def run_aws_command(command_line: list, error_message: str):
+        """
+        Run AWS CLI command, raise an exception if the command fails.
+        """
+        logging.info(' '.join(command_line))
+
+        command_return = subprocess.run(
+            command_line,
+            env=os.environ.copy(),
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT
+        )
+        if command_return.returncode != 0:
+            raise RuntimeError(f"{error_message}: {command_return.stdout}")
+
+    @staticmethod
+    def store_files(output_dir: str):
+        """
+        Return size and modification time (in ns) of each file of the local Zarr
+        store: {relative_path: [size, mtime]}.
+        """
+        store_files = {}
+
+        for each_dir, _, each_files in os.walk(output_dir):
+            for each_file in each_files:
+                each_path = os.path.join(each_dir, each_file)
+                each_stat = os.stat(each_path)
+                store_files[os.path.relpath(each_path, output_dir)] = [each_stat.st_size, each_stat.st_mtime_ns]
+
+        return store_files
+
+    def init_checkpoint_base(self, output_dir: str, source_url: str, first_layer):
+        """
+        Record datacube in S3 bucket the local store was copied from, and files
+        of the local store as copied. Original datacube is not modified until
+        updated datacube is copied back to S3 bucket, so only files that differ
+        from the copied ones need to be kept in the checkpoint in S3 bucket.
+
+        output_dir: Local datacube Zarr store.
+        source_url: S3 path to the datacube Zarr store.
+        first_layer: Index of the first layer of the partially copied datacube
+            (see sync_from_s3()), None if the whole datacube was copied.
+        """
+        if len(ITSCube.CHECKPOINT_S3) == 0:
+            return
+
+        s3 = s3fs.S3FileSystem(skip_instance_cache=True)
+
+        self.checkpoint_base = {
+            CubeCheckpoint.BASE_URL: source_url,
+            CubeCheckpoint.BASE_ETAG: s3.info(os.path.join(source_url, ITSCube.ZMETADATA))['ETag'],
+            CubeCheckpoint.BASE_FIRST_LAYER: first_layer,
+            CubeCheckpoint.BASE_FILES: ITSCube.store_files(output_dir)
+        }
+
+    def sync_checkpoint_to_s3(self, output_dir: str):
+        """
+        Copy objects of the local Zarr store that differ from the datacube the
+        store was copied from (all objects for new datacube) to ITSCube.CHECKPOINT_S3.
+        Only objects that changed since previous checkpoint are copied, and
+        objects that no longer differ from the datacube are removed from S3.
+        Objects are copied before the manifest, so manifest in S3 never refers to
+        the layers that are not in S3 yet.
+        """
+        start_time = timeit.default_timer()
+
+        base_files = self.checkpoint_base[CubeCheckpoint.BASE_FILES]
+        s3_files = self.checkpoint_s3[CubeCheckpoint.S3_FILES]
+
+        local_files = ITSCube.store_files(output_dir) if os.path.exists(output_dir) else {}
+        changed_files = {each: value for each, value in local_files.items() if base_files.get(each) != value}
+
+        copy_files = [each for each, value in changed_files.items() if s3_files.get(each) != value]
+        stale_files = [each for each in s3_files if each not in changed_files]
+
+        s3_store = os.path.join(ITSCube.CHECKPOINT_S3, os.path.basename(output_dir))
+
+        if len(copy_files):
+            # Hard link files to copy into staging directory to copy them all
+            # by one AWS CLI command
+            staging_dir = output_dir.rstrip('/') + ITSCube.CHECKPOINT_STAGING_SUFFIX
+            if os.path.exists(staging_dir):
+                shutil.rmtree(staging_dir)
+
+            try:
+                for each_file in copy_files:
+                    staging_file = os.path.join(staging_dir, each_file)
+                    os.makedirs(os.path.dirname(staging_file), exist_ok=True)
+                    os.link(os.path.join(output_dir, each_file), staging_file)
+
+                ITSCube.run_aws_command(
+                    ["awsv2", "s3", "cp", "--recursive", staging_dir, s3_store],
+                    f"Failed to copy {len(copy_files)} objects of {output_dir} to {s3_store}"
+                )
+
+            finally:
+                shutil.rmtree(staging_dir)
+
+        if len(stale_files):
+            s3 = s3fs.S3FileSystem(skip_instance_cache=True)
+            s3.rm([os.path.join(s3_store, each) for each in stale_files])
+
+        self.checkpoint_s3 = {
+            CubeCheckpoint.S3_FILES: changed_files,
+            CubeCheckpoint.REMOVED_FILES: [each for each in base_files if each not in local_files]
+        }
+
+        time_delta = timeit.default_timer() - start_time
+        logging.info(
+            f"Synced checkpoint to {ITSCube.CHECKPOINT_S3}: copied {len(copy_files)} and removed {len(stale_files)} "
+            f"objects (took {time_delta} seconds)"
+        )
+
+    @staticmethod
+    def restore_checkpoint_from_s3(output_dir: str):
+        """
+        Restore checkpoint manifest and local Zarr store from ITSCube.CHECKPOINT_S3
+        (if local copies were lost, for example, when processing was interrupted
+        by spot instance replacement): the store is copied from the original
+        datacube the same way it was copied for the update, then the files
+        kept in the checkpoint are copied over it. If original datacube has
+        changed since the checkpoint was written, the checkpoint is removed.
+
+        Return True if checkpoint was restored, False otherwise.
+        """
+        if len(ITSCube.CHECKPOINT_S3) == 0:
+            return False
+
+        s3 = s3fs.S3FileSystem(skip_instance_cache=True)
+        s3_checkpoint_file = os.path.join(ITSCube.CHECKPOINT_S3, os.path.basename(ITSCube.CHECKPOINT_FILE))
+
+        if not s3.exists(s3_checkpoint_file):
+            logging.info(f"No checkpoint {s3_checkpoint_file} is found")
+            return False
+
+        with s3.open(s3_checkpoint_file) as fh:
+            checkpoint = json.load(fh)
+
+        logging.info(f"Restoring checkpoint from {ITSCube.CHECKPOINT_S3}")
+        ITSCube.init_output_store(output_dir)
+
+        base_url = checkpoint[CubeCheckpoint.BASE_URL]
+        if base_url is not None:
+            zmetadata_file = os.path.join(base_url, ITSCube.ZMETADATA)
+
+            if s3.info(zmetadata_file)['ETag'] != checkpoint[CubeCheckpoint.BASE_ETAG]:
+                logging.info(f"{base_url} has changed since checkpoint was written, removing the checkpoint")
+                ITSCube.remove_checkpoint()
+                return False
+
+            first_layer = checkpoint[CubeCheckpoint.BASE_FIRST_LAYER]
+            if first_layer is None:
+                ITSCube.run_aws_command(
+                    ["awsv2", "s3", "cp", "--recursive", base_url, output_dir],
+                    f"Failed to copy {base_url} to {output_dir}"
+                )
+
+            else:
+                zmetadata = json.loads(s3.cat(zmetadata_file))[ITSCube.ZMETADATA_KEY]
+                ITSCube.sync_from_s3(base_url, output_dir, zmetadata, first_layer)
+
+            # AWS CLI sets modification time of the copied files to the time of
+            # S3 objects
+            checkpoint[CubeCheckpoint.BASE_FILES] = ITSCube.store_files(output_dir)
+
+            for each_file in checkpoint[CubeCheckpoint.REMOVED_FILES]:
+                each_path = os.path.join(output_dir, each_file)
+                if os.path.exists(each_path):
+                    os.unlink(each_path)
+
+        if len(checkpoint[CubeCheckpoint.S3_FILES]):
+            s3_store = os.path.join(ITSCube.CHECKPOINT_S3, os.path.basename(output_dir))
+            ITSCube.run_aws_command(
+                ["awsv2", "s3", "cp", "--recursive", s3_store, output_dir],
+                f"Failed to copy {s3_store} to {output_dir}"
+            )
+
+            local_files = ITSCube.store_files(output_dir)
+            checkpoint[CubeCheckpoint.S3_FILES] = {each: local_files[each] for each in checkpoint[CubeCheckpoint.S3_FILES]}
+
+        ITSCube.write_checkpoint_file(checkpoint)
+
+        return True
+
+    @staticmethod
+    def read_checkpoint(output_dir: str):
+        """
+        Read checkpoint manifest of interrupted datacube creation or update. Layers
+        that were appended to the local Zarr store after the checkpoint was written
+        are removed from the store. If local manifest or local store does not
+        exist, these are restored from their copy in S3 (if any).
+
+        Return checkpoint manifest or None if there is nothing to resume from.
+        """
+        if not os.path.exists(ITSCube.CHECKPOINT_FILE) or not os.path.exists(output_dir):
+            ITSCube.restore_checkpoint_from_s3(output_dir)
+
+        # Undo interrupted deletion of layers if any
+        if os.path.exists(output_dir):
+            ITSCube.restore_layers_backup(output_dir)
+
+        if not os.path.exists(ITSCube.CHECKPOINT_FILE):
+            logging.info(f"No checkpoint {ITSCube.CHECKPOINT_FILE} is found, nothing to resume")
+            return None
+
+        with open(ITSCube.CHECKPOINT_FILE) as fh:
+            checkpoint = json.load(fh)
+
+        num_layers = checkpoint[CubeCheckpoint.NUM_LAYERS]
+
+        if len(checkpoint[CubeCheckpoint.PENDING_DELETE]):
+            logging.info(
+                f"Deletion of {len(checkpoint[CubeCheckpoint.PENDING_DELETE])} layers from {output_dir} "
+                f"was interrupted, layers will be deleted again"
+            )
+
+        if num_layers == 0 or not os.path.exists(output_dir):
+            # No layers were committed to the store, start from the scratch
+            logging.info(f"No layers are committed to {output_dir} per {ITSCube.CHECKPOINT_FILE}, nothing to resume")
+            ITSCube.init_output_store(output_dir)
+            return None
+
+        logging.info(
+            f"Resuming from {ITSCube.CHECKPOINT_FILE}: {len(checkpoint[CubeCheckpoint.PROCESSED_GRANULES])} "
+            f"processed granules, {num_layers} layers in {output_dir}"
+        )
+        ITSCube.truncate_store(output_dir, num_layers)
+
+        return checkpoint
+
+    @staticmethod
+    def truncate_store(output_dir: str, num_layers: int):
+        """
+        Remove layers beyond first "num_layers" layers of the Zarr store: these
+        are left behind by interrupted append to the store.
+
+        valid_count of the store is re-computed from vx of the remaining layers:
+        interrupted append might have written the count that includes removed
+        layers. Re-computation is done before layers are removed, so truncation
+        can be interrupted and repeated.
+        """
+        store = zarr.open_group(output_dir, mode='r+')
+
+        arrays = []
+        for _, each_array in store.arrays():
+            dims = each_array.attrs.get(ITSCube.ARRAY_DIMENSIONS_ATTR, [])
+            if Coords.MID_DATE in dims and each_array.shape[dims.index(Coords.MID_DATE)] > num_layers:
+                arrays.append((each_array, dims.index(Coords.MID_DATE)))
+
+        if len(arrays) == 0:
+            # Nothing to remove
+            return
+
+        logging.info(f"Truncating {output_dir} from {store[DataVars.URL].shape[0]} to {num_layers} layers")
+
+        if DataVars.VALID_COUNT in store:
+            ITSCube.recompute_valid_count(store, num_layers)
+
+        for each_array, time_axis in arrays:
+            new_shape = list(each_array.shape)
+            new_shape[time_axis] = num_layers
+            each_array.resize(*new_shape)
+
+        zarr.consolidate_metadata(output_dir)
+
+    @staticmethod
+    def recompute_valid_count(store, num_layers: int):
+        """
+        Re-compute valid_count of the Zarr store as number of valid vx values
+        per spacial point within first num_layers layers. vx is read one chunk
+        along each of spacial dimensions at a time to bound memory usage.
+        """
+        vx = store[DataVars.VX]
+        time_axis = vx.attrs[ITSCube.ARRAY_DIMENSIONS_ATTR].index(Coords.MID_DATE)
+
+        valid_count = np.zeros(store[DataVars.VALID_COUNT].shape, dtype=np.uint32)
+
+        other_slices = [
+            [slice(start, start + each_chunk) for start in range(0, each_size, each_chunk)]
+            if each_axis != time_axis else [slice(0, num_layers)]
+            for each_axis, (each_size, each_chunk) in enumerate(zip(vx.shape, vx.chunks))
+        ]
+
+        for each_slices in itertools.product(*other_slices):
+            count_slices = tuple(each for each_axis, each in enumerate(each_slices) if each_axis != time_axis)
+            valid_count[count_slices] = np.sum(
+                vx[each_slices] != DataVars.INT_MISSING_VALUE[DataVars.VX],
+                axis=time_axis,
+                dtype=np.uint32
+            )
+
+        store[DataVars.VALID_COUNT][:] = valid_count
+
+    @staticmethod
+    def delete_layers(output_dir: str, granules: list):
+        """
+        Delete layers that correspond to the granules from the Zarr store in place.
+
+        Layers that follow the first deleted layer are shifted along mid_date
+        dimension to fill up the gaps, and arrays are resized to the new number
+        of layers. Only chunks that hold the first deleted layer or any of the
+        following layers are re-written, the rest of the store is not touched.
+        Cost is proportional to the number of layers that follow the first
+        deleted layer: deletion of the early layers costs about as much as
+        re-writing of the whole store. Deleted layers are usually recent
+        duplicates of new granules, so the re-written tail is short.
+
+        Crash behavior: before the store is modified, all objects to be re-written
+        (affected chunks and metadata) are hard linked into the backup directory
+        (Zarr replaces objects of the directory store instead of re-writing
+        them in place, so backup keeps original content). The backup is removed
+        once all layers are deleted. If processing is interrupted while layers
+        are deleted, the store is restored from the backup when delete_layers()
+        or read_checkpoint() are called next time, so the store is never left
+        with partially shifted layers. Caller records layers to delete in the
+        checkpoint before the call (see write_checkpoint()), so resume repeats
+        the deletion.
+
+        output_dir: Local datacube Zarr store.
+        granules: Granules URLs of the layers to delete.
+        """
+        ITSCube.restore_layers_backup(output_dir)
+
+        store = zarr.open_group(output_dir, mode='r+')
+
+        keep_layers = ~np.isin(store[DataVars.URL][:], granules)
+        delete_index = np.flatnonzero(~keep_layers)
+
+        if len(delete_index) == 0:
+            logging.info(f"None of the layers to delete are found in {output_dir}")
+            return
+
+        # Index of the first deleted layer: all layers before it stay in place
+        first_index = delete_index[0]
+        keep_layers = keep_layers[first_index:]
+        num_layers = int(first_index + keep_layers.sum())
+
+        logging.info(
+            f"Deleting {len(delete_index)} layers from {output_dir}: "
+            f"shifting {len(keep_layers)} of {store[DataVars.URL].shape[0]} layers starting at index {first_index}"
+        )
+        start_time = timeit.default_timer()
+
+        # Number of valid vx values of deleted layers per spacial point
+        deleted_count = None
+        if DataVars.VALID_COUNT in store:
+            deleted_count = np.zeros(store[DataVars.VALID_COUNT].shape, dtype=np.uint32)
+
+        ITSCube.backup_layers(output_dir, store, first_index)
+
+        for each_name, each_array in store.arrays():
+            dims = each_array.attrs.get(ITSCube.ARRAY_DIMENSIONS_ATTR, [])
+            if Coords.MID_DATE not in dims:
+                continue
+
+            time_axis = dims.index(Coords.MID_DATE)
+            count_deleted = (each_name == DataVars.VX and deleted_count is not None)
+
+            # Process one chunk along each of other than mid_date dimensions at a
+            # time to bound memory usage
+            other_slices = [
+                [slice(start, start + each_chunk) for start in range(0, each_size, each_chunk)]
+                if each_axis != time_axis else [None]
+                for each_axis, (each_size, each_chunk) in enumerate(zip(each_array.shape, each_array.chunks))
+            ]
+
+            for each_slices in itertools.product(*other_slices):
+                read_slices = list(each_slices)
+                read_slices[time_axis] = slice(first_index, None)
+
+                data = each_array[tuple(read_slices)]
+
+                if count_deleted:
+                    count_slices = tuple(each for each_axis, each in enumerate(each_slices) if each_axis != time_axis)
+                    deleted_count[count_slices] += np.sum(
+                        np.compress(~keep_layers, data, axis=time_axis) != DataVars.INT_MISSING_VALUE[DataVars.VX],
+                        axis=time_axis,
+                        dtype=np.uint32
+                    )
+
+                data = np.compress(keep_layers, data, axis=time_axis)
+
+                write_slices = list(each_slices)
+                write_slices[time_axis] = slice(first_index, num_layers)
+                each_array[tuple(write_slices)] = data
+
+            new_shape = list(each_array.shape)
+            new_shape[time_axis] = num_layers
+            each_array.resize(*new_shape)
+
+        if deleted_count is not None:
+            store[DataVars.VALID_COUNT][:] = store[DataVars.VALID_COUNT][:] - deleted_count
+
+        zarr.consolidate_metadata(output_dir)
+
+        # All layers are deleted, backup is not needed anymore
+        shutil.rmtree(output_dir + ITSCube.LAYERS_BACKUP_SUFFIX)
+
+        time_delta = timeit.default_timer() - start_time
+        logging.info(f"Deleted {len(delete_index)} layers, {num_layers} layers remain (took {time_delta} seconds)")
+
+    @staticmethod
+    def affected_objects(output_dir: str, array_name: str, time_axis, first_chunk: int):
+        """
+        Objects of the Zarr array (relative to the store) that are re-written by
+        deletion of layers: metadata and chunks starting with first_chunk along
+        mid_date dimension (all chunks if time_axis is None).
+        """
+        array_dir = os.path.join(output_dir, array_name)
+        objects = []
+
+        for each_dir, _, each_files in os.walk(array_dir):
+            for each_file in each_files:
+                each_key = os.path.relpath(os.path.join(each_dir, each_file), array_dir)
+
+                if time_axis is not None and not os.path.basename(each_key).startswith('.'):
+                    # Chunk key is either "0.0.0" or nested "0/0/0"
+                    if int(each_key.replace(os.sep, '.').split('.')[time_axis]) < first_chunk:
+                        continue
+
+                objects.append(os.path.join(array_name, each_key))
+
+        return objects
+
+    @staticmethod
+    def backup_layers(output_dir: str, store, first_index: int):
+        """
+        Hard link objects of the Zarr store to be re-written by deletion of
+        layers into the backup directory. Backup is collected in the temporary
+        directory first, which then is renamed: backup directory always holds
+        complete backup.
+
+        output_dir: Local datacube Zarr store.
+        store: Zarr group of the datacube store.
+        first_index: Index of the first deleted layer.
+        """
+        backup_dir = output_dir + ITSCube.LAYERS_BACKUP_SUFFIX
+        tmp_backup_dir = f'{backup_dir}.tmp'
+
+        if os.path.exists(tmp_backup_dir):
+            shutil.rmtree(tmp_backup_dir)
+
+        manifest = {}
+        objects = [each for each in os.listdir(output_dir) if each.startswith('.z')]
+
+        for each_name, each_array in store.arrays():
+            dims = each_array.attrs.get(ITSCube.ARRAY_DIMENSIONS_ATTR, [])
+
+            if Coords.MID_DATE in dims:
+                time_axis = dims.index(Coords.MID_DATE)
+                manifest[each_name] = [time_axis, int(first_index) // each_array.chunks[time_axis]]
+
+            elif each_name == DataVars.VALID_COUNT:
+                manifest[each_name] = [None, 0]
+
+            else:
+                continue
+
+            objects.extend(ITSCube.affected_objects(output_dir, each_name, *manifest[each_name]))
+
+        for each_object in objects:
+            backup_path = os.path.join(tmp_backup_dir, each_object)
+            os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+            os.link(os.path.join(output_dir, each_object), backup_path)
+
+        with open(os.path.join(tmp_backup_dir, ITSCube.LAYERS_BACKUP_MANIFEST), 'w') as fh:
+            json.dump(manifest, fh)
+
+        os.rename(tmp_backup_dir, backup_dir)
+        logging.info(f"Backed up {len(objects)} objects of {output_dir} to {backup_dir}")
+
+    @staticmethod
+    def restore_layers_backup(output_dir: str):
+        """
+        Restore Zarr store from the backup left behind by interrupted deletion of
+        layers, if any. Objects created by interrupted deletion are removed, and
+        original objects are linked back into the store. Restore can be
+        interrupted and repeated: backup is removed only when store is restored.
+        """
+        backup_dir = output_dir + ITSCube.LAYERS_BACKUP_SUFFIX
+
+        if os.path.exists(f'{backup_dir}.tmp'):
+            # Store was not modified yet when processing was interrupted
+            shutil.rmtree(f'{backup_dir}.tmp')
+
+        if not os.path.exists(backup_dir):
+            return
+
+        logging.info(f"Restoring {output_dir} from {backup_dir} left by interrupted deletion of layers")
+
+        with open(os.path.join(backup_dir, ITSCube.LAYERS_BACKUP_MANIFEST)) as fh:
+            manifest = json.load(fh)
+
+        for each_name, (time_axis, first_chunk) in manifest.items():
+            for each_object in ITSCube.affected_objects(output_dir, each_name, time_axis, first_chunk):
+                if not os.path.exists(os.path.join(backup_dir, each_object)):
+                    os.unlink(os.path.join(output_dir, each_object))
+
+        for each_dir, _, each_files in os.walk(backup_dir):
+            for each_file in each_files:
+                backup_path = os.path.join(each_dir, each_file)
+                each_object = os.path.relpath(backup_path, backup_dir)
+
+                if each_object == ITSCube.LAYERS_BACKUP_MANIFEST:
+                    continue
+
+                store_path = os.path.join(output_dir, each_object)
+                if os.path.exists(store_path) and os.path.samefile(backup_path, store_path):
+                    # Object was not re-written
+                    continue
+
+                tmp_path = f'{store_path}.restore'
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+
+                os.makedirs(os.path.dirname(store_path), exist_ok=True)
+                os.link(backup_path, tmp_path)
+                os.replace(tmp_path, store_path)
+
+        shutil.rmtree(backup_dir)
+
+    @staticmethod
+    def touched_chunks_filters(zmetadata: dict, first_layer: int):
+        """
+        Build AWS CLI filters to select objects of the datacube Zarr store that
+        are modified by the update: chunks of mid_date dependent data variables
+        that hold first_layer or any of the following layers. All metadata
+        objects and all chunks of 1-dimensional or mid_date independent variables
+        are selected.
+
+        zmetadata: Consolidated metadata of the datacube Zarr store.
+        first_layer: Index of the first layer of the datacube to be modified.
+        """
+        filters = []
+
+        for each_key, each_value in zmetadata.items():
+            if not each_key.endswith(ITSCube.ZARRAY):
+                continue
+
+            array_name = os.path.dirname(each_key)
+            dims = zmetadata[os.path.join(array_name, ITSCube.ZATTRS)].get(ITSCube.ARRAY_DIMENSIONS_ATTR, [])
+            if Coords.MID_DATE not in dims or len(dims) == 1:
+                continue
+
+            time_axis = dims.index(Coords.MID_DATE)
+            time_chunk = each_value['chunks'][time_axis]
+            num_chunks = -(-each_value['shape'][time_axis] // time_chunk)
+
+            # Exclude all chunks of the variable but metadata and touched chunks
+            filters.extend([
+                '--exclude', f'{array_name}/*',
+                '--include', f'{array_name}/.z*'
+            ])
+
+            for each_chunk in range(first_layer // time_chunk, num_chunks):
+                chunk_key = ['*'] * len(dims)
+                chunk_key[time_axis] = str(each_chunk)
+                filters.extend(['--include', f'{array_name}/' + each_value.get('dimension_separator', '.').join(chunk_key)])
+
+        return filters
+
+    @staticmethod
+    def sync_from_s3(source_url: str, output_dir: str, zmetadata: dict, first_layer: int):
+        """
+        Copy datacube from S3 bucket to the local Zarr store: copy only objects
+        of the store to be modified by the update. Record all copied objects to
+        the sync manifest to identify objects to remove from S3 bucket once
+        updated datacube is copied back.
+
+        source_url: S3 path to the datacube Zarr store.
+        output_dir: Local datacube Zarr store.
+        zmetadata: Consolidated metadata of the datacube Zarr store.
+        first_layer: Index of the first layer of the datacube to be modified.
+        """
+        command_line = [
+            "awsv2", "s3", "cp", "--recursive",
+            source_url,
+            output_dir
+        ]
+        command_line.extend(ITSCube.touched_chunks_filters(zmetadata, first_layer))
+
+        logging.info(f"Creating partial local copy of {source_url} starting with layer {first_layer}: {output_dir}")
+        logging.info(' '.join(command_line))
+
+        start_time = timeit.default_timer()
+        command_return = subprocess.run(
+            command_line,
+            env=os.environ.copy(),
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT
+        )
+        if command_return.returncode != 0:
+            raise RuntimeError(f"Failed to copy {source_url} to {output_dir}: {command_return.stdout}")
+
+        copied_files = [
+            os.path.relpath(os.path.join(each_dir, each_file), output_dir)
+            for each_dir, _, each_files in os.walk(output_dir) for each_file in each_files
+        ]
+
+        with open(ITSCube.SYNC_FILE, 'w') as fh:
+            json.dump(copied_files, fh)
+
+        time_delta = timeit.default_timer() - start_time
+        logging.info(f"Copied {len(copied_files)} objects of {source_url} (took {time_delta} seconds)")
+
+    @staticmethod
+    def remove_stale_objects(output_dir: str, target_url: str):
+        """
+        Remove objects of the datacube Zarr store from S3 bucket that were copied
+        for the update but no longer exist in the local store (chunks beyond
+        the new number of layers, or chunks of re-created store).
+
+        output_dir: Local datacube Zarr store.
+        target_url: S3 path to the datacube Zarr store.
+        """
+        with open(ITSCube.SYNC_FILE) as fh:
+            copied_files = json.load(fh)
+
+        stale_objects = [
+            os.path.join(target_url, each_file) for each_file in copied_files
+            if not os.path.exists(os.path.join(output_dir, each_file))
+        ]
+
+        if len(stale_objects):
+            logging.info(f"Removing {len(stale_objects)} stale objects from {target_url}")
+            s3 = s3fs.S3FileSystem(skip_instance_cache=True)
+            s3.rm(stale_objects)
+
+    @staticmethod
+    def remove_checkpoint():
+        """
+        Remove checkpoint manifest and its copy in S3 if these exist.
+        """
+        if len(ITSCube.CHECKPOINT_FILE) and os.path.exists(ITSCube.CHECKPOINT_FILE):
+            logging.info(f"Removing {ITSCube.CHECKPOINT_FILE}")
+            os.unlink(ITSCube.CHECKPOINT_FILE)
+
+        if len(ITSCube.CHECKPOINT_S3) and ITSCube.exists(os.path.basename(ITSCube.CHECKPOINT_S3), os.path.dirname(ITSCube.CHECKPOINT_S3)):
+            ITSCube.run_aws_command(
+                ["awsv2", "s3", "rm", "--recursive", ITSCube.CHECKPOINT_S3],
+                f"Failed to remove {ITSCube.CHECKPOINT_S3}"
+            )
+
+    def update_parallel(self, api_params: dict, output_dir: str, output_bucket: str, num_granules=None, checkpoint=None):
         """
         Update velocity pair datacube by reading and pre-processing new cube layers in parallel.
 
@@ -760,15 +1799,31 @@ class ITSCube:
             Number of first granules to examine.
             TODO: This is a temporary solution to a very long time to open remote granules.
                     Should not be used when running the code in production mode.
+        checkpoint: dict
+            Checkpoint manifest to resume interrupted datacube creation or update
+            from. If provided, local datacube Zarr store is updated.
         """
+        if checkpoint is not None:
+            # Resume from the local store
+            output_bucket = ''
+
         self.logger.info(f"Updating {os.path.join(output_bucket, output_dir)}")
 
         ITSCube.show_memory_usage('update()')
-        s3, cube_store_in, cube_ds, skipped_granules = ITSCube.init_input_store(output_dir, output_bucket)
+        s3, cube_store_in, cube_ds, skipped_granules = ITSCube.init_input_store(
+            output_dir,
+            output_bucket,
+            read_skipped_granules=(checkpoint is None)
+        )
 
         self.date_updated = self.date_created
         self.date_created = cube_ds.attrs['date_created']
 
+        if checkpoint is not None:
+            skipped_granules = checkpoint[CubeCheckpoint.SKIPPED_GRANULES]
+            self.date_created = checkpoint[CubeCheckpoint.DATE_CREATED]
+            self.date_updated = checkpoint[CubeCheckpoint.DATE_UPDATED]
+
         if s3 is None:
             # If input datacube is on the local filesystem, open S3FS for reading
             # granules from S3 bucket
@@ -784,17 +1839,59 @@ class ITSCube:
         found_urls, cube_layers_to_delete = self.exclude_processed_granules(found_urls, cube_ds, skipped_granules)
         num_cube_layers = len(cube_ds.mid_date.values)
 
+        if checkpoint is not None:
+            # Remove granules processed before the datacube creation or update
+            # was interrupted
+            self.processed_urls = checkpoint[CubeCheckpoint.PROCESSED_GRANULES]
+            self.checkpoint_base = {each: checkpoint[each] for each in self.checkpoint_base}
+            self.checkpoint_s3 = {each: checkpoint[each] for each in self.checkpoint_s3}
+
+            # Keep the order of granules as returned by searchAPI
+            processed_urls = set(self.processed_urls)
+            found_urls = [each for each in found_urls if each not in processed_urls]
+
+            # Store is restored to its state before interrupted deletion of layers
+            # (see read_checkpoint()): delete these layers again
+            cube_granules = set(cube_ds[DataVars.URL].values)
+            cube_layers_to_delete.extend([
+                each for each in checkpoint[CubeCheckpoint.PENDING_DELETE]
+                if each in cube_granules and each not in cube_layers_to_delete
+            ])
+            self.logger.info(f"Leaving {len(found_urls)} granules to resume with")
+
         if len(found_urls) == 0:
             self.logger.info("No granules to update with, exiting.")
             return found_urls
 
+        # Index of the first existing layer to be modified by the update: all
+        # chunks of the datacube that hold this or following layers are re-written
+        first_modified_layer = num_cube_layers
+        if len(cube_layers_to_delete):
+            first_modified_layer = int(np.flatnonzero(np.isin(cube_ds[DataVars.URL].values, cube_layers_to_delete))[0])
+
+        zmetadata = None
+        if ITSCube.INCREMENTAL_SYNC and not os.path.exists(output_dir):
+            zmetadata = json.loads(cube_store_in[ITSCube.ZMETADATA])[ITSCube.ZMETADATA_KEY]
+
         # Clean up the open store for the dataset
         cube_store_in = None
         cube_ds = None
         gc.collect()
 
+        if ITSCube.PRESCREEN_GRANULES:
+            found_urls = self.prescreen_granules(found_urls, s3)
+
         # If datacube resides in AWS S3 bucket, copy it locally - initial datacube to begin with
-        if not os.path.exists(output_dir):
+        if zmetadata is not None:
+            source_url = os.path.join(output_bucket, output_dir)
+            if not source_url.startswith(ITSCube.S3_PREFIX):
+                source_url = ITSCube.S3_PREFIX + source_url
+
+            # Copy locally only chunks of the datacube to be modified by the update
+            ITSCube.sync_from_s3(source_url, output_dir, zmetadata, first_modified_layer)
+            self.init_checkpoint_base(output_dir, source_url, first_modified_layer)
+
+        elif not os.path.exists(output_dir):
             # Copy datacube locally using AWS CLI to take advantage of parallel copy:
             # have to include "max_concurrent_requests" option for the
             # configuration in ~/.aws/config
@@ -828,6 +1925,8 @@ class ITSCube:
             if command_return.returncode != 0:
                 raise RuntimeError(f"Failed to copy {source_url} to {output_dir}: {command_return.stdout}")
 
+            self.init_checkpoint_base(output_dir, source_url, None)
+
         elif len(output_bucket):
             # datacube exists on local file system even though S3 bucket for the
             # datacube is provided.
@@ -847,77 +1946,18 @@ class ITSCube:
                 shutil.rmtree(output_dir)
 
             else:
-                # Delete identified layers
-                ds_from_zarr = xr.open_zarr(output_dir, decode_timedelta=False, consolidated=True)
-
-                # Identify layer indices that correspond to granule urls
-                layers_bool_flag = ds_from_zarr[DataVars.URL].isin(cube_layers_to_delete)
-
-                # Drop the layers
-                # layers_mid_dates = ds_from_zarr[DataVars.MID_DATE].values[layers_bool_flag.values]
-                dropped_ds = ds_from_zarr.drop_isel(mid_date=layers_bool_flag.values)
-
-                tmp_output_dir = f"{output_dir}.original"
-                self.logger.info(f"Moving original {output_dir} to {tmp_output_dir}")
-                os.renames(output_dir, tmp_output_dir)
+                # Record layers to delete before the store is modified: interrupted
+                # deletion is undone and repeated on resume
+                self.write_checkpoint(output_dir, cube_layers_to_delete)
 
-                # Write updated datacube to original store location,
-                # but at first re-chunk xr.Dataset to avoid errors
-                dropped_ds = dropped_ds.chunk({Coords.MID_DATE: ITSCube.NUM_GRANULES_TO_WRITE})
-
-                self.logger.info(f"Saving updated {output_dir}")
-                dropped_ds.to_zarr(output_dir, encoding=zarr_to_netcdf.ENCODING_ZARR, consolidated=True)
-
-                self.logger.info(f"Removing original {tmp_output_dir}")
-                shutil.rmtree(tmp_output_dir)
-
-                ds_from_zarr = None
-                dropped_ds = None
+                # Delete identified layers
+                ITSCube.delete_layers(output_dir, cube_layers_to_delete)
                 gc.collect()
 
-        start = 0
-        num_to_process = len(found_urls)
-
-        while num_to_process > 0:
-            # How many tasks to process at a time
-            num_tasks = ITSCube.NUM_GRANULES_TO_WRITE if num_to_process > ITSCube.NUM_GRANULES_TO_WRITE else num_to_process
-            tasks = [dask.delayed(self.read_s3_dataset)(each_file, s3) for each_file in found_urls[start:start+num_tasks]]
-            self.logger.info(f"Processing {len(tasks)} tasks out of {num_to_process} remaining")
-
-            results = None
-            with ProgressBar():  # Does not work with Client() scheduler
-                # If to collect performance report (need to define global Client - see above)
-                # with performance_report(filename=f"dask-report-{num_granules}.html"):
-                #     results = dask.compute(tasks)
-                results = dask.compute(
-                    tasks,
-                    scheduler=ITSCube.DASK_SCHEDULER,
-                    num_workers=ITSCube.NUM_THREADS
-                )
-
-            del tasks
-            gc.collect()
-
-            for each_ds in results[0]:
-                if len(each_ds[0]):
-                    # There were exceptions reading the data, log it
-                    self.logging.info('--->'.join(each_ds[0]))
-
-                self.add_layer(*each_ds[1:])
-
-            del results
-            gc.collect()
-
-            wrote_layers = self.combine_layers(output_dir, is_first_write)
-            if is_first_write and wrote_layers:
-                is_first_write = False
-
-            self.format_stats()
-
-            num_to_process -= num_tasks
-            start += num_tasks
+        # Record state of the local store before any new layers are added
+        self.write_checkpoint(output_dir)
 
-        # Remove existing granules with older processing dates if any
+        self.read_and_combine_parallel(found_urls, s3, output_dir, is_first_write)
 
         return found_urls
 
@@ -936,6 +1976,11 @@ class ITSCube:
 
         ITSCube.show_memory_usage('create()')
         ITSCube.init_output_store(output_dir)
+        ITSCube.remove_checkpoint()
+
+        if len(ITSCube.SYNC_FILE) and os.path.exists(ITSCube.SYNC_FILE):
+            # Brand new datacube is copied to S3 bucket in full
+            os.unlink(ITSCube.SYNC_FILE)
 
         self.clear()
         found_urls = self.request_granules(api_params, num_granules)
@@ -945,56 +1990,103 @@ class ITSCube:
         # Parallelize layer collection
         s3 = s3fs.S3FileSystem()
 
+        if ITSCube.PRESCREEN_GRANULES:
+            found_urls = self.prescreen_granules(found_urls, s3)
+
         # In order to enable Dask profiling, need to create Dask client for
         # processing: using "processes" or "threads" scheduler
         # processes_scheduler = True if ITSCube.DASK_SCHEDULER == 'processes' else False
         # client = Client(processes=processes_scheduler, n_workers=ITSCube.NUM_THREADS)
         # # Use client to collect profile information
         # client.profile(filename=f"dask-profile-{num_granules}-parallel.html")
-        is_first_write = True
-        start = 0
-        num_to_process = len(found_urls)
+        self.read_and_combine_parallel(found_urls, s3, output_dir, is_first_write=True)
 
-        while num_to_process > 0:
-            # How many tasks to process at a time
-            num_tasks = ITSCube.NUM_GRANULES_TO_WRITE if num_to_process > ITSCube.NUM_GRANULES_TO_WRITE else num_to_process
-            tasks = [dask.delayed(self.read_s3_dataset)(each_file, s3) for each_file in found_urls[start:start+num_tasks]]
-            self.logger.info(f"Processing {len(tasks)} tasks out of {num_to_process} remaining")
+        return found_urls
 
-            results = None
-            with ProgressBar():  # Does not work with Client() scheduler
-                # If to collect performance report (need to define global Client - see above)
-                # with performance_report(filename=f"dask-report-{num_granules}.html"):
-                #     results = dask.compute(tasks)
-                results = dask.compute(
-                    tasks,
-                    scheduler=ITSCube.DASK_SCHEDULER,
-                    num_workers=ITSCube.NUM_THREADS
-                )
+    def read_and_combine_parallel(self, found_urls: list, s3: s3fs.S3FileSystem, output_dir: str, is_first_write: bool):
+        """
+        Stream granules through the pool of workers and write collected layers
+        to the Zarr store.
 
-            del tasks
-            gc.collect()
+        Up to ITSCube.NUM_PENDING_GRANULES granules are submitted to the workers
+        at a time: a new granule is submitted as soon as the oldest submitted
+        granule is collected, so granules keep being read while accumulated
+        layers are written to the store. Granules are collected in the order
+        they appear in "found_urls", and accumulated layers are written to the
+        store every ITSCube.NUM_GRANULES_TO_WRITE layers.
+
+        found_urls: list
+            Granules to read.
+        s3: s3fs.S3FileSystem
+            Object to access granules from.
+        output_dir: str
+            Local datacube Zarr store to write layers to.
+        is_first_write: bool
+            Flag if it's the first write to the Zarr store.
+        """
+        executor_type = ProcessPoolExecutor if ITSCube.DASK_SCHEDULER == 'processes' else ThreadPoolExecutor
 
-            for each_ds in results[0]:
-                if len(each_ds[0]):
-                    # There were exceptions reading the data, log it
-                    self.logger.info('--->'.join(each_ds[0]))
+        self.logger.info(
+            f"Processing {len(found_urls)} granules with {ITSCube.NUM_THREADS} workers "
+            f"({ITSCube.NUM_PENDING_GRANULES} pending granules at most)"
+        )
 
-                self.add_layer(*each_ds[1:])
+        urls_iter = iter(found_urls)
+        pending = deque()
 
-            del results
-            gc.collect()
+        with executor_type(max_workers=ITSCube.NUM_THREADS) as executor:
+            # Fill up the queue of pending granules
+            for each_url in urls_iter:
+                pending.append(executor.submit(self.read_s3_dataset, each_url, s3))
 
-            wrote_layers = self.combine_layers(output_dir, is_first_write)
-            if is_first_write and wrote_layers:
-                is_first_write = False
+                if len(pending) == ITSCube.NUM_PENDING_GRANULES:
+                    break
 
-            self.format_stats()
+            with tqdm(total=len(found_urls), ascii=True, desc='Reading and processing S3 granules') as progress:
+                while len(pending):
+                    each_ds = pending.popleft().result()
 
-            num_to_process -= num_tasks
-            start += num_tasks
+                    # Replace collected granule in the queue
+                    each_url = next(urls_iter, None)
+                    if each_url is not None:
+                        pending.append(executor.submit(self.read_s3_dataset, each_url, s3))
 
-        return found_urls
+                    progress.update(1)
+
+                    if len(each_ds[0]):
+                        # There were exceptions reading the data, log it
+                        self.logger.info('--->'.join(each_ds[0]))
+
+                    self.add_layer(*each_ds[1:])
+                    del each_ds
+
+                    # Check if need to write to the store accumulated number of layers
+                    if len(self.urls) == ITSCube.NUM_GRANULES_TO_WRITE:
+                        wrote_layers = self.combine_layers(output_dir, is_first_write)
+                        if is_first_write and wrote_layers:
+                            is_first_write = False
+
+                        self.format_stats()
+
+        # Write remaining layers to the store (and skipped granules info if no
+        # layers are remaining)
+        self.combine_layers(output_dir, is_first_write)
+        self.format_stats()
+
+    def __getstate__(self):
+        """
+        Exclude accumulated datacube layers from the state of the object when
+        it's sent to the worker processes to read granules: workers don't
+        need these.
+        """
+        state = self.__dict__.copy()
+        state['ds'] = []
+        state['dates'] = []
+        state['urls'] = []
+        state['layers'] = None
+        state['layers_data'] = LayersAccumulator(self.grid_x, self.grid_y)
+
+        return state
 
     def create_sequential(self, api_params: dict, output_dir: str, num_granules=None):
         """
@@ -1637,6 +2729,13 @@ class ITSCube:
 
         logging.info(f"{memory_msg}: total={usage.total/_GB}Gb used={usage.used/_GB}Gb available={usage.available/_GB}Gb")
 
+    def write_skipped_granules(self):
+        """
+        Write skipped granules info to local file.
+        """
+        with open(ITSCube.SKIPPED_GRANULES_FILE, 'w') as fh:
+            json.dump(self.skipped_granules, fh, indent=3)
+
     def combine_layers(self, output_dir, is_first_write=False):
         """
         Combine selected layers into one xr.Dataset object and write (append) it
@@ -1645,14 +2744,13 @@ class ITSCube:
         self.layers = {}
         wrote_layers = False
 
-        # Write skipped granules info to local file
-        with open(ITSCube.SKIPPED_GRANULES_FILE, 'w') as fh:
-            json.dump(self.skipped_granules, fh, indent=3)
+        self.write_skipped_granules()
 
         # Construct xarray to hold layers by concatenating layer objects along 'mid_date' dimension
         self.logger.info(f'Combine {len(self.urls)} layers to the {output_dir}...')
         if len(self.ds) == 0:
             self.logger.info('No layers to combine, continue')
+            self.write_checkpoint(output_dir)
             return wrote_layers
 
         # ITSCube.show_memory_usage('before combining layers')
@@ -1829,9 +2927,7 @@ class ITSCube:
 
         # Process 'v' (all formats have v variable - its attributes are inherited,
         # so no need to set them manually)
-        v_layers = xr.concat([each_ds.v for each_ds in self.ds], mid_date_coord)
-
-        self.layers[DataVars.V] = v_layers
+        self.layers[DataVars.V] = self.get_layers_var(DataVars.V, mid_date_coord)
         self.layers[DataVars.V].attrs[DataVars.DESCRIPTION_ATTR] = DataVars.DESCRIPTION[DataVars.V]
         new_v_vars = [DataVars.V]
 
@@ -1844,16 +2940,8 @@ class ITSCube:
         # set with the same value
         ds_grid_mapping_value = DataVars.MAPPING
 
-        # Drop data variable as we don't need it anymore - free up memory
-        self.ds = [each.drop_vars(DataVars.V) for each in self.ds]
-        del v_layers
-        gc.collect()
-
         # Process 'v_error'
-        self.layers[DataVars.V_ERROR] = xr.concat(
-            [self.get_data_var(ds, DataVars.V_ERROR) for ds in self.ds],
-            mid_date_coord
-        )
+        self.layers[DataVars.V_ERROR] = self.get_layers_var(DataVars.V_ERROR, mid_date_coord)
         self.layers[DataVars.V_ERROR].attrs[DataVars.STD_NAME] = DataVars.NAME[DataVars.V_ERROR]
         self.layers[DataVars.V_ERROR].attrs[DataVars.DESCRIPTION_ATTR] = DataVars.DESCRIPTION[DataVars.V_ERROR]
         self.layers[DataVars.V_ERROR].attrs[DataVars.UNITS] = DataVars.M_Y_UNITS
@@ -1862,41 +2950,36 @@ class ITSCube:
 
         self.set_grid_mapping_attr(DataVars.V_ERROR, ds_grid_mapping_value)
 
-        # Drop data variable as we don't need it anymore - free up memory
-        # Drop only from datasets that have it
-        self.ds = [ds.drop_vars(DataVars.V_ERROR) if DataVars.V_ERROR in ds else ds for ds in self.ds]
-        gc.collect()
-
-        # Process 'v[xy]' data variables and their attributes
-        for each_var in [DataVars.VX, DataVars.VY]:
-            self.layers[each_var] = xr.concat([ds[each_var] for ds in self.ds], mid_date_coord)
-            self.layers[each_var].attrs[DataVars.DESCRIPTION_ATTR] = DataVars.DESCRIPTION[each_var]
-            new_v_vars.append(each_var)
-            new_v_vars.extend(self.process_v_attributes(each_var, mid_date_coord))
-
-            self.set_grid_mapping_attr(each_var, ds_grid_mapping_value)
-
-            # Drop data variable as we don't need it anymore - free up memory
-            self.ds = [ds.drop_vars(each_var) if each_var in ds else ds for ds in self.ds]
-            gc.collect()
-
-        # Process 'v[ar]' data variables and their attributes
-        for each_var in [DataVars.VA, DataVars.VR]:
-            self.layers[each_var] = xr.concat([self.get_data_var(ds, each_var) for ds in self.ds], mid_date_coord)
+        # Process 'v[xy]' and 'v[ar]' data variables and their attributes
+        for each_var in [DataVars.VX, DataVars.VY, DataVars.VA, DataVars.VR]:
+            self.layers[each_var] = self.get_layers_var(each_var, mid_date_coord)
             self.layers[each_var].attrs[DataVars.DESCRIPTION_ATTR] = DataVars.DESCRIPTION[each_var]
             new_v_vars.append(each_var)
             new_v_vars.extend(self.process_v_attributes(each_var, mid_date_coord))
 
             self.set_grid_mapping_attr(each_var, ds_grid_mapping_value)
 
-            # Drop data variable as we don't need it anymore - free up memory
-            self.ds = [ds.drop_vars(each_var) if each_var in ds else ds for ds in self.ds]
-            gc.collect()
+        # Keep number of layers with valid vx per spacial point for all layers
+        # of the datacube: consumers of the datacube can skip empty points
+        # without reading the layers
+        valid_count = self.layers_valid_count(output_dir, is_first_write)
+        if valid_count is not None:
+            self.layers[DataVars.VALID_COUNT] = xr.DataArray(
+                data=valid_count,
+                coords=[self.grid_y, self.grid_x],
+                dims=[Coords.Y, Coords.X],
+                attrs={
+                    DataVars.STD_NAME: DataVars.NAME[DataVars.VALID_COUNT],
+                    DataVars.DESCRIPTION_ATTR: DataVars.DESCRIPTION[DataVars.VALID_COUNT],
+                    DataVars.GRID_MAPPING: ds_grid_mapping_value,
+                    DataVars.UNITS: DataVars.COUNT_UNITS
+                }
+            )
 
         new_vars_zero_missing_value = []
         # Process 'M1[12]' data variables of radar format, if any, and their attributes
         for each_var in [DataVars.M11, DataVars.M12]:
-            self.layers[each_var] = xr.concat([self.get_data_var(ds, each_var) for ds in self.ds], mid_date_coord)
+            self.layers[each_var] = self.get_layers_var(each_var, mid_date_coord)
             self.layers[each_var].attrs[DataVars.STD_NAME] = DataVars.NAME[each_var]
             self.layers[each_var].attrs[DataVars.DESCRIPTION_ATTR] = DataVars.DESCRIPTION[each_var]
             self.layers[each_var].attrs[DataVars.UNITS] = DataVars.PIXEL_PER_M_YEAR
@@ -1905,19 +2988,15 @@ class ITSCube:
 
             self.set_grid_mapping_attr(each_var, ds_grid_mapping_value)
 
-            # Drop data variable as we don't need it anymore - free up memory
-            self.ds = [ds.drop_vars(each_var) if each_var in ds else ds for ds in self.ds]
-            gc.collect()
-
         # Process chip_size_height: dtype=ushort
-        # Optical legacy granules might not have chip_size_height set, use
-        # chip_size_width instead
-        self.layers[DataVars.CHIP_SIZE_HEIGHT] = xr.concat([
-                ds.chip_size_height if
-                np.ma.masked_equal(ds.chip_size_height.values, ITSCube.CHIP_SIZE_HEIGHT_NO_VALUE).count() != 0 else
-                ds.chip_size_width for ds in self.ds
-            ],
-            mid_date_coord
+        # Optical legacy granules might not have chip_size_height set,
+        # chip_size_width is used instead (see LayersAccumulator.add())
+        chip_size_width_as_height = self.layers_data.chip_size_width_as_height[:len(self.ds)]
+
+        self.layers[DataVars.CHIP_SIZE_HEIGHT] = self.get_layers_var(
+            DataVars.CHIP_SIZE_HEIGHT,
+            mid_date_coord,
+            DataVars.CHIP_SIZE_WIDTH if chip_size_width_as_height[0] else DataVars.CHIP_SIZE_HEIGHT
         )
         self.layers[DataVars.CHIP_SIZE_HEIGHT].attrs[DataVars.CHIP_SIZE_COORDS] = \
             DataVars.DESCRIPTION[DataVars.CHIP_SIZE_COORDS]
@@ -1927,27 +3006,18 @@ class ITSCube:
         self.set_grid_mapping_attr(DataVars.CHIP_SIZE_HEIGHT, ds_grid_mapping_value)
 
         # Report if used chip_size_width in place of chip_size_height
-        concat_ind = [ind for ind, ds in enumerate(self.ds) if np.ma.masked_equal(ds.chip_size_height.values, ITSCube.CHIP_SIZE_HEIGHT_NO_VALUE).count() == 0]
-        for each in concat_ind:
+        for each in np.flatnonzero(chip_size_width_as_height):
             self.logger.warning(f'Using chip_size_width in place of chip_size_height for {self.urls[each]}')
 
-        # Drop data variable as we don't need it anymore - free up memory
-        self.ds = [ds.drop_vars(DataVars.CHIP_SIZE_HEIGHT) for ds in self.ds]
-        gc.collect()
-
         # Process chip_size_width: dtype=ushort
-        self.layers[DataVars.CHIP_SIZE_WIDTH] = xr.concat([ds.chip_size_width for ds in self.ds], mid_date_coord)
+        self.layers[DataVars.CHIP_SIZE_WIDTH] = self.get_layers_var(DataVars.CHIP_SIZE_WIDTH, mid_date_coord)
         self.layers[DataVars.CHIP_SIZE_WIDTH].attrs[DataVars.CHIP_SIZE_COORDS] = DataVars.DESCRIPTION[DataVars.CHIP_SIZE_COORDS]
         self.layers[DataVars.CHIP_SIZE_WIDTH].attrs[DataVars.DESCRIPTION_ATTR] = DataVars.DESCRIPTION[DataVars.CHIP_SIZE_WIDTH]
 
         self.set_grid_mapping_attr(DataVars.CHIP_SIZE_WIDTH, ds_grid_mapping_value)
 
-        # Drop data variable as we don't need it anymore - free up memory
-        self.ds = [ds.drop_vars(DataVars.CHIP_SIZE_WIDTH) for ds in self.ds]
-        gc.collect()
-
         # Process interp_mask: dtype=ubyte
-        self.layers[DataVars.INTERP_MASK] = xr.concat([ds.interp_mask for ds in self.ds], mid_date_coord)
+        self.layers[DataVars.INTERP_MASK] = self.get_layers_var(DataVars.INTERP_MASK, mid_date_coord)
         self.layers[DataVars.INTERP_MASK].attrs[DataVars.STD_NAME] = DataVars.NAME[DataVars.INTERP_MASK]
         self.layers[DataVars.INTERP_MASK].attrs[DataVars.DESCRIPTION_ATTR] = DataVars.DESCRIPTION[DataVars.INTERP_MASK]
         self.layers[DataVars.INTERP_MASK].attrs[BinaryFlag.VALUES_ATTR] = BinaryFlag.VALUES
@@ -1955,10 +3025,6 @@ class ITSCube:
 
         self.set_grid_mapping_attr(DataVars.INTERP_MASK, ds_grid_mapping_value)
 
-        # Drop data variable as we don't need it anymore - free up memory
-        self.ds = [ds.drop_vars(DataVars.INTERP_MASK) for ds in self.ds]
-        gc.collect()
-
         for each in DataVars.ImgPairInfo.ALL:
             # Add new variables that correspond to attributes of 'img_pair_info'
             # (only selected ones)
@@ -2055,6 +3121,12 @@ class ITSCube:
                     Output.CHUNKS_ATTR: chunking_settings_2d
                 })
 
+            encoding_settings[DataVars.VALID_COUNT] = {
+                Output.DTYPE_ATTR: np.uint32,
+                Output.COMPRESSOR_ATTR: compressor,
+                Output.CHUNKS_ATTR: chunking_settings_2d
+            }
+
             for each in [
                 DataVars.INTERP_MASK,
                 DataVars.CHIP_SIZE_HEIGHT,
@@ -2264,6 +3336,8 @@ class ITSCube:
         time_delta = timeit.default_timer() - start_time
         self.logger.info(f"Wrote {len(self.urls)} layers to {output_dir} (took {time_delta} seconds)")
 
+        self.write_checkpoint(output_dir)
+
         # Free up memory
         self.clear_vars()
 
@@ -2272,6 +3346,30 @@ class ITSCube:
         # Return a flag if any layers were written to the store
         return wrote_layers
 
+    def layers_valid_count(self, output_dir: str, is_first_write: bool):
+        """
+        Number of layers with valid vx per spacial point for all layers of the
+        datacube including the layers to be written.
+
+        Returns None if existing datacube store does not keep the count (it was
+        created before the count was introduced).
+        """
+        valid_count = np.sum(
+            self.layers_data.data[DataVars.VX][:len(self.ds)] != DataVars.INT_MISSING_VALUE[DataVars.VX],
+            axis=0,
+            dtype=np.uint32
+        )
+
+        if not is_first_write:
+            store = zarr.open_group(output_dir, mode='r')
+            if DataVars.VALID_COUNT not in store:
+                self.logger.info(f'{output_dir} does not have {DataVars.VALID_COUNT}, skipping it')
+                return None
+
+            valid_count += store[DataVars.VALID_COUNT][:]
+
+        return valid_count
+
     def format_stats(self):
         """
         Format statistics of the run. Don't display statistics if using
@@ -2324,6 +3422,11 @@ class ITSCube:
         while not got_granule and num_retries < total_retries:
             num_retries += 1
             try:
+                if ITSCube.READ_MODE == ITSCube.READ_BYTE_RANGE:
+                    with ITSCube.open_s3_dataset_refs(s3_path, s3) as ds:
+                        results = self.preprocess_dataset(ds, each_url)
+                        return exception_info, *results
+
                 with s3.open(s3_path, mode='rb') as fhandle:
                     with xr.open_dataset(fhandle, engine=ITSCube.NC_ENGINE) as ds:
                         results = self.preprocess_dataset(ds, each_url)
@@ -2341,6 +3444,183 @@ class ITSCube:
                     exception_info.append(f'Sleeping for {num_seconds} seconds...')
                     time.sleep(num_seconds)
 
+    def prescreen_granules(self, found_urls: list, s3: s3fs.S3FileSystem):
+        """
+        Pre-screen granules by reading only their projection and x/y coordinates.
+        Granules in other than target projection or granules that don't overlap
+        with the datacube are recorded as skipped granules.
+
+        Return list of granules that qualify to be read in full.
+        """
+        self.logger.info(f"Pre-screening {len(found_urls)} granules...")
+        start_time = timeit.default_timer()
+
+        tasks = [dask.delayed(self.prescreen_s3_dataset)(each_file, s3) for each_file in found_urls]
+
+        results = None
+        with ProgressBar():
+            results = dask.compute(
+                tasks,
+                scheduler=ITSCube.DASK_SCHEDULER,
+                num_workers=ITSCube.NUM_THREADS
+            )
+
+        del tasks
+        gc.collect()
+
+        granules = []
+        for each_exception_info, is_empty, layer_projection, url in results[0]:
+            if len(each_exception_info):
+                # There were exceptions reading the data, log it
+                self.logger.info('--->'.join(each_exception_info))
+
+            if is_empty or (layer_projection is not None and str(layer_projection) != self.projection):
+                # Record the granule as skipped one
+                self.add_layer(is_empty, layer_projection, None, url, None)
+
+            else:
+                granules.append(url)
+
+        time_delta = timeit.default_timer() - start_time
+        self.logger.info(f"Pre-screening left {len(granules)} out of {len(found_urls)} granules (took {time_delta} seconds)")
+
+        # Record skipped granules in case none of the granules qualify to be
+        # read in full
+        self.write_skipped_granules()
+        self.format_stats()
+
+        return granules
+
+    def prescreen_dataset(self, fhandle, ds_url: str):
+        """
+        Read projection and x/y coordinates of the granule to identify if granule
+        should be skipped. Only HDF5 metadata and x/y coordinates of the granule
+        are read.
+
+        fhandle: File object to read the granule from.
+        ds_url: URL that corresponds to the granule.
+
+        Returns:
+        empty:      Flag to indicate if granule does not overlap with the datacube.
+        projection: Source projection for the granule, or None if it can't be
+                    determined (the granule will be examined when read in full).
+        url:        Original URL for the granule.
+        """
+        with h5py.File(fhandle, mode='r') as h5_ds:
+            if DataVars.MAPPING not in h5_ds or \
+                    ITSCube.SPATIAL_EPSG_ATTR not in h5_ds[DataVars.MAPPING].attrs:
+                # Let full read of the granule report unsupported projection
+                return False, None, ds_url
+
+            ds_projection = int(np.ravel(h5_ds[DataVars.MAPPING].attrs[ITSCube.SPATIAL_EPSG_ATTR])[0])
+
+            if str(ds_projection) != self.projection:
+                # Don't read coordinates of the granule in other than target projection
+                return False, ds_projection, ds_url
+
+            x = h5_ds[Coords.X][:]
+            y = h5_ds[Coords.Y][:]
+
+        # Use the same criteria for the overlap as self.preprocess_dataset() does
+        mask_lon = (x >= self.grid_x_min) & (x <= self.grid_x_max)
+        mask_lat = (y >= self.grid_y_min) & (y <= self.grid_y_max)
+        empty = (mask_lon.sum() == 0) or (mask_lat.sum() == 0)
+
+        return empty, ds_projection, ds_url
+
+    def prescreen_s3_dataset(
+            self,
+            each_url: str,
+            s3: s3fs.S3FileSystem,
+            total_retries: int = 5,
+            num_seconds: int = 15
+    ):
+        """
+        Pre-screen granule in the S3 bucket by reading only its projection
+        and x/y coordinates. Return re-tried exceptions messages, if any, and
+        pre-screen results.
+
+        If granule can't be read, it's not identified as skipped: the granule
+        will be examined when read in full.
+
+        each_url: Granule S3 URL.
+        s3: s3fs.S3FileSystem object to access the granule from.
+        total_retries: Number of retries in a case of exception
+        num_seconds: Number of seconds to sleep between retries.
+        """
+        s3_path = each_url.replace(ITSCube.HTTP_PREFIX, ITSCube.S3_PREFIX)
+        s3_path = s3_path.replace(ITSCube.PATH_URL, '')
+
+        num_retries = 0
+        exception_info = []
+
+        while num_retries < total_retries:
+            num_retries += 1
+            try:
+                with s3.open(s3_path, mode='rb', block_size=ITSCube.HDF5_METADATA_BLOCK_SIZE) as fhandle:
+                    return exception_info, *self.prescreen_dataset(fhandle, each_url)
+
+            except:
+                exception_info.append(f'Got exception pre-screening {s3_path}: {sys.exc_info()}')
+                if num_retries < total_retries:
+                    # Sleep if it's not last attempt
+                    exception_info.append(f'Sleeping for {num_seconds} seconds...')
+                    time.sleep(num_seconds)
+
+        return exception_info, False, None, each_url
+
+    @staticmethod
+    def granule_refs(s3_path: str, s3: s3fs.S3FileSystem):
+        """
+        Generate kerchunk references for the granule in S3 bucket. Only HDF5
+        metadata of the granule (headers and chunk index) is read, data chunks
+        are not accessed.
+
+        s3_path: Granule S3 path.
+        s3: s3fs.S3FileSystem object to access the granule from.
+        """
+        # kerchunk is required only by the byte-range reader mode
+        # (see environment/cube_byte_range_environment.yml)
+        from kerchunk.hdf import SingleHdf5ToZarr
+
+        with s3.open(s3_path, mode='rb', block_size=ITSCube.HDF5_METADATA_BLOCK_SIZE) as fhandle:
+            refs = SingleHdf5ToZarr(
+                fhandle,
+                s3_path,
+                inline_threshold=ITSCube.INLINE_THRESHOLD
+            ).translate()
+
+        for each_var in [DataVars.MAPPING, DataVars.ImgPairInfo.NAME]:
+            refs['refs'][f'{each_var}/{ITSCube.ZARRAY}'] = json.dumps(ITSCube.SCALAR_ZARRAY)
+            refs['refs'].pop(f'{each_var}/0', None)
+
+        return refs
+
+    @staticmethod
+    def open_s3_dataset_refs(s3_path: str, s3: s3fs.S3FileSystem):
+        """
+        Open granule in S3 bucket through its kerchunk references. Returned
+        xr.Dataset is lazily loaded: any subset of the dataset is read by issuing
+        range requests for only those data chunks that intersect with the subset.
+
+        s3_path: Granule S3 path.
+        s3: s3fs.S3FileSystem object to access the granule from.
+        """
+        refs = ITSCube.granule_refs(s3_path, s3)
+
+        refs_fs = fsspec.filesystem(
+            'reference',
+            fo=refs,
+            remote_protocol='s3',
+            fs=s3
+        )
+
+        return xr.open_dataset(
+            refs_fs.get_mapper(''),
+            engine='zarr',
+            consolidated=False
+        )
+
     @staticmethod
     def plot(cube, variable, boundaries: tuple = None):
         """
@@ -2552,7 +3832,6 @@ class ITSCube:
 if __name__ == '__main__':
     import argparse
     import warnings
-    import sys
 
     warnings.filterwarnings('ignore')
 
@@ -2613,6 +3892,12 @@ if __name__ == '__main__':
         default=250,
         help='Number of granules to write at a time [%(default)d].'
     )
+    parser.add_argument(
+        '--pendingGranules',
+        type=int,
+        default=ITSCube.NUM_PENDING_GRANULES,
+        help='Maximum number of granules being read or waiting to be written to the datacube at a time [%(default)d].'
+    )
     parser.add_argument(
         '--targetProjection',
         type=str,
@@ -2667,6 +3952,44 @@ if __name__ == '__main__':
         default='s3://its-live-data/autorift_parameters/v001/autorift_landice_0120m.shp',
         help='Shapefile that stores ice masks per each of the EPSG codes [%(default)s].'
     )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        default=False,
+        help='Resume interrupted datacube creation or update from its checkpoint manifest and local Zarr store, '
+            'if these exist. Manifest and store are copied from their checkpoint in the target S3 bucket if there are '
+            'no local copies.'
+    )
+    parser.add_argument(
+        '--s3Checkpoint',
+        action='store_true',
+        default=False,
+        help='Copy checkpoint manifest and objects of the local Zarr store that differ from the original datacube '
+            'to the target S3 bucket each time the checkpoint is written, so interrupted datacube creation or update '
+            'can be resumed on another instance. Enabled by --resume.'
+    )
+    parser.add_argument(
+        '--incrementalSync',
+        action='store_true',
+        default=False,
+        help='Copy only chunks of existing datacube to be modified by the update from S3 bucket, and copy back only new '
+            'or modified objects of the datacube. Ignored if target S3 bucket is different from the datacube S3 bucket.'
+    )
+    parser.add_argument(
+        '--disableGranulePrescreen',
+        action='store_true',
+        default=False,
+        help='Disable pre-screening of granules by their projection and x/y coordinates before granules are read in full.'
+    )
+    parser.add_argument(
+        '--readMode',
+        type=str,
+        choices=[ITSCube.READ_FULL, ITSCube.READ_BYTE_RANGE],
+        default=ITSCube.READ_FULL,
+        help=f'Mode to read granules from S3 bucket with [%(default)s]: "{ITSCube.READ_FULL}" opens the whole granule, '
+            f'"{ITSCube.READ_BYTE_RANGE}" uses HDF5 chunk index of the granule to fetch only data chunks that overlap with the datacube '
+            f'(requires kerchunk, see environment/cube_byte_range_environment.yml).'
+    )
     parser.add_argument(
         '-p', '--pathURLToken',
         type=str,
@@ -2705,8 +4028,11 @@ if __name__ == '__main__':
 
     ITSCube.NUM_THREADS = args.threads
     ITSCube.NUM_GRANULES_TO_WRITE = args.chunks
+    ITSCube.NUM_PENDING_GRANULES = args.pendingGranules
     ITSCube.CELL_SIZE = args.gridCellSize
     ITSCube.PATH_URL = args.pathURLToken
+    ITSCube.READ_MODE = args.readMode
+    ITSCube.PRESCREEN_GRANULES = not args.disableGranulePrescreen
 
     if args.useGranulesFile:
         # Check for this option first as another mutually exclusive option has a default value
@@ -2731,6 +4057,25 @@ if __name__ == '__main__':
     # Set local file path for skipped granules info
     ITSCube.SKIPPED_GRANULES_FILE = args.outputStore.replace(FileExtension.ZARR, FileExtension.JSON)
 
+    # Set local file path for the checkpoint manifest
+    ITSCube.CHECKPOINT_FILE = args.outputStore.replace(FileExtension.ZARR, FileExtension.CHECKPOINT)
+    ITSCube.RESUME = args.resume
+
+    if len(target_bucket) and (args.resume or args.s3Checkpoint):
+        # Keep copy of the checkpoint next to the target datacube in S3
+        ITSCube.CHECKPOINT_S3 = os.path.join(
+            target_bucket,
+            os.path.basename(args.outputStore).replace(FileExtension.ZARR, FileExtension.CHECKPOINT_S3)
+        )
+        logging.info(f'Checkpoint S3: {ITSCube.CHECKPOINT_S3}')
+
+    # Set local file path for the manifest of objects copied for incremental update
+    ITSCube.SYNC_FILE = args.outputStore.replace(FileExtension.ZARR, FileExtension.SYNC)
+    ITSCube.INCREMENTAL_SYNC = args.incrementalSync and len(args.outputBucket) > 0 and target_bucket == args.outputBucket
+
+    if args.incrementalSync and not ITSCube.INCREMENTAL_SYNC:
+        logging.warning('Incremental sync requires the same datacube and target S3 buckets, copying full datacube')
+
     if args.removeExistingCube and len(args.outputBucket):
         # Remove Zarr store in S3 if it exists - this is done to replace existing
         # cube with brand new generated one (to avoid update of the existing in s3 datacube)
@@ -2843,9 +4188,15 @@ if __name__ == '__main__':
                 num_retries = 0
                 command_return = None
 
-                command_line = ["awsv2", "s3", "cp"]
+                # Copy only new or modified objects of partially copied for the
+                # update datacube: AWS CLI sets modification time of the copied
+                # from S3 file to the time of S3 object, so only new or
+                # re-written files are copied back
+                is_incremental = each_recursive_option and os.path.exists(ITSCube.SYNC_FILE)
 
-                if each_recursive_option:
+                command_line = ["awsv2", "s3", "sync"] if is_incremental else ["awsv2", "s3", "cp"]
+
+                if each_recursive_option and not is_incremental:
                     command_line.append('--recursive')
 
                 command_line.extend([
@@ -2888,12 +4239,19 @@ if __name__ == '__main__':
                 if not file_is_copied:
                     raise RuntimeError(f'Failed to copy {each_input} to {target_bucket} with command.returncode={command_return.returncode}')
 
-                elif not args.disableCubeValidation:
+                if is_incremental:
+                    ITSCube.remove_stale_objects(each_input, os.path.join(target_bucket, os.path.basename(each_input)))
+
+                if not args.disableCubeValidation:
                     if each_validate_flag:
                         # Validate just copied to S3 datacube
                         s3_in, cube_store, ds_from_zarr, _ = ITSCube.init_input_store(each_input,target_bucket, read_skipped_granules=False)
                         ITSCube.validate_cube(ds_from_zarr, args.searchAPIStartDate, os.path.join(target_bucket, each_input))
 
+        # Datacube is complete and copied to the target S3 bucket (if any),
+        # checkpoint is not needed anymore
+        ITSCube.remove_checkpoint()
+
     finally:
         # Remove locally written Zarr store.
         # This is to eliminate out of disk space failures when the same EC2 instance is
@@ -2910,6 +4268,10 @@ if __name__ == '__main__':
             logging.info(f'Removing local copy of {ITSCube.SKIPPED_GRANULES_FILE}')
             os.unlink(ITSCube.SKIPPED_GRANULES_FILE)
 
+        if len(target_bucket) and len(ITSCube.SYNC_FILE) and os.path.exists(ITSCube.SYNC_FILE):
+            logging.info(f'Removing {ITSCube.SYNC_FILE}')
+            os.unlink(ITSCube.SYNC_FILE)
+
     # Write cube data to the NetCDF file
     # cube.to_netcdf('test_v_cube.nc')
 
@@ -88,6 +88,10 @@ class CompOutput:
     DATACUBE_S3 = 'datacube_s3'
     DATACUBE_URL = 'datacube_url'
 
+    # File within the composite Zarr store that keeps per-pixel state of the
+    # composite to update it incrementally when new layers are added to the datacube
+    STATE_FILE = 'composite_state.npz'
+
     class Values:
         TITLE = 'ITS_LIVE annual composites of image pair velocities'
 
@@ -121,6 +125,13 @@ class FileExtension:
     """
     ZARR = '.zarr'
     JSON = '.json'
+    CHECKPOINT = '.checkpoint.json'
+    # S3 copy of the checkpoint manifest and of the local Zarr store
+    CHECKPOINT_S3 = '.checkpoint'
+    SYNC = '.sync.json'
+    TIME_FEATURES = '.time_features.npz'
+    # Companion store of the datacube optimized for time series access
+    TIME_SERIES = '.timeseries.zarr'
 
 
 class DataVars:
@@ -215,6 +226,8 @@ class DataVars:
 
     # Specific to the datacube
     URL = 'granule_url'
+    # Number of layers with valid vx value per spacial point of the datacube
+    VALID_COUNT = 'valid_count'
 
     # Data variable specific to the epsg code:
     # * Polar_Stereographic when epsg code of 3031 or 3413
@@ -237,6 +250,7 @@ class DataVars:
         V_ERROR: 'velocity_error',
         M11: 'conversion_matrix_element_11',
         M12: 'conversion_matrix_element_12',
+        VALID_COUNT: 'valid_count',
     }
 
     # Map of variables with integer data type
@@ -289,6 +303,7 @@ class DataVars:
 
         STABLE_COUNT_SLOW: "number of valid pixels over slowest 25% of ice",
         STABLE_COUNT_MASK: "number of valid pixels over stationary or slow-flowing surfaces",
+        VALID_COUNT: "number of layers with valid velocity in x direction",
 
         STABLE_SHIFT_SLOW:
             "{} shift calibrated using valid pixels over slowest 25% of retrieved velocities",
@@ -634,6 +649,34 @@ class CubeJson:
     EPSG_TOKEN = 'EPSG'
 
 
+class CubeCheckpoint:
+    """
+    Variables names within checkpoint manifest of the datacube being created or
+    updated.
+    """
+    PROCESSED_GRANULES = 'processed_granules'
+    SKIPPED_GRANULES = 'skipped_granules'
+    NUM_LAYERS = 'num_layers'
+    LAST_MID_DATE = 'last_mid_date'
+    DATE_CREATED = 'date_created'
+    DATE_UPDATED = 'date_updated'
+    # S3 datacube the local store was copied from (None for new datacube), ETag
+    # of its consolidated metadata and first layer of the partial copy (None if
+    # the whole datacube was copied)
+    BASE_URL = 'base_url'
+    BASE_ETAG = 'base_etag'
+    BASE_FIRST_LAYER = 'base_first_layer'
+    # Size and modification time of the local store files as copied from the
+    # datacube, of the files copied to the checkpoint in S3 bucket, and list
+    # of the copied from the datacube files that were removed from the local store
+    BASE_FILES = 'base_files'
+    S3_FILES = 's3_files'
+    REMOVED_FILES = 'removed_files'
+    # Granules of the layers being deleted from the local store (empty if
+    # there is no deletion in progress)
+    PENDING_DELETE = 'pending_delete'
+
+
 class FilenamePrefix:
     """
     Filename prefixes used by ITS_LIVE data products.
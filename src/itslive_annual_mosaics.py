@@ -29,14 +29,19 @@ python ./itslive_annual_mosaics.py -c tools/catalog_datacubes_v02.json
 Authors: Masha Liukis (JPL), Alex Gardner (JPL), Chad Greene (JPL), Mark Fahnestock (UAF)
 """
 import collections
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import datetime
+from functools import lru_cache
 import gc
 import json
 import logging
 import math
+import multiprocessing as mp
 import numpy as np
 import os
 from osgeo import osr
+from pyproj import Transformer
+import queue
 import s3fs
 from shapely import geometry
 from shapely.ops import unary_union
@@ -67,7 +72,7 @@ from itscube_types import \
 # from reproject_mosaics import main as reproject_main
 from reproject_mosaics import ESRICode, ESRICode_Proj4, MosaicsReproject
 
-from itslive_composite import CENTER_DATE
+from itslive_composite import CENTER_DATE, MissionSensor
 
 # Set up logging
 logging.basicConfig(
@@ -183,6 +188,59 @@ class MosaicsOutputFormat:
     ]
 
 
+@lru_cache(maxsize=None)
+def lon_lat_transformer(epsg_code):
+    """
+    Transformer from EPSG projection to longitude/latitude coordinates: it's
+    created once per EPSG code.
+    """
+    return Transformer.from_crs(f'EPSG:{epsg_code}', f'EPSG:{BatchVars.LON_LAT_PROJECTION}', always_xy=True)
+
+
+def _make_mosaics_worker(settings, epsg, is_dry_run, date_created, epsg_code, composites, s3_bucket, mosaics_dir, copy_to_s3, ready_files):
+    """
+    Create mosaics for the EPSG code of multi-EPSG region within the worker
+    process. Each mosaic file is reported to the parent process through
+    ready_files queue as soon as it's created and re-projected.
+
+    Inputs:
+    =======
+    settings: Settings of the parent process as returned by ITSLiveAnnualMosaics.worker_settings().
+    epsg: Target EPSG code of the mosaics.
+    is_dry_run: Flag to display steps to be taken without actually generating mosaics.
+    date_created: Date when mosaics were created.
+    epsg_code: EPSG code to create mosaics for.
+    composites: Dictionary of center_y->center_x->s3_path_to_composite for the EPSG code.
+    s3_bucket: S3 bucket that stores all data.
+    mosaics_dir: Directory path within S3 bucket that stores datacubes' mosaics.
+    copy_to_s3: Flag if EPSG mosaics need to be copied to the AWS S3 bucket.
+    ready_files: Queue to report created mosaics files to as (epsg_code, year_token, mosaics_file).
+
+    Returns:
+    ========
+    Dictionary of created mosaics files: {'year' or '0000': mosaic_file}.
+    """
+    ITSLiveAnnualMosaics.apply_worker_settings(settings)
+
+    mosaics = ITSLiveAnnualMosaics(epsg, is_dry_run)
+    mosaics.date_created = date_created
+    mosaics.composites = {epsg_code: composites}
+
+    def report_ready(year_token, mosaics_file):
+        ready_files.put((epsg_code, year_token, mosaics_file))
+
+    return mosaics.make_mosaics(
+        epsg_code,
+        composites,
+        s3_bucket,
+        mosaics_dir,
+        False,
+        copy_to_s3,
+        False,
+        report_ready
+    )
+
+
 def repr_composite(composites):
     """
     Representation for the composite.
@@ -242,6 +300,56 @@ class ITSLiveAnnualMosaics:
     # mosaics when need to pick up from where previous processing stopped)
     USE_EXISTING_FILES = False
 
+    # Number of threads to list S3 prefixes with when collecting composites
+    NUM_S3_THREADS = 16
+
+    # Number of processes to create mosaics for multiple EPSG codes in parallel
+    NUM_EPSG_PROCESSES = 1
+
+    # Number of re-projection subprocesses to run concurrently per EPSG code
+    NUM_REPROJECT_PROCESSES = 1
+
+    # Memory budget (in GB) for the mosaics of EPSG codes created in parallel
+    # (0 for no limit)
+    MEMORY_BUDGET_GB = 0
+
+    # Size (in meters) of the composite in X and Y dimensions
+    COMPOSITE_SIZE = 100000
+
+    # Number of seconds to wait for mosaics files reported by parallel processes
+    # before checking on the processes
+    POLL_SECONDS = 5
+
+    # Settings (as set by command-line arguments) of ITSLiveAnnualMosaics and
+    # BatchVars to pass to the processes creating mosaics for EPSG codes in parallel
+    WORKER_SETTINGS = [
+        'REGION',
+        'CELL_SIZE',
+        'NC_ENGINE',
+        'TRANSFORMATION_MATRIX_FILE',
+        'USE_EXISTING_FILES',
+        'SINGLE_PASS_ANNUAL_MOSAICS',
+        'ANNUAL_MOSAICS_MEMORY_GB',
+        'MERGE_YEAR_ONLY',
+        'NUM_REPROJECT_PROCESSES'
+    ]
+    BATCH_WORKER_SETTINGS = [
+        'HTTP_PREFIX',
+        'AWS_PREFIX'
+    ]
+
+    # Tolerance (fraction of the grid cell size) for the composites coordinates
+    # to be considered aligned with the mosaic grid
+    GRID_TOLERANCE = 1e-3
+
+    # Flag to create all annual mosaics in one pass over the composites: each
+    # composite is read once per group of years instead of once per year
+    SINGLE_PASS_ANNUAL_MOSAICS = False
+
+    # Memory budget (in GB) for in-memory annual mosaics when creating them in
+    # one pass: defines how many years are created per pass over the composites
+    ANNUAL_MOSAICS_MEMORY_GB = 32
+
     # If mosaics for only specific EPSG is requested to be generated
     CREATE_EPSG_ONLY = None
 
@@ -425,6 +533,10 @@ class ITSLiveAnnualMosaics:
 
             logging.info(f'Created mosaics files: {result_files[ITSLiveAnnualMosaics.CREATE_EPSG_ONLY]}')
 
+        elif ITSLiveAnnualMosaics.NUM_EPSG_PROCESSES > 1 and need_to_reproject:
+            # Create mosaics for EPSG codes in parallel and merge them as they are created
+            result_files = self.make_mosaics_parallel(s3_bucket, mosaics_dir, copy_to_s3)
+
         else:
             # Create mosaics based on all EPSG composites
             for each_epsg in self.composites.keys():
@@ -464,6 +576,264 @@ class ITSLiveAnnualMosaics:
         # Otherwise it's only mosaics for one projection and we are done
         return result_files
 
+    @staticmethod
+    def worker_settings():
+        """
+        Collect settings of the current process to pass to the processes creating
+        mosaics for EPSG codes in parallel: spawned processes don't inherit
+        settings as set by command-line arguments.
+        """
+        return {
+            'ITSLiveAnnualMosaics': {each: getattr(ITSLiveAnnualMosaics, each) for each in ITSLiveAnnualMosaics.WORKER_SETTINGS},
+            'BatchVars': {each: getattr(BatchVars, each) for each in ITSLiveAnnualMosaics.BATCH_WORKER_SETTINGS}
+        }
+
+    @staticmethod
+    def apply_worker_settings(settings):
+        """
+        Apply settings as collected by worker_settings() to the current process.
+        """
+        for each, value in settings['ITSLiveAnnualMosaics'].items():
+            setattr(ITSLiveAnnualMosaics, each, value)
+
+        for each, value in settings['BatchVars'].items():
+            setattr(BatchVars, each, value)
+
+    @staticmethod
+    def mosaics_bytes_per_cell():
+        """
+        Estimate memory (in bytes) per grid cell of the summary and annual mosaics
+        based on the number of data variables: all variables are kept as float32
+        in memory, and 3d variables of the summary mosaics have sensor
+        dimension (estimated by the number of all mission groups).
+
+        Returns:
+        ========
+        Tuple of bytes per cell for the summary mosaics and for the annual mosaics
+        of one year.
+        """
+        value_size = np.dtype(np.float32).itemsize
+        sensor_vars = [CompDataVars.SENSOR_INCLUDE, CompDataVars.MAX_DT]
+
+        summary_values = len(ITSLiveAnnualMosaics.SUMMARY_VARS) + \
+            len(sensor_vars) * (len(MissionSensor.ALL_GROUPS) - 1)
+
+        return summary_values * value_size, len(ITSLiveAnnualMosaics.ANNUAL_VARS) * value_size
+
+    def epsg_memory_gb(self, epsg_code):
+        """
+        Estimate memory (in GB) required to create mosaics for the EPSG code
+        based on the extent of its composites.
+
+        It accounts for the summary mosaics and annual mosaics being created
+        (ANNUAL_MOSAICS_MEMORY_GB bounds annual mosaics created in one pass), and
+        for NUM_REPROJECT_PROCESSES re-projection subprocesses if mosaics need
+        to be re-projected: each of the subprocesses holds the source mosaic
+        and the re-projected one.
+        """
+        epsg = self.composites[epsg_code]
+        y_values = [float(each) for each in epsg.keys()]
+        x_values = [float(each_x) for each_y in epsg.values() for each_x in each_y.keys()]
+
+        num_x = (max(x_values) - min(x_values) + ITSLiveAnnualMosaics.COMPOSITE_SIZE) / ITSLiveAnnualMosaics.CELL_SIZE
+        num_y = (max(y_values) - min(y_values) + ITSLiveAnnualMosaics.COMPOSITE_SIZE) / ITSLiveAnnualMosaics.CELL_SIZE
+        num_cells = num_x * num_y
+
+        summary_bytes, annual_bytes = ITSLiveAnnualMosaics.mosaics_bytes_per_cell()
+
+        annual_gb = num_cells * annual_bytes / 1024**3
+        if ITSLiveAnnualMosaics.SINGLE_PASS_ANNUAL_MOSAICS:
+            annual_gb = max(annual_gb, ITSLiveAnnualMosaics.ANNUAL_MOSAICS_MEMORY_GB)
+
+        memory_gb = num_cells * summary_bytes / 1024**3 + annual_gb
+
+        if int(epsg_code) != self.epsg:
+            # Summary mosaics are re-projected on their own, annual mosaics
+            # are re-projected by up to NUM_REPROJECT_PROCESSES subprocesses
+            reproject_bytes = 2 * max(summary_bytes, ITSLiveAnnualMosaics.NUM_REPROJECT_PROCESSES * annual_bytes)
+            memory_gb += num_cells * reproject_bytes / 1024**3
+
+        return memory_gb
+
+    @staticmethod
+    def epsg_num_processes():
+        """
+        Number of processes to create mosaics for multiple EPSG codes in parallel:
+        each of EPSG code processes runs up to NUM_REPROJECT_PROCESSES re-projection
+        subprocesses (concurrently with creation of the mosaics if
+        NUM_REPROJECT_PROCESSES > 1), and all of them should fit into available CPUs.
+        """
+        cpus_per_process = ITSLiveAnnualMosaics.NUM_REPROJECT_PROCESSES
+        if ITSLiveAnnualMosaics.NUM_REPROJECT_PROCESSES > 1:
+            cpus_per_process += 1
+
+        return max(1, min(ITSLiveAnnualMosaics.NUM_EPSG_PROCESSES, os.cpu_count() // cpus_per_process))
+
+    def make_mosaics_parallel(self, s3_bucket: str, mosaics_dir: str, copy_to_s3: bool):
+        """
+        Create mosaics for all EPSG codes of the multi-EPSG region in parallel
+        by the pool of processes, and merge them into target EPSG mosaics.
+
+        EPSG codes are processed by up to NUM_EPSG_PROCESSES worker processes
+        (see epsg_num_processes()) starting with the largest extent: new EPSG
+        code is started only if estimated memory of all EPSG codes being processed
+        fits into MEMORY_BUDGET_GB. Worker processes are spawned and get all
+        their inputs explicitly. Workers report each mosaic as soon as it's
+        created and re-projected: static mosaics are merged once all EPSG codes
+        have reported them, and annual mosaics of the year are merged as soon as
+        all EPSG codes have reported the year or are done. Merging is done by
+        separate thread in the order mosaics are ready, so that new EPSG codes
+        are started as soon as the budget allows.
+
+        s3_bucket: S3 bucket that stores all data (assumes that all datacubes,
+                    composites, and mosaics are stored in the same bucket).
+        mosaics_dir: Directory path within S3 bucket that stores datacubes' mosaics.
+        copy_to_s3: Flag if EPSG mosaics need to be copied to the AWS S3 bucket.
+
+        Returns:
+        ========
+        Dictionary of merged mosaics files: {'year' or '0000': mosaic_file}.
+        """
+        memory_gb = {each: self.epsg_memory_gb(each) for each in self.composites}
+        pending_epsg = sorted(self.composites.keys(), key=lambda each: memory_gb[each], reverse=True)
+
+        num_workers = min(ITSLiveAnnualMosaics.epsg_num_processes(), len(pending_epsg))
+        logging.info(f'Creating mosaics for {len(pending_epsg)} EPSG codes with {num_workers} processes: estimated memory={memory_gb} GB')
+
+        # Mosaics files as reported by workers per EPSG code
+        epsg_files = {each: {} for each in self.composites}
+        done_epsg = set()
+
+        # Merged mosaics
+        merge_copy_to_s3 = not self.is_dry_run
+        logging.info(f'Merge mosaics: copy_to_s3={merge_copy_to_s3}')
+
+        summary_future = None
+        summary_file = None
+        first_ds = None
+        static_raw_ds = None
+        merge_futures = {}
+
+        settings = ITSLiveAnnualMosaics.worker_settings()
+        mp_context = mp.get_context('spawn')
+
+        def submit_ready_years(merge_executor):
+            """
+            Submit merging of annual mosaics for the years all EPSG codes have
+            reported mosaics for (or are done).
+            """
+            ready_years = set().union(*epsg_files.values()) - set(merge_futures) - {ITSLiveAnnualMosaics.SUMMARY_KEY}
+
+            for each_year in sorted(ready_years):
+                if not all(each_year in epsg_files[each] or each in done_epsg for each in epsg_files):
+                    # Some of EPSG codes might still create the mosaic for the year
+                    continue
+
+                # If requested to merge only one year, skip the rest of the years
+                if ITSLiveAnnualMosaics.skip_merge_year(each_year):
+                    merge_futures[each_year] = None
+                    continue
+
+                merge_futures[each_year] = merge_executor.submit(
+                    self.merge_epsg_annual_mosaics,
+                    {each: dict(files) for each, files in epsg_files.items()},
+                    each_year,
+                    static_raw_ds,
+                    first_ds,
+                    s3_bucket,
+                    mosaics_dir,
+                    merge_copy_to_s3
+                )
+
+        with mp_context.Manager() as manager, \
+                ThreadPoolExecutor(max_workers=1) as merge_executor, \
+                ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context) as executor:
+            ready_files = manager.Queue()
+            running = {}
+
+            while len(pending_epsg) or len(running):
+                # Start as many EPSG codes as the budget allows, at least one at a time
+                while len(pending_epsg) and len(running) < num_workers and (
+                    len(running) == 0 or
+                    ITSLiveAnnualMosaics.MEMORY_BUDGET_GB == 0 or
+                    sum(memory_gb[each] for each in running.values()) + memory_gb[pending_epsg[0]] <= ITSLiveAnnualMosaics.MEMORY_BUDGET_GB
+                ):
+                    each_epsg = pending_epsg.pop(0)
+                    logging.info(f'Opening annual composites for EPSG={each_epsg}')
+                    each_future = executor.submit(
+                        _make_mosaics_worker,
+                        settings,
+                        self.epsg,
+                        self.is_dry_run,
+                        self.date_created,
+                        each_epsg,
+                        self.composites[each_epsg],
+                        s3_bucket,
+                        mosaics_dir,
+                        copy_to_s3,
+                        ready_files
+                    )
+                    running[each_future] = each_epsg
+
+                try:
+                    each_epsg, year_token, mosaics_file = ready_files.get(timeout=ITSLiveAnnualMosaics.POLL_SECONDS)
+                    epsg_files[each_epsg][year_token] = mosaics_file
+
+                except queue.Empty:
+                    pass
+
+                for each_future in [each for each in running if each.done()]:
+                    each_epsg = running.pop(each_future)
+                    # Raises an exception if worker failed
+                    epsg_files[each_epsg] = each_future.result()
+                    done_epsg.add(each_epsg)
+
+                    logging.info(f'Created mosaics files: {epsg_files[each_epsg]}')
+
+                    if ITSLiveAnnualMosaics.SUMMARY_KEY not in epsg_files[each_epsg]:
+                        raise RuntimeError(f'No static mosaics were created for EPSG={each_epsg}: {epsg_files[each_epsg]}')
+
+                if summary_future is None and all(ITSLiveAnnualMosaics.SUMMARY_KEY in each for each in epsg_files.values()):
+                    summary_future = merge_executor.submit(
+                        self.merge_epsg_summary_mosaics,
+                        {each: dict(files) for each, files in epsg_files.items()},
+                        s3_bucket,
+                        mosaics_dir,
+                        merge_copy_to_s3
+                    )
+
+                # Annual mosaics are merged only when static mosaics are merged
+                if first_ds is None and summary_future is not None and summary_future.done():
+                    first_ds, static_raw_ds, summary_file = summary_future.result()
+
+                if first_ds is not None:
+                    submit_ready_years(merge_executor)
+
+                # Raise an exception as soon as any of merges failed
+                for each_future in [summary_future, *merge_futures.values()]:
+                    if each_future is not None and each_future.done():
+                        each_future.result()
+
+            # All EPSG codes are done: merge the rest of the mosaics
+            if summary_future is None:
+                raise RuntimeError(f'Static mosaics were not reported for all EPSG codes: {epsg_files}')
+
+            first_ds, static_raw_ds, summary_file = summary_future.result()
+            submit_ready_years(merge_executor)
+
+            result_files = {ITSLiveAnnualMosaics.SUMMARY_KEY: summary_file}
+            for each_year, each_future in merge_futures.items():
+                if each_future is not None:
+                    result_files[each_year] = each_future.result()
+
+        # Force garbage collection as it does not always kick in
+        first_ds = None
+        static_raw_ds = None
+        summary_future = None
+        gc.collect()
+
+        return result_files
+
     def collect_composites(
         self,
         cubes_file: str,
@@ -484,149 +854,198 @@ class ITSLiveAnnualMosaics:
         """
         logging.info(f'BatchVars.POLYGON_SHAPE: {BatchVars.POLYGON_SHAPE}')
 
-        all_composites = {}
         with open(cubes_file, 'r') as fhandle:
             cubes = json.load(fhandle)
 
-            # Number of cubes to process
-            num_processed = 0
-            logging.info(f'Total number of datacubes: {len(cubes["features"])}')
-            for each_cube in cubes[CubeJson.FEATURES]:
-                # Example of data cube definition in json file
-                # "properties": {
-                #     "fill-opacity": 0.9848664555858357,
-                #     "fill": "red",
-                #     "roi_percent_coverage": 1.5133544414164224,
-                #     "data_epsg": "EPSG:32718",
-                #     "geometry_epsg": {
-                #         "type": "Polygon",
-                #         "coordinates": [
-                #             [
-                #                 [
-                #                     400000,
-                #                     4400000
-                #                 ],
-                #                 [
-                #                     500000,
-                #                     4400000
-                #                 ],
-                #                 [
-                #                     500000,
-                #                     4500000
-                #                 ],
-                #                 [
-                #                     400000,
-                #                     4500000
-                #                 ],
-                #                 [
-                #                     400000,
-                #                     4400000
-                #                 ]
-                #             ]
-                #         ]
-                #     },
-                #     "datacube_exist": 1,
-                #     "zarr_url": "http://its-live-data.s3.amazonaws.com/datacubes/v02/S50W070/ITS_LIVE_vel_EPSG32718_G0120_X450000_Y4450000.zarr"
-                # }
-
-                # Consider cubes with ROI != 0 only
-                properties = each_cube[CubeJson.PROPERTIES]
-
-                roi = properties[CubeJson.ROI_PERCENT_COVERAGE]
-                if roi != 0.0:
-                    # Format filename for the cube
-                    epsg_code = properties[CubeJson.EPSG]
-
-                    # Include only specific EPSG code(s) if specified
-                    if len(BatchVars.EPSG_TO_GENERATE) and \
-                            epsg_code not in BatchVars.EPSG_TO_GENERATE:
-                        # logging.info(f'Skipping {epsg_code} which is not in {BatchVars.EPSG_TO_GENERATE}')
-                        continue
+        logging.info(f'Total number of datacubes: {len(cubes["features"])}')
+
+        # Center points of the cubes that qualify for the search criteria:
+        # (epsg_code, mid_x, mid_y, cube_url)
+        cube_centers = []
+
+        for each_cube in cubes[CubeJson.FEATURES]:
+            # Example of data cube definition in json file
+            # "properties": {
+            #     "fill-opacity": 0.9848664555858357,
+            #     "fill": "red",
+            #     "roi_percent_coverage": 1.5133544414164224,
+            #     "data_epsg": "EPSG:32718",
+            #     "geometry_epsg": {
+            #         "type": "Polygon",
+            #         "coordinates": [
+            #             [
+            #                 [
+            #                     400000,
+            #                     4400000
+            #                 ],
+            #                 [
+            #                     500000,
+            #                     4400000
+            #                 ],
+            #                 [
+            #                     500000,
+            #                     4500000
+            #                 ],
+            #                 [
+            #                     400000,
+            #                     4500000
+            #                 ],
+            #                 [
+            #                     400000,
+            #                     4400000
+            #                 ]
+            #             ]
+            #         ]
+            #     },
+            #     "datacube_exist": 1,
+            #     "zarr_url": "http://its-live-data.s3.amazonaws.com/datacubes/v02/S50W070/ITS_LIVE_vel_EPSG32718_G0120_X450000_Y4450000.zarr"
+            # }
+
+            # Consider cubes with ROI != 0 only
+            properties = each_cube[CubeJson.PROPERTIES]
+
+            roi = properties[CubeJson.ROI_PERCENT_COVERAGE]
+            if roi == 0.0:
+                continue
 
-                    # Exclude specific EPSG code(s) if specified
-                    if len(BatchVars.EPSG_TO_EXCLUDE) and \
-                            epsg_code in BatchVars.EPSG_TO_EXCLUDE:
-                        continue
+            epsg_code = properties[CubeJson.EPSG]
 
-                    coords = properties[CubeJson.GEOMETRY_EPSG][CubeJson.COORDINATES][0]
-                    x_bounds = Bounds([each[0] for each in coords])
-                    y_bounds = Bounds([each[1] for each in coords])
-
-                    mid_x = int(x_bounds.middle_point())
-                    mid_y = int(y_bounds.middle_point())
-
-                    # Get mid point to the nearest 50
-                    # logging.info(f"Mid point: x={mid_x} y={mid_y}")
-                    mid_x = int(math.floor(mid_x/BatchVars.MID_POINT_RESOLUTION)*BatchVars.MID_POINT_RESOLUTION)
-                    mid_y = int(math.floor(mid_y/BatchVars.MID_POINT_RESOLUTION)*BatchVars.MID_POINT_RESOLUTION)
-                    # logging.info(f"Mid point at {BatchVars.MID_POINT_RESOLUTION}: x={mid_x} y={mid_y}")
-
-                    # Convert to lon/lat coordinates to format s3 bucket path
-                    # for the datacube
-                    mid_lon_lat = itslive_utils.transform_coord(
-                        str(epsg_code),
-                        BatchVars.LON_LAT_PROJECTION,
-                        mid_x, mid_y
-                    )
+            # Include only specific EPSG code(s) if specified
+            if len(BatchVars.EPSG_TO_GENERATE) and \
+                    epsg_code not in BatchVars.EPSG_TO_GENERATE:
+                # logging.info(f'Skipping {epsg_code} which is not in {BatchVars.EPSG_TO_GENERATE}')
+                continue
 
-                    if BatchVars.POLYGON_SHAPE and \
-                            (not BatchVars.POLYGON_SHAPE.contains(geometry.Point(mid_lon_lat[0], mid_lon_lat[1]))):
-                        # logging.info(f"Skipping non-polygon point: {mid_lon_lat}")
-                        # Provided polygon does not contain cube's center point
-                        continue
+            # Exclude specific EPSG code(s) if specified
+            if len(BatchVars.EPSG_TO_EXCLUDE) and \
+                    epsg_code in BatchVars.EPSG_TO_EXCLUDE:
+                continue
 
-                    # Format filename for the cube's composites
-                    cube_s3 = properties[CubeJson.URL].replace(
-                        BatchVars.HTTP_PREFIX,
-                        BatchVars.AWS_PREFIX
-                    )
+            coords = properties[CubeJson.GEOMETRY_EPSG][CubeJson.COORDINATES][0]
+            x_bounds = Bounds([each[0] for each in coords])
+            y_bounds = Bounds([each[1] for each in coords])
 
-                    # Process specific datacubes only: check for full path of original cube as
-                    if len(BatchVars.CUBES_TO_GENERATE) and cube_s3 not in BatchVars.CUBES_TO_GENERATE:
-                        # logging.info(f"Skipping as not provided in BatchVars.CUBES_TO_GENERATE")
-                        continue
+            mid_x = int(x_bounds.middle_point())
+            mid_y = int(y_bounds.middle_point())
 
-                    logging.info(f'Cube name: {cube_s3}')
+            # Get mid point to the nearest 50
+            mid_x = int(math.floor(mid_x/BatchVars.MID_POINT_RESOLUTION)*BatchVars.MID_POINT_RESOLUTION)
+            mid_y = int(math.floor(mid_y/BatchVars.MID_POINT_RESOLUTION)*BatchVars.MID_POINT_RESOLUTION)
 
-                    # Check if cube exists in S3 bucket (should exist, just to be sure)
-                    cube_exists = self.s3.ls(cube_s3)
-                    if len(cube_exists) == 0:
-                        logging.info(f"Datacube {cube_s3} does not exist, skipping.")
-                        continue
+            cube_centers.append((epsg_code, mid_x, mid_y, properties[CubeJson.URL]))
 
-                    s3_composite_dir = itslive_utils.point_to_prefix(mid_lon_lat[1], mid_lon_lat[0], composite_dir)
-                    composite_s3 = os.path.join(s3_bucket, s3_composite_dir, composite_filename_zarr(epsg_code, ITSLiveAnnualMosaics.CELL_SIZE, mid_x, mid_y))
-                    logging.info(f'Composite file: {composite_s3}')
+        # Convert to lon/lat coordinates to format s3 bucket path for the datacube:
+        # transform all center points of the same EPSG code at once
+        mid_lon_lat = np.zeros((len(cube_centers), 2))
 
-                    # Check if composite exists in S3 bucket (should exist, just to be sure)
-                    composite_exists = self.s3.ls(composite_s3)
-                    if len(composite_exists) == 0:
-                        logging.info(f"Composite {composite_s3} does not exist, skipping.")
-                        continue
+        for epsg_code in set(each[0] for each in cube_centers):
+            epsg_index = [index for index, each in enumerate(cube_centers) if each[0] == epsg_code]
+
+            mid_lon_lat[epsg_index, 0], mid_lon_lat[epsg_index, 1] = lon_lat_transformer(epsg_code).transform(
+                np.array([cube_centers[index][1] for index in epsg_index]),
+                np.array([cube_centers[index][2] for index in epsg_index])
+            )
+
+        # Datacubes and their composites to check for existence:
+        # (epsg_code, mid_x, mid_y, cube_s3, composite_s3)
+        cube_composites = []
+
+        for (epsg_code, mid_x, mid_y, cube_url), (mid_lon, mid_lat) in zip(cube_centers, mid_lon_lat):
+            if BatchVars.POLYGON_SHAPE and \
+                    (not BatchVars.POLYGON_SHAPE.contains(geometry.Point(mid_lon, mid_lat))):
+                # Provided polygon does not contain cube's center point
+                continue
+
+            cube_s3 = cube_url.replace(
+                BatchVars.HTTP_PREFIX,
+                BatchVars.AWS_PREFIX
+            )
+
+            # Process specific datacubes only: check for full path of original cube as
+            if len(BatchVars.CUBES_TO_GENERATE) and cube_s3 not in BatchVars.CUBES_TO_GENERATE:
+                continue
+
+            # Format cube composites filename:
+            # s3://its-live-data/composites/annual/v02/N60W130/ITS_LIVE_vel_annual_EPSG3413_G0120_X-3250000_Y250000.zarr
+            s3_composite_dir = itslive_utils.point_to_prefix(mid_lat, mid_lon, composite_dir)
+            composite_s3 = os.path.join(s3_bucket, s3_composite_dir, composite_filename_zarr(epsg_code, ITSLiveAnnualMosaics.CELL_SIZE, mid_x, mid_y))
+
+            cube_composites.append((epsg_code, mid_x, mid_y, cube_s3, composite_s3))
+
+        # Check if cubes and composites exist in S3 bucket (should exist, just to be sure)
+        existing_s3 = self.existing_s3_paths(
+            [each[3] for each in cube_composites] + [each[4] for each in cube_composites]
+        )
+
+        all_composites = {}
+
+        # Number of cubes to process
+        num_processed = 0
+
+        for epsg_code, mid_x, mid_y, cube_s3, composite_s3 in cube_composites:
+            logging.info(f'Cube name: {cube_s3}')
+
+            if cube_s3 not in existing_s3:
+                logging.info(f"Datacube {cube_s3} does not exist, skipping.")
+                continue
+
+            logging.info(f'Composite file: {composite_s3}')
+
+            if composite_s3 not in existing_s3:
+                logging.info(f"Composite {composite_s3} does not exist, skipping.")
+                continue
+
+            if composite_s3 in all_composites:
+                # TODO: For now just issue a warning. Once composites are re-created, enable exception
+                raise RuntimeError(f'Composite {composite_s3} already exists for {all_composites[composite_s3]} datacube. Check on {cube_s3}!!!')
+                # logging.info(f'WARNING_ATTENTION: Composite {composite_s3} already exists for {all_composites[composite_s3]} datacube. Check on {cube_s3}!!!')
+
+            all_composites[composite_s3] = cube_s3
+
+            # Update EPSG: Y: X: composite_s3_path nested dictionary
+            epsg_dict = self.composites.setdefault(epsg_code, {})
+            y_dict = epsg_dict.setdefault(mid_y, {})
+            y_dict[mid_x] = composite_s3
+
+            num_processed += 1
+
+        logging.info(f"Number of collected composites: {num_processed}")
+        logging.info(f'Collected composites: {json.dumps(self.composites, indent=4)}')
+
+        centers_filename = ITSLiveAnnualMosaics.REGION + ITSLiveAnnualMosaics.COMPOSITES_CENTERS_FILE
+        logging.info(f'Writing collected composites to {centers_filename}...')
+        with open(centers_filename, 'w') as fh:
+            json.dump(self.composites, fh, indent=4)
+
+    def existing_s3_paths(self, s3_paths: list):
+        """
+        Check which of the S3 paths exist: list each of the parent S3 prefixes
+        once and concurrently instead of listing each of the paths.
 
-                    if composite_s3 in all_composites:
-                        # TODO: For now just issue a warning. Once composites are re-created, enable exception
-                        raise RuntimeError(f'Composite {composite_s3} already exists for {all_composites[composite_s3]} datacube. Check on {cube_s3}!!!')
-                        # logging.info(f'WARNING_ATTENTION: Composite {composite_s3} already exists for {all_composites[composite_s3]} datacube. Check on {cube_s3}!!!')
+        Inputs:
+        =======
+        s3_paths: List of S3 paths to check.
 
-                    all_composites[composite_s3] = cube_s3
+        Returns:
+        ========
+        Set of existing S3 paths.
+        """
+        prefixes = sorted(set(os.path.dirname(each) for each in s3_paths))
+        logging.info(f'Listing {len(prefixes)} S3 prefixes for {len(s3_paths)} paths')
 
-                    # Update EPSG: Y: X: composite_s3_path nested dictionary
-                    epsg_dict = self.composites.setdefault(epsg_code, {})
-                    y_dict = epsg_dict.setdefault(mid_y, {})
-                    y_dict[mid_x] = composite_s3
+        def list_prefix(prefix):
+            try:
+                return set(os.path.basename(each.rstrip('/')) for each in self.s3.ls(prefix))
 
-                    # Format cube composites filename:
-                    # s3://its-live-data/composites/annual/v02/N60W130/ITS_LIVE_vel_annual_EPSG3413_G0120_X-3250000_Y250000.zarr
-                    num_processed += 1
+            except FileNotFoundError:
+                return set()
 
-            logging.info(f"Number of collected composites: {num_processed}")
-            logging.info(f'Collected composites: {json.dumps(self.composites, indent=4)}')
+        with ThreadPoolExecutor(max_workers=ITSLiveAnnualMosaics.NUM_S3_THREADS) as executor:
+            prefix_contents = dict(zip(prefixes, executor.map(list_prefix, prefixes)))
 
-            centers_filename = ITSLiveAnnualMosaics.REGION + ITSLiveAnnualMosaics.COMPOSITES_CENTERS_FILE
-            logging.info(f'Writing collected composites to {centers_filename}...')
-            with open(centers_filename, 'w') as fh:
-                json.dump(self.composites, fh, indent=4)
+        return set(
+            each for each in s3_paths if os.path.basename(each) in prefix_contents[os.path.dirname(each)]
+        )
 
     @staticmethod
     def reproject(mosaics_file: str, reproject_mosaics_filename: str, epsg: int, reproject_matrix_filename: str):
@@ -691,7 +1110,8 @@ class ITSLiveAnnualMosaics:
         mosaics_dir: str,
         check_for_epsg: bool,
         copy_to_s3: bool,
-        rename_zero_based_data_vars: bool = False
+        rename_zero_based_data_vars: bool = False,
+        ready_callback=None
     ):
         """
         Build annual and static mosaics from collected datacube composites per each EPSG code.
@@ -723,6 +1143,9 @@ class ITSLiveAnnualMosaics:
                         'v0' with 'v') in summary mosaics and corresponding attributes
                         when writing final mosaics to NetCDF format files. Default is False,
                         meaning not to replace data variable names.
+        ready_callback: Function to call with the year token and the filename of each mosaic
+                        as soon as the mosaic is created (and re-projected if required).
+                        Default is None.
         """
         # xarray.Dataset's objects for opened Zarr composites
         self.raw_ds = {}
@@ -882,38 +1305,91 @@ class ITSLiveAnnualMosaics:
             # Replace output file with re-projected file
             output_files[ITSLiveAnnualMosaics.SUMMARY_KEY] = reproject_mosaics_filename
 
+        if ready_callback is not None:
+            ready_callback(ITSLiveAnnualMosaics.SUMMARY_KEY, output_files[ITSLiveAnnualMosaics.SUMMARY_KEY])
+
+        # Re-projection of annual mosaics (if required) can run concurrently with
+        # creation of the mosaics for the following years: transformation matrix
+        # is already stored by re-projection of the summary mosaic
+        reproject_executor = None
+        reproject_futures = {}
+        if epsg_code != self.epsg and ITSLiveAnnualMosaics.NUM_REPROJECT_PROCESSES > 1:
+            reproject_executor = ThreadPoolExecutor(max_workers=ITSLiveAnnualMosaics.NUM_REPROJECT_PROCESSES)
+
         # Create annual mosaics
         logging.info(f'Creating annual mosaics for {ITSLiveAnnualMosaics.REGION}')
-        for each_year in self.time_coords:
-            # Year (as "string" dtype) for the mosaic
-            year_token = str(each_year.year)
-            output_files[year_token] = self.create_annual_mosaics(epsg_code, first_ds, each_year, s3_bucket, mosaics_dir, copy_to_s3)
+        annual_files = {}
+        if ITSLiveAnnualMosaics.SINGLE_PASS_ANNUAL_MOSAICS:
+            annual_files = self.create_all_annual_mosaics(epsg_code, first_ds, s3_bucket, mosaics_dir, copy_to_s3)
 
-            # Force garbage collection as it does not always kick in
-            gc.collect()
+        try:
+            for each_year in self.time_coords:
+                # Year (as "string" dtype) for the mosaic
+                year_token = str(each_year.year)
+                if ITSLiveAnnualMosaics.SINGLE_PASS_ANNUAL_MOSAICS:
+                    output_files[year_token] = annual_files[each_year.year]
+
+                else:
+                    output_files[year_token] = self.create_annual_mosaics(epsg_code, first_ds, each_year, s3_bucket, mosaics_dir, copy_to_s3)
+
+                # Force garbage collection as it does not always kick in
+                gc.collect()
 
-            if epsg_code != self.epsg:
-                mosaics_file = output_files[year_token]
+                if epsg_code != self.epsg:
+                    mosaics_file = output_files[year_token]
 
-                # Append local path to the filename to store mosaics and transformation matrix to
-                reproject_mosaics_filename = os.path.join(local_dir, os.path.basename(mosaics_file))
-                reproject_matrix_filename = os.path.join(local_dir, ITSLiveAnnualMosaics.TRANSFORMATION_MATRIX_FILE)
+                    # Append local path to the filename to store mosaics and transformation matrix to
+                    reproject_mosaics_filename = os.path.join(local_dir, os.path.basename(mosaics_file))
+                    reproject_matrix_filename = os.path.join(local_dir, ITSLiveAnnualMosaics.TRANSFORMATION_MATRIX_FILE)
 
-                if ITSLiveAnnualMosaics.USE_EXISTING_FILES and os.path.exists(reproject_mosaics_filename):
-                    # Mosaic file exists, don't create it
+                    if ITSLiveAnnualMosaics.USE_EXISTING_FILES and os.path.exists(reproject_mosaics_filename):
+                        # Mosaic file exists, don't create it
+                        logging.info(f'Using existing {reproject_mosaics_filename}')
+
+                    elif reproject_executor is not None:
+                        # Re-project in the background, report the mosaic once it's re-projected
+                        each_future = reproject_executor.submit(
+                            ITSLiveAnnualMosaics.reproject,
+                            mosaics_file,
+                            reproject_mosaics_filename,
+                            self.epsg,
+                            reproject_matrix_filename
+                        )
+                        reproject_futures[each_future] = (year_token, reproject_mosaics_filename)
+
+                        if ready_callback is not None:
+                            def report_reprojected(future, year_token=year_token, filename=reproject_mosaics_filename):
+                                if future.exception() is None:
+                                    ready_callback(year_token, filename)
+
+                            each_future.add_done_callback(report_reprojected)
+
+                        continue
+
+                    else:
+                        # logging.info(f'Re-projecting {mosaics_file} to {self.epsg}')
+                        # reproject_main(mosaics_file, reproject_mosaics_filename, self.epsg, reproject_matrix_filename, verbose_flag=True)
+                        ITSLiveAnnualMosaics.reproject(mosaics_file, reproject_mosaics_filename, self.epsg, reproject_matrix_filename)
+
+                        # Force garbage collection as it does not always kick in
+                        gc.collect()
+
+                    # Replace output file with re-projected file
                     output_files[year_token] = reproject_mosaics_filename
-                    logging.info(f'Using existing {reproject_mosaics_filename}')
-                    continue
 
-                # logging.info(f'Re-projecting {mosaics_file} to {self.epsg}')
-                # reproject_main(mosaics_file, reproject_mosaics_filename, self.epsg, reproject_matrix_filename, verbose_flag=True)
-                ITSLiveAnnualMosaics.reproject(mosaics_file, reproject_mosaics_filename, self.epsg, reproject_matrix_filename)
+                if ready_callback is not None:
+                    ready_callback(year_token, output_files[year_token])
 
-                # Replace output file with re-projected file
-                output_files[year_token] = reproject_mosaics_filename
+        finally:
+            if reproject_executor is not None:
+                reproject_executor.shutdown(wait=True)
 
-                # Force garbage collection as it does not always kick in
-                gc.collect()
+        for each_future, (year_token, reproject_mosaics_filename) in reproject_futures.items():
+            # Raise an exception if re-projection failed
+            each_future.result()
+
+            # Replace output file with re-projected file
+            output_files[year_token] = reproject_mosaics_filename
 
         return output_files
 
@@ -1039,6 +1515,73 @@ class ITSLiveAnnualMosaics:
         all_years = sorted(all_keys)
         logging.info(f'Unique year tokens for all generated mosaics: {all_years}')
 
+        # Dictionary of generated mosaics:
+        # year -> mosaic file
+        output_files = {}
+
+        # Merge static mosaics first, that will define X/Y grid for annual mosaics
+        first_ds, static_raw_ds, output_files[ITSLiveAnnualMosaics.SUMMARY_KEY] = self.merge_epsg_summary_mosaics(
+            epsg_mosaics_files,
+            s3_bucket,
+            mosaics_dir,
+            copy_to_s3
+        )
+
+        # Remove processed key from the list of known keys
+        all_years.remove(ITSLiveAnnualMosaics.SUMMARY_KEY)
+
+        for each_year in all_years:
+            # If requested to merge only one year, skip the rest of the years
+            if ITSLiveAnnualMosaics.skip_merge_year(each_year):
+                continue
+
+            output_files[each_year] = self.merge_epsg_annual_mosaics(
+                epsg_mosaics_files,
+                each_year,
+                static_raw_ds,
+                first_ds,
+                s3_bucket,
+                mosaics_dir,
+                copy_to_s3
+            )
+
+        # Force garbage collection as it does not always kick in
+        static_raw_ds = None
+        gc.collect()
+
+        return output_files
+
+    @staticmethod
+    def skip_merge_year(year_token: str):
+        """
+        Check if merge of the year mosaics should be skipped as only one year
+        is requested to be merged.
+        """
+        logging.info(f'Merging {year_token} annual mosaics...')
+        if ITSLiveAnnualMosaics.MERGE_YEAR_ONLY and ITSLiveAnnualMosaics.MERGE_YEAR_ONLY != year_token:
+            logging.info(f'Skipping {year_token} as only merging for {ITSLiveAnnualMosaics.MERGE_YEAR_ONLY} is requested.')
+            return True
+
+        return False
+
+    def merge_epsg_summary_mosaics(self, epsg_mosaics_files: dict, s3_bucket: str, mosaics_dir: str, copy_to_s3: bool):
+        """
+        Combine re-projected to the target EPSG projection static mosaics for the region.
+        This defines X/Y grid and the mask to merge annual mosaics with.
+
+        epsg_mosaics_files: Dictionary of re-projected mosaics per EPSG code in the
+                            format: {epsg: {'year' or '0000': mosaic_file}}. Only
+                            static mosaics ('0000') are used.
+        s3_bucket: S3 bucket that stores all data (assumes that all datacubes,
+                    composites, and mosaics are stored in the same bucket).
+        mosaics_dir: Directory path within S3 bucket that stores datacubes' mosaics.
+        copy_to_s3: Flag if result mosaics need to be copied to the AWS S3 bucket.
+
+        Returns:
+        ========
+        xarray.Dataset with the mapping for the target mosaics, opened static mosaics
+        to merge annual mosaics with, and merged static mosaic file.
+        """
         self.raw_ds = {}
         # There is no time coordinate in mosaics
         self.time_coords = []
@@ -1080,9 +1623,6 @@ class ITSLiveAnnualMosaics:
             self.y_coords.append(ds_from_nc.y.values)
             self.sensor_coords.append(ds_from_nc.sensor.values)
 
-        # Remove processed key from the list of known keys
-        all_years.remove(ITSLiveAnnualMosaics.SUMMARY_KEY)
-
         # Create one large dataset
         self.x_coords = sorted(list(set(np.concatenate(self.x_coords))))
         self.y_coords = sorted(list(set(np.concatenate(self.y_coords))))
@@ -1116,12 +1656,8 @@ class ITSLiveAnnualMosaics:
         # Set mapping data variable for the target mosaics
         first_ds = self.set_mapping(x_cell, y_cell)
 
-        # Dictionary of generated mosaics:
-        # year -> mosaic file
-        output_files = {}
-
         # Merge summary mosaics (to store all 2d data and common 3d variables from all composites)
-        output_files[ITSLiveAnnualMosaics.SUMMARY_KEY] = self.merge_summary_mosaics(first_ds, s3_bucket, mosaics_dir, copy_to_s3)
+        summary_file = self.merge_summary_mosaics(first_ds, s3_bucket, mosaics_dir, copy_to_s3)
 
         # Force garbage collection as it does not always kick in
         self.raw_ds = {}
@@ -1149,50 +1685,64 @@ class ITSLiveAnnualMosaics:
                 ds_from_nc.sensor.values.tolist()
             )
 
-        for each_year in all_years:
-            self.raw_ds = {}
-            gc.collect()
+        return first_ds, static_raw_ds, summary_file
 
-            logging.info(f'Merging {each_year} annual mosaics...')
-            # If requested to merge only one year, skip the rest of the years
-            if ITSLiveAnnualMosaics.MERGE_YEAR_ONLY and ITSLiveAnnualMosaics.MERGE_YEAR_ONLY != each_year:
-                logging.info(f'Skipping {each_year} as only merging for {ITSLiveAnnualMosaics.MERGE_YEAR_ONLY} is requested.')
-                continue
+    def merge_epsg_annual_mosaics(
+        self,
+        epsg_mosaics_files: dict,
+        year_token: str,
+        static_raw_ds: dict,
+        first_ds: xr.Dataset,
+        s3_bucket: str,
+        mosaics_dir: str,
+        copy_to_s3: bool
+    ):
+        """
+        Combine re-projected to the target EPSG projection annual mosaics of the year.
+        Static mosaics must be merged first by merge_epsg_summary_mosaics().
+
+        epsg_mosaics_files: Dictionary of re-projected mosaics per EPSG code in the
+                            format: {epsg: {'year' or '0000': mosaic_file}}.
+        year_token: Year of the mosaics to merge.
+        static_raw_ds: Opened static mosaics as returned by merge_epsg_summary_mosaics().
+        first_ds: xarray.Dataset with the mapping for the target mosaics as returned
+                  by merge_epsg_summary_mosaics().
+        s3_bucket: S3 bucket that stores all data (assumes that all datacubes,
+                    composites, and mosaics are stored in the same bucket).
+        mosaics_dir: Directory path within S3 bucket that stores datacubes' mosaics.
+        copy_to_s3: Flag if result mosaics need to be copied to the AWS S3 bucket.
+        """
+        self.raw_ds = {}
+        gc.collect()
 
-            # Populate raw data
-            for mosaics_epsg, mosaics_dict in epsg_mosaics_files.items():
-                # Get mosaic file corresponding to the current mosaics year being merged
-                if each_year not in mosaics_dict:
-                    logging.info(f'Missing {each_year} from {mosaics_epsg} re-projection')
-                    continue
+        # Populate raw data
+        for mosaics_epsg, mosaics_dict in epsg_mosaics_files.items():
+            # Get mosaic file corresponding to the current mosaics year being merged
+            if year_token not in mosaics_dict:
+                logging.info(f'Missing {year_token} from {mosaics_epsg} re-projection')
+                continue
 
-                mosaic_file = mosaics_dict[each_year]
-                ds_from_nc = xr.open_dataset(mosaic_file, engine=MosaicsReproject.NC_ENGINE, decode_timedelta=False)
+            mosaic_file = mosaics_dict[year_token]
+            ds_from_nc = xr.open_dataset(mosaic_file, engine=MosaicsReproject.NC_ENGINE, decode_timedelta=False)
 
-                # Make sure processed composite is of the EPSG code being processed:
-                ds_projection = int(ds_from_nc.attrs['projection'])
-
-                # Make sure EPSG-specific mosaics are of the target projection
-                # (re-projection is already done at this point)
-                if ds_projection != self.epsg:
-                    raise RuntimeError(f'Expected mosaic in {self.epsg} projection, got {ds_projection} for {mosaic_file}.')
-
-                # Store open mosaics and corresponding metadata
-                self.raw_ds[mosaic_file] = ITSLiveAnnualMosaics.CompositeCollection(
-                    ITSLiveAnnualMosaics.CompositeS3(ds_from_nc, None),
-                    ds_from_nc.x.values,
-                    ds_from_nc.y.values,
-                    None,
-                    None
-                )
+            # Make sure processed composite is of the EPSG code being processed:
+            ds_projection = int(ds_from_nc.attrs['projection'])
 
-            output_files[each_year] = self.merge_annual_mosaics(static_raw_ds, first_ds, each_year, s3_bucket, mosaics_dir, copy_to_s3)
+            # Make sure EPSG-specific mosaics are of the target projection
+            # (re-projection is already done at this point)
+            if ds_projection != self.epsg:
+                raise RuntimeError(f'Expected mosaic in {self.epsg} projection, got {ds_projection} for {mosaic_file}.')
 
-        # Force garbage collection as it does not always kick in
-        static_raw_ds = None
-        gc.collect()
+            # Store open mosaics and corresponding metadata
+            self.raw_ds[mosaic_file] = ITSLiveAnnualMosaics.CompositeCollection(
+                ITSLiveAnnualMosaics.CompositeS3(ds_from_nc, None),
+                ds_from_nc.x.values,
+                ds_from_nc.y.values,
+                None,
+                None
+            )
 
-        return output_files
+        return self.merge_annual_mosaics(static_raw_ds, first_ds, year_token, s3_bucket, mosaics_dir, copy_to_s3)
 
     def create_mask(self, ds: xr.Dataset, raw_ds: dict):
         """
@@ -1266,9 +1816,6 @@ class ITSLiveAnnualMosaics:
             logging.info(f'Using only one available mosaic for {each_var}')
             max_overlap = data_list[0]
 
-        # Set data values in result dataset
-        max_overlap_dims = dict(x=max_overlap.x.values, y=max_overlap.y.values)
-
         # Convert data variable to output integer datatype
         max_overlap = xr.DataArray(
             data=to_int_type(max_overlap.values, data_type=np.uint32, fill_value=DataVars.MISSING_BYTE),
@@ -1277,9 +1824,6 @@ class ITSLiveAnnualMosaics:
             attrs=max_overlap.attrs
         )
 
-        # Set data values in result dataset
-        max_overlap_dims = dict(x=max_overlap.x.values, y=max_overlap.y.values)
-
         # Convert data variable to output integer datatype
         max_overlap = xr.DataArray(
             data=to_int_type(max_overlap.values, data_type=np.uint32, fill_value=DataVars.MISSING_BYTE),
@@ -1291,7 +1835,7 @@ class ITSLiveAnnualMosaics:
         # Set values for the output dataset
         # Remove zeros from data variables, their standard_names and descriptions:
         # only vx0, vy0, v0 strings should be replaced by corresponding vx, vy, v
-        ds[ds_var].loc[max_overlap_dims] = max_overlap
+        ds[ds_var].values[self.grid_index(max_overlap.x.values, max_overlap.y.values)] = max_overlap.transpose(Coords.Y, Coords.X).values
 
         # Replace zeros in attributes
         ds = ITSLiveAnnualMosaics.remove_zeros_from_metadata(ds, ds_var)
@@ -1613,11 +2157,6 @@ class ITSLiveAnnualMosaics:
                 logging.info(f'WARNING: Should never happen when merging multi-EPGSs mosaics: using only one available mosaic for {each_var}, no need to merge mosaics for multiple EPSGs')
                 concatenated = data_list[0]
 
-            # Set data values in result dataset
-            overlap_dims = dict(x=concatenated.x.values, y=concatenated.y.values)
-            if ndim == 3:
-                overlap_dims = dict(x=concatenated.x.values, y=concatenated.y.values, sensor=concatenated.sensor.values)
-
             # Convert data variable to output integer datatype if required
             if each_var in MosaicsOutputFormat.UINT16_TYPES:
                 concatenated = xr.DataArray(
@@ -1662,7 +2201,7 @@ class ITSLiveAnnualMosaics:
             # Set values for the output dataset
             # Remove zeros from data variables, their standard_names and descriptions:
             # only vx0, vy0, v0 strings should be replaced by corresponding vx, vy, v
-            ds[ds_var].loc[overlap_dims] = concatenated
+            ITSLiveAnnualMosaics.place_merged(ds[ds_var], concatenated, self.grid_index(concatenated.x.values, concatenated.y.values))
 
             # Replace zeros in attributes
             ds = ITSLiveAnnualMosaics.remove_zeros_from_metadata(ds, ds_var)
@@ -1882,9 +2421,6 @@ class ITSLiveAnnualMosaics:
                 logging.info(f'WARNING: Should never happen when merging multi-EPGSs mosaics: using only one available mosaic for {each_var}, no need to merge mosaics for multiple EPSGs')
                 concatenated = data_list[0]
 
-            # Set data values in result dataset
-            overlap_dims = dict(x=concatenated.x.values, y=concatenated.y.values)
-
             # Convert data variable to output integer datatype if required
             if each_var in MosaicsOutputFormat.UINT16_TYPES:
                 concatenated = xr.DataArray(
@@ -1911,7 +2447,7 @@ class ITSLiveAnnualMosaics:
                 )
 
             # Set values for the output dataset
-            ds[each_var].loc[overlap_dims] = concatenated
+            ITSLiveAnnualMosaics.place_merged(ds[each_var], concatenated, self.grid_index(concatenated.x.values, concatenated.y.values))
 
             gc.collect()
 
@@ -1949,7 +2485,350 @@ class ITSLiveAnnualMosaics:
         """
         logging.info(f'Creating annual mosaics for {ITSLiveAnnualMosaics.REGION} region for {year_date.year} year')
 
-        # Format filename for the mosaics
+        mosaics_filename = self.annual_mosaics_filename(ds_projection, year_date, copy_to_s3)
+
+        if ITSLiveAnnualMosaics.USE_EXISTING_FILES and os.path.exists(mosaics_filename):
+            # Mosaic file exists, don't create it
+            logging.info(f'Using existing {mosaics_filename}')
+
+            return mosaics_filename
+
+        ds = self.init_annual_mosaic(ds_projection, first_ds, year_date)
+
+        # Concatenate data for each data variable that has time (year value) dimension
+        for each_file, each_ds in self.raw_ds.items():
+
+            if year_date.year in each_ds.time:
+                # Composites have data for the year
+                year_index = each_ds.time.index(year_date.year)
+
+                # Mosaic cells covered by the composite
+                grid_index = self.grid_index(each_ds.x, each_ds.y)
+
+                # Workaround for non-masked X and Y components of V0 and V_AMP data variables:
+                # get mask for all valid magnitude values, then mask out corresponding
+                # X and Y components
+                v_valid_mask = ~np.isnan(each_ds.s3.ds[DataVars.V][year_index].values)
+
+                for each_var in ITSLiveAnnualMosaics.ANNUAL_VARS:
+                    # To support old composites
+                    if each_var not in each_ds.s3.ds:
+                        logging.info(f'Skipping missing {each_var} from {each_file}')
+                        continue
+
+                    if each_var == ShapeFile.LANDICE or each_var == ShapeFile.FLOATINGICE:
+                        # Variable does not have year dimension
+                        values = each_ds.s3.ds[each_var].values
+
+                    else:
+                        values = each_ds.s3.ds[each_var][year_index].values
+
+                        if each_var in [DataVars.VX, DataVars.VY]:
+                            values = np.where(v_valid_mask, values, np.nan)
+
+                    if each_var not in ds:
+                        # Create data variable in output dataset
+                        ds[each_var] = self.mosaic_data_array(values.dtype, each_ds.s3.ds[each_var].attrs)
+                        ds[each_var].attrs[DataVars.GRID_MAPPING] = DataVars.MAPPING
+
+                    # Update data variable in output dataset
+                    ds[each_var].values[grid_index] = values
+
+            else:
+                logging.warning(f'{each_file} does not have data for {year_date.year} year, skipping.')
+
+        self.write_annual_mosaic(ds, first_ds, s3_bucket, mosaics_dir, mosaics_filename, copy_to_s3)
+
+        return mosaics_filename
+
+    def create_all_annual_mosaics(self, ds_projection, first_ds, s3_bucket, mosaics_dir, copy_to_s3):
+        """
+        Create mosaics for all years in one pass over the composites and store
+        them to NetCDF format files in S3 bucket if provided.
+
+        Each composite is opened and its data variables are read once per group
+        of years, rather than once per year as by create_annual_mosaics().
+        Years are grouped so that in-memory mosaics of the group don't exceed
+        ITSLiveAnnualMosaics.ANNUAL_MOSAICS_MEMORY_GB.
+
+        Inputs:
+        =======
+        ds_projection: EPSG projection for the current mosaics.
+        first_ds: xarray.Dataset object that represents any (first) composite dataset.
+                It's used to collect global attributes that are applicable to the mosaics.
+        s3_bucket: AWS S3 bucket to place result mosaics files in.
+        mosaics_dir: AWS S3 directory to place mosaics in.
+        copy_to_s3: Boolean flag to indicate if generated mosaics files should be copied
+            to the target S3 bucket.
+
+        Returns:
+        ========
+        Dictionary of generated mosaics filenames keyed by the year.
+        """
+        mosaics_files = {}
+        years = []
+
+        for each_year in self.time_coords:
+            mosaics_filename = self.annual_mosaics_filename(ds_projection, each_year, copy_to_s3)
+
+            if ITSLiveAnnualMosaics.USE_EXISTING_FILES and os.path.exists(mosaics_filename):
+                # Mosaic file exists, don't create it
+                logging.info(f'Using existing {mosaics_filename}')
+                mosaics_files[each_year.year] = mosaics_filename
+
+            else:
+                years.append(each_year)
+
+        if len(years) == 0:
+            return mosaics_files
+
+        # Variables with year dimension are kept as float32 per year, ice masks
+        # are shared by all years but need per year coverage mask
+        ice_vars = [ShapeFile.LANDICE, ShapeFile.FLOATINGICE]
+        year_vars = [each for each in ITSLiveAnnualMosaics.ANNUAL_VARS if each not in ice_vars]
+
+        mosaic_shape = (len(self.y_coords), len(self.x_coords))
+        year_bytes = np.prod(mosaic_shape) * (np.dtype(np.float32).itemsize * len(year_vars) + np.dtype(bool).itemsize)
+        group_size = max(1, int(ITSLiveAnnualMosaics.ANNUAL_MOSAICS_MEMORY_GB * 1024**3 // year_bytes))
+
+        logging.info(f'Creating annual mosaics for {len(years)} years in groups of {group_size} years')
+
+        for group_start in range(0, len(years), group_size):
+            group_years = years[group_start:group_start + group_size]
+            mosaics_files.update(
+                self.create_annual_mosaics_group(ds_projection, first_ds, group_years, s3_bucket, mosaics_dir, copy_to_s3)
+            )
+
+        return mosaics_files
+
+    def create_annual_mosaics_group(self, ds_projection, first_ds, years, s3_bucket, mosaics_dir, copy_to_s3):
+        """
+        Create mosaics for the group of years reading each of the composites once.
+
+        Inputs:
+        =======
+        ds_projection: EPSG projection for the current mosaics.
+        first_ds: xarray.Dataset object that represents any (first) composite dataset.
+        years: List of datetime objects for the mosaics to create.
+        s3_bucket: AWS S3 bucket to place result mosaics files in.
+        mosaics_dir: AWS S3 directory to place mosaics in.
+        copy_to_s3: Boolean flag to indicate if generated mosaics files should be copied
+            to the target S3 bucket.
+        """
+        logging.info(f'Creating annual mosaics for {ITSLiveAnnualMosaics.REGION} region for {[each.year for each in years]} years')
+
+        ice_vars = [ShapeFile.LANDICE, ShapeFile.FLOATINGICE]
+        mosaic_shape = (len(self.y_coords), len(self.x_coords))
+
+        # Mosaic values per year and per data variable
+        year_data = {each.year: {} for each in years}
+        ice_data = {}
+
+        # Coverage of each year by the composites: ice masks are taken only from
+        # composites that have data for the year
+        year_coverage = {each.year: np.zeros(mosaic_shape, dtype=bool) for each in years}
+
+        # Attributes of each data variable as read from the first composite providing it
+        var_attrs = {}
+
+        for each_file, each_ds in self.raw_ds.items():
+            year_indices = {}
+            for each_year in years:
+                if each_year.year in each_ds.time:
+                    year_indices[each_year.year] = each_ds.time.index(each_year.year)
+
+                else:
+                    logging.warning(f'{each_file} does not have data for {each_year.year} year, skipping.')
+
+            if len(year_indices) == 0:
+                continue
+
+            composite_index = self.grid_index(each_ds.x, each_ds.y)
+            composite_years = list(year_indices.keys())
+            time_indices = list(year_indices.values())
+
+            for each_year in composite_years:
+                year_coverage[each_year][composite_index] = True
+
+            # Workaround for non-masked X and Y components of V0 and V_AMP data variables:
+            # get mask for all valid magnitude values, then mask out corresponding
+            # X and Y components
+            v_values = each_ds.s3.ds[DataVars.V][time_indices].values
+            v_valid_mask = ~np.isnan(v_values)
+
+            for each_var in ITSLiveAnnualMosaics.ANNUAL_VARS:
+                # To support old composites
+                if each_var not in each_ds.s3.ds:
+                    logging.info(f'Skipping missing {each_var} from {each_file}')
+                    continue
+
+                if each_var not in var_attrs:
+                    var_attrs[each_var] = each_ds.s3.ds[each_var].attrs
+
+                if each_var in ice_vars:
+                    # Variable does not have year dimension
+                    if each_var not in ice_data:
+                        ice_data[each_var] = np.full(mosaic_shape, np.nan, dtype=np.float32)
+
+                    ice_data[each_var][composite_index] = each_ds.s3.ds[each_var].values
+                    continue
+
+                if each_var == DataVars.V:
+                    values = v_values
+
+                else:
+                    # Read all years of the group at once
+                    values = each_ds.s3.ds[each_var][time_indices].values
+
+                    if each_var in [DataVars.VX, DataVars.VY]:
+                        values = np.where(v_valid_mask, values, np.nan)
+
+                for index, each_year in enumerate(composite_years):
+                    if each_var not in year_data[each_year]:
+                        year_data[each_year][each_var] = np.full(mosaic_shape, np.nan, dtype=np.float32)
+
+                    year_data[each_year][each_var][composite_index] = values[index]
+
+        mosaics_files = {}
+        dims = (Coords.Y, Coords.X)
+
+        for each_year in years:
+            mosaics_filename = self.annual_mosaics_filename(ds_projection, each_year, copy_to_s3)
+            ds = self.init_annual_mosaic(ds_projection, first_ds, each_year)
+
+            for each_var in ITSLiveAnnualMosaics.ANNUAL_VARS:
+                if each_var in ice_vars:
+                    if each_var not in ice_data or not year_coverage[each_year.year].any():
+                        continue
+
+                    values = np.where(year_coverage[each_year.year], ice_data[each_var], np.nan)
+
+                elif each_var in year_data[each_year.year]:
+                    values = year_data[each_year.year].pop(each_var)
+
+                else:
+                    continue
+
+                ds[each_var] = xr.DataArray(data=values, coords=[self.y_coords, self.x_coords], dims=dims, attrs=var_attrs[each_var])
+                ds[each_var].attrs[DataVars.GRID_MAPPING] = DataVars.MAPPING
+
+            self.write_annual_mosaic(ds, first_ds, s3_bucket, mosaics_dir, mosaics_filename, copy_to_s3)
+            mosaics_files[each_year.year] = mosaics_filename
+
+        return mosaics_files
+
+    def grid_index(self, x, y):
+        """
+        Index of the mosaic [y, x] grid cells that correspond to provided X and Y
+        coordinates.
+
+        Offsets into the mosaic grid are computed from the first X and Y coordinates
+        of the mosaic and ITSLiveAnnualMosaics.CELL_SIZE: all composites are on the
+        same regular grid, so there is no need for the label based lookup of
+        the coordinates (as xarray's .loc does on each assignment). Coordinates
+        are validated to be aligned with the mosaic grid.
+
+        Inputs:
+        =======
+        x: X coordinates of the data to place into the mosaic.
+        y: Y coordinates of the data to place into the mosaic.
+
+        Returns:
+        ========
+        Tuple of slices if coordinates are contiguous (to write values straight
+        into the mosaic array), or open mesh of indices otherwise.
+        """
+        # Y coordinates of the mosaic are in descending order
+        y_index = ITSLiveAnnualMosaics.axis_index(y, self.y_coords, -ITSLiveAnnualMosaics.CELL_SIZE, Coords.Y)
+        x_index = ITSLiveAnnualMosaics.axis_index(x, self.x_coords, ITSLiveAnnualMosaics.CELL_SIZE, Coords.X)
+
+        if isinstance(y_index, slice) and isinstance(x_index, slice):
+            return (y_index, x_index)
+
+        return np.ix_(np.arange(len(self.y_coords))[y_index], np.arange(len(self.x_coords))[x_index])
+
+    @staticmethod
+    def axis_index(values, coords, cell_size, dim_name):
+        """
+        Index of the mosaic grid cells along one of the dimensions.
+
+        Inputs:
+        =======
+        values: Coordinates to get index for.
+        coords: Coordinates of the mosaic.
+        cell_size: Signed size of the grid cell along the dimension.
+        dim_name: Name of the dimension (for error reporting).
+        """
+        offsets = (np.asarray(values) - coords[0]) / cell_size
+        index = np.rint(offsets).astype(int)
+
+        if np.any(np.abs(offsets - index) > ITSLiveAnnualMosaics.GRID_TOLERANCE):
+            raise RuntimeError(f'{dim_name} coordinates {values} are not aligned with {cell_size} grid of the mosaic starting at {coords[0]}')
+
+        if index.min() < 0 or index.max() >= len(coords):
+            raise RuntimeError(f'{dim_name} coordinates [{values[0]}, {values[-1]}] are out of the mosaic range [{coords[0]}, {coords[-1]}]')
+
+        if np.all(np.diff(index) == 1):
+            return slice(index[0], index[-1] + 1)
+
+        return index
+
+    def mosaic_data_array(self, dtype, attrs):
+        """
+        Create [y, x] data variable of the mosaic filled with NaN's to place
+        composites values into.
+
+        Inputs:
+        =======
+        dtype: Data type of the composites values to place into the mosaic.
+        attrs: Attributes of the data variable.
+        """
+        return xr.DataArray(
+            data=np.full((len(self.y_coords), len(self.x_coords)), np.nan, dtype=np.result_type(dtype, np.float32)),
+            coords=[self.y_coords, self.x_coords],
+            dims=[Coords.Y, Coords.X],
+            attrs=attrs
+        )
+
+    @staticmethod
+    def place_merged(ds_var: xr.DataArray, merged: xr.DataArray, grid_index):
+        """
+        Place merged values of the mosaics into the data variable of the final mosaic.
+
+        Inputs:
+        =======
+        ds_var: Data variable of the final mosaic.
+        merged: Merged values of the mosaics.
+        grid_index: Index of the final mosaic cells that correspond to the merged values.
+        """
+        merged = merged.transpose(*ds_var.dims)
+        ds_values = ds_var.values
+
+        if CompDataVars.SENSORS in ds_var.dims:
+            for sensor_index, each_index in enumerate(ITSLiveAnnualMosaics.sensor_index(ds_var, merged[CompDataVars.SENSORS].values)):
+                ds_values[each_index][grid_index] = merged.values[sensor_index]
+
+        else:
+            ds_values[grid_index] = merged.values
+
+    @staticmethod
+    def sensor_index(ds_var: xr.DataArray, sensors):
+        """
+        Index of provided sensor groups along sensor dimension of the mosaic data variable.
+        """
+        mosaic_sensors = ds_var[CompDataVars.SENSORS].values.tolist()
+
+        return [mosaic_sensors.index(each) for each in sensors]
+
+    def annual_mosaics_filename(self, ds_projection, year_date, copy_to_s3):
+        """
+        Format filename for the annual mosaics of the year.
+
+        ds_projection: EPSG projection for the current mosaics.
+        year_date: Datetime object for the mosaic.
+        copy_to_s3: Boolean flag to indicate if generated mosaics files should be copied
+            to the target S3 bucket.
+        """
         # mosaics_filename = f'{FilenamePrefix.Mosaics}_{self.grid_size_str}m_{ITSLiveAnnualMosaics.REGION}_{year_date.year}_{ITSLiveAnnualMosaics.FILE_VERSION}.nc'
         mosaics_filename = annual_mosaics_filename_nc(self.grid_size_str, ITSLiveAnnualMosaics.REGION, year_date, ITSLiveAnnualMosaics.FILE_VERSION)
 
@@ -1958,12 +2837,17 @@ class ITSLiveAnnualMosaics:
             # create path based on EPSG code for the mosaic
             mosaics_filename = ITSLiveAnnualMosaics.epsg_mosaics_path(ds_projection, mosaics_filename)
 
-        if ITSLiveAnnualMosaics.USE_EXISTING_FILES and os.path.exists(mosaics_filename):
-            # Mosaic file exists, don't create it
-            logging.info(f'Using existing {mosaics_filename}')
+        return mosaics_filename
 
-            return mosaics_filename
+    def init_annual_mosaic(self, ds_projection, first_ds, year_date):
+        """
+        Create dataset to represent annual mosaic of the year: the dataset has
+        mosaic coordinates, global attributes and mapping data variable set.
 
+        ds_projection: EPSG projection for the current mosaics.
+        first_ds: xarray.Dataset object that represents any (first) composite dataset.
+        year_date: Datetime object for the mosaic.
+        """
         # Dataset to represent annual mosaic
         ds = xr.Dataset(
             coords={
@@ -2001,54 +2885,20 @@ class ITSLiveAnnualMosaics:
 
         ds[DataVars.MAPPING] = self.mapping
 
-        # Concatenate data for each data variable that has time (year value) dimension
-        for each_file, each_ds in self.raw_ds.items():
-            if year_date.year in each_ds.time:
-                # Composites have data for the year
-                year_index = each_ds.time.index(year_date.year)
-
-                # Workaround for non-masked X and Y components of V0 and V_AMP data variables:
-                # get mask for all valid magnitude values, then mask out corresponding
-                # X and Y components
-                v_valid_mask = ~np.isnan(each_ds.s3.ds[DataVars.V])
-
-                for each_var in ITSLiveAnnualMosaics.ANNUAL_VARS:
-                    # To support old composites
-                    if each_var not in each_ds.s3.ds:
-                        logging.info(f'Skipping missing {each_var} from {each_file}')
-                        continue
-
-                    if each_var not in ds:
-                        # Create data variable in output dataset
-                        if each_var == ShapeFile.LANDICE or each_var == ShapeFile.FLOATINGICE:
-                            # Variable does not have year dimension
-                            ds[each_var] = each_ds.s3.ds[each_var].load()
-
-                        else:
-                            if each_var in [DataVars.VX, DataVars.VY]:
-                                ds[each_var] = each_ds.s3.ds[each_var][year_index].where(v_valid_mask[year_index], np.nan)
-
-                            else:
-                                ds[each_var] = each_ds.s3.ds[each_var][year_index].load()
-
-                        ds[each_var].attrs[DataVars.GRID_MAPPING] = DataVars.MAPPING
-
-                    else:
-                        # Update data variable in output dataset
-                        if each_var == ShapeFile.LANDICE or each_var == ShapeFile.FLOATINGICE:
-                            # Variable does not have year dimension
-                            ds[each_var].loc[dict(x=each_ds.x, y=each_ds.y)] = each_ds.s3.ds[each_var].load()
-
-                        else:
-                            if each_var in [DataVars.VX, DataVars.VY]:
-                                ds[each_var].loc[dict(x=each_ds.x, y=each_ds.y)] = each_ds.s3.ds[each_var][year_index].where(v_valid_mask[year_index], np.nan)
-
-                            else:
-                                ds[each_var].loc[dict(x=each_ds.x, y=each_ds.y)] = each_ds.s3.ds[each_var][year_index].load()
+        return ds
 
-            else:
-                logging.warning(f'{each_file} does not have data for {year_date.year} year, skipping.')
+    def write_annual_mosaic(self, ds, first_ds, s3_bucket, mosaics_dir, mosaics_filename, copy_to_s3):
+        """
+        Write annual mosaic to NetCDF format file.
 
+        ds: xarray.Dataset object that represents annual mosaic.
+        first_ds: xarray.Dataset object that represents any (first) composite dataset.
+        s3_bucket: AWS S3 bucket to place result mosaics file in.
+        mosaics_dir: AWS S3 directory to place mosaics in.
+        mosaics_filename: Filename of the mosaic.
+        copy_to_s3: Boolean flag to indicate if generated mosaics file should be copied
+            to the target S3 bucket.
+        """
         if copy_to_s3:
             ds.attrs['s3'] = os.path.join(s3_bucket, mosaics_dir, mosaics_filename)
             ds.attrs['url'] = ds.attrs['s3'].replace(BatchVars.AWS_PREFIX, BatchVars.HTTP_PREFIX)
@@ -2063,8 +2913,6 @@ class ITSLiveAnnualMosaics:
         # Write mosaic to NetCDF format file
         ITSLiveAnnualMosaics.annual_mosaic_to_netcdf(ds, s3_bucket, mosaics_dir, mosaics_filename, copy_to_s3)
 
-        return mosaics_filename
-
     @staticmethod
     def epsg_mosaics_path(ds_projection, mosaics_filename):
         """
@@ -2361,8 +3209,11 @@ class ITSLiveAnnualMosaics:
             # Workaround for non-masked X and Y components of V0 and V_AMP, V_AMP_ERROR data variables:
             # get mask for all valid magnitude values, then mask out corresponding
             # X and Y components
-            v0_valid_mask = ~np.isnan(each_ds.s3.ds[CompDataVars.V0])
-            v_amp_valid_mask = ~np.isnan(each_ds.s3.ds[CompDataVars.V_AMP])
+            v0_valid_mask = ~np.isnan(each_ds.s3.ds[CompDataVars.V0].values)
+            v_amp_valid_mask = ~np.isnan(each_ds.s3.ds[CompDataVars.V_AMP].values)
+
+            # Mosaic cells covered by the composite
+            grid_index = self.grid_index(each_ds.x, each_ds.y)
 
             for each_var in ITSLiveAnnualMosaics.SUMMARY_VARS:
                 # logging.info(f'Collecting {each_var} from {each_file}')
@@ -2378,6 +3229,8 @@ class ITSLiveAnnualMosaics:
                 if rename_zero_based_data_vars:
                     ds_var = each_var.replace('0', '')
 
+                values = each_ds.s3.ds[each_var].values
+
                 if ds_var not in ds:
                     # Create data variable in result dataset
                     # This applies only to 2d variables as 3d variables need to
@@ -2385,7 +3238,7 @@ class ITSLiveAnnualMosaics:
                     logging.info(f'Adding {each_var}')
 
                     if each_var in [CompDataVars.VX0, CompDataVars.VY0]:
-                        ds[ds_var] = each_ds.s3.ds[each_var].where(v0_valid_mask, np.nan)
+                        values = np.where(v0_valid_mask, values, np.nan)
 
                     elif each_var in [
                         CompDataVars.VX_AMP,
@@ -2394,10 +3247,9 @@ class ITSLiveAnnualMosaics:
                         CompDataVars.VY_AMP_ERROR,
                         CompDataVars.V_AMP_ERROR
                     ]:
-                        ds[ds_var] = each_ds.s3.ds[each_var].where(v_amp_valid_mask, np.nan)
+                        values = np.where(v_amp_valid_mask, values, np.nan)
 
-                    else:
-                        ds[ds_var] = each_ds.s3.ds[each_var].load()
+                    ds[ds_var] = self.mosaic_data_array(values.dtype, each_ds.s3.ds[each_var].attrs)
 
                     # Set mapping attribute
                     ds[ds_var].attrs[DataVars.GRID_MAPPING] = DataVars.MAPPING
@@ -2405,22 +3257,23 @@ class ITSLiveAnnualMosaics:
                 else:
                     logging.info(f'Updating {each_var}')
 
-                    _coords = dict(x=each_ds.x, y=each_ds.y)
-                    if each_ds.s3.ds[each_var].ndim == 3:
-                        # If it has a sensor dimension, then data variable is already in
-                        # dataset and need to specify sensor to avoid an exception
-                        # if number of sensors is different in loaded dataset
-                        _coords = dict(x=each_ds.x, y=each_ds.y, sensor=each_ds.sensor)
-
-                    # Update data variable in result dataset
                     if each_var in [CompDataVars.VX0, CompDataVars.VY0]:
-                        ds[ds_var].loc[_coords] = each_ds.s3.ds[each_var].where(v0_valid_mask, np.nan)
+                        values = np.where(v0_valid_mask, values, np.nan)
 
                     elif each_var in [CompDataVars.VX_AMP, CompDataVars.VY_AMP]:
-                        ds[ds_var].loc[_coords] = each_ds.s3.ds[each_var].where(v_amp_valid_mask, np.nan)
+                        values = np.where(v_amp_valid_mask, values, np.nan)
 
-                    else:
-                        ds[ds_var].loc[_coords] = each_ds.s3.ds[each_var].load()
+                # Update data variable in result dataset
+                if values.ndim == 3:
+                    # If it has a sensor dimension, then data variable is already in
+                    # dataset and need to place values per sensor as number of
+                    # sensors can be different in loaded dataset
+                    ds_values = ds[ds_var].values
+                    for sensor_index, each_index in enumerate(ITSLiveAnnualMosaics.sensor_index(ds[ds_var], each_ds.sensor)):
+                        ds_values[each_index][grid_index] = values[sensor_index]
+
+                else:
+                    ds[ds_var].values[grid_index] = values
 
                 # Replace zeros in attributes:
                 if rename_zero_based_data_vars:
@@ -2432,13 +3285,13 @@ class ITSLiveAnnualMosaics:
             # index += 1
 
             # Collect "dt_max" and "sensor_flag" values per each sensor group: self.sensor_coords
-            for each_group in self.sensor_coords:
+            for group_index, each_group in enumerate(self.sensor_coords):
                 if each_group in each_ds.sensor:
                     sensor_index = each_ds.sensor.index(each_group)
 
                     for each_var in [CompDataVars.MAX_DT, CompDataVars.SENSOR_INCLUDE]:
                         # logging.info(f'Update {each_var} for {each_group} by {each_file}')
-                        ds[each_var].loc[dict(x=each_ds.x, y=each_ds.y, sensor=each_group)] = each_ds.s3.ds[each_var][sensor_index].load()
+                        ds[each_var].values[group_index][grid_index] = each_ds.s3.ds[each_var][sensor_index].values
 
             # Update attributes
             for each_attr in self.attrs.keys():
@@ -2800,6 +3653,24 @@ def parse_args():
         default=None,
         help='Year to merge intermediate mosaics for [%(default)s] (lazy parallelization)'
     )
+    parser.add_argument(
+        '--numEPSGProcesses',
+        type=int,
+        default=ITSLiveAnnualMosaics.NUM_EPSG_PROCESSES,
+        help='Number of processes to create intermediate mosaics for multiple EPSG codes in parallel, limited by number of CPUs per --numReprojectProcesses [%(default)d].'
+    )
+    parser.add_argument(
+        '--numReprojectProcesses',
+        type=int,
+        default=ITSLiveAnnualMosaics.NUM_REPROJECT_PROCESSES,
+        help='Number of re-projection subprocesses to run concurrently per EPSG code [%(default)d].'
+    )
+    parser.add_argument(
+        '--memoryBudgetGB',
+        type=float,
+        default=ITSLiveAnnualMosaics.MEMORY_BUDGET_GB,
+        help='Memory budget in GB for intermediate mosaics of EPSG codes created in parallel, 0 for no limit [%(default)s].'
+    )
     parser.add_argument(
         '-g', '--gridCellSize',
         type=int,
@@ -2831,6 +3702,18 @@ def parse_args():
         default=False,
         help='Use existing mosaics files if they exist [%(default)s]. This is to pick up from where previous processing stopped.'
     )
+    parser.add_argument(
+        '--single_pass_annual_mosaics',
+        action='store_true',
+        default=False,
+        help='Create all annual mosaics in one pass over the composites [%(default)s].'
+    )
+    parser.add_argument(
+        '--annual_mosaics_memory_gb',
+        type=float,
+        default=ITSLiveAnnualMosaics.ANNUAL_MOSAICS_MEMORY_GB,
+        help='Memory budget in GB for annual mosaics created in one pass over the composites [%(default)s].'
+    )
 
     # One of --processCubes or --processCubesFile options is allowed for the datacube names
     group = parser.add_mutually_exclusive_group()
@@ -2859,8 +3742,13 @@ def parse_args():
     ITSLiveAnnualMosaics.NC_ENGINE = args.engine
     ITSLiveAnnualMosaics.TRANSFORMATION_MATRIX_FILE = args.transformation_matrix_file
     ITSLiveAnnualMosaics.USE_EXISTING_FILES = args.use_existing_files
+    ITSLiveAnnualMosaics.SINGLE_PASS_ANNUAL_MOSAICS = args.single_pass_annual_mosaics
+    ITSLiveAnnualMosaics.ANNUAL_MOSAICS_MEMORY_GB = args.annual_mosaics_memory_gb
     ITSLiveAnnualMosaics.CREATE_EPSG_ONLY = args.createEPSG
     ITSLiveAnnualMosaics.MERGE_YEAR_ONLY = args.mergeYear
+    ITSLiveAnnualMosaics.NUM_EPSG_PROCESSES = args.numEPSGProcesses
+    ITSLiveAnnualMosaics.NUM_REPROJECT_PROCESSES = args.numReprojectProcesses
+    ITSLiveAnnualMosaics.MEMORY_BUDGET_GB = args.memoryBudgetGB
 
     epsg_codes = list(map(int, json.loads(args.epsgCode))) if args.epsgCode is not None else None
     if epsg_codes and len(epsg_codes):
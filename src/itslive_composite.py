@@ -9,11 +9,15 @@ Jet Propulsion Laboratory, California Institute of Technology, Pasadena, Califor
 March 21, 2022
 """
 import collections
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import dask
 from dask.diagnostics import ProgressBar
 import datetime
 from dateutil.parser import parse
 import gc
+import hashlib
+import io
+import itertools
 import json
 import logging
 import multiprocessing as mp
@@ -21,7 +25,9 @@ import numba as nb
 import numpy as np
 import os
 import pandas as pd
+import s3fs
 from scipy import ndimage
+import shutil
 import timeit
 from tqdm import tqdm
 import xarray as xr
@@ -35,6 +41,7 @@ from itscube_types import \
     BinaryFlag, \
     Output, \
     CubeOutput, \
+    FileExtension, \
     ShapeFile, \
     CompDataVars, \
     CompOutput, \
@@ -51,6 +58,11 @@ _enable_debug = False
 # Intercept date used for a weighted linear fit
 CENTER_DATE = datetime.datetime(2018, 1, 1)
 
+# Max number of values in stacked weighted design matrices to solve by one SVD
+# call within itslive_lsqfit_annual_batch(): SVD allocates the same size U
+# (2**22 float64 values is 32Mb)
+LSQ_SVD_MAX_SIZE = 2**22
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -75,6 +87,34 @@ def decimal_year(dt):
     return dt.year + year_part / year_length
 
 
+def decimal_years(dates):
+    """
+    Vectorized version of decimal_year(): convert array of datetime64 values
+    to decimal years.
+    """
+    # Use the same millisecond resolution as datetime.datetime objects
+    # the datacube dates used to be converted to
+    dates = np.asarray(dates).astype('datetime64[ms]')
+    years = dates.astype('datetime64[Y]')
+    year_start = years.astype('datetime64[ms]')
+
+    # Length of the year up to its last second as in decimal_year()
+    year_length = (years + 1).astype('datetime64[ms]') - year_start - np.timedelta64(1, 's')
+
+    return (years.astype(np.int64) + 1970) + (dates - year_start) / year_length
+
+
+def center_date_decimal_years(years, center_date):
+    """
+    Decimal years of the center_date month and day within each of the years
+    relative to the center_date decimal year.
+    """
+    month_start = (np.asarray(years) - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (center_date.month - 1)
+    dates = month_start.astype('datetime64[D]') + (center_date.day - 1)
+
+    return decimal_years(dates) - decimal_year(center_date)
+
+
 @nb.jit(nopython=True)
 def medianMadFunction(x):
     """
@@ -156,6 +196,37 @@ def create_projected_velocity(x_in, y_in, dt):
     return x0_in
 
 
+@nb.jit(nopython=True, parallel=True)
+def project_v_to_median_flow_kernel(vx, vy, dt, sensors_bits, exclude_sensors, vp):
+    """
+    Project velocity of each [y, x] point onto its median flow vector using
+    only layers of not excluded sensor groups.
+
+    Inputs:
+    =======
+    vx: x component of the velocity [y, x, t].
+    vy: y component of the velocity [y, x, t].
+    dt: Day separation vector.
+    sensors_bits: Bit of the sensor group for each layer.
+    exclude_sensors: Bitmask of sensor groups to exclude per each [y, x] point.
+    vp: Projected velocity to populate [y, x, t].
+    """
+    y_len, x_len, _ = vx.shape
+
+    for index in nb.prange(y_len * x_len):
+        j_index = index // x_len
+        i_index = index % x_len
+
+        include_mask = (sensors_bits & exclude_sensors[j_index, i_index]) == 0
+
+        point_vp = vp[j_index, i_index]
+        point_vp[include_mask] = create_projected_velocity(
+            vx[j_index, i_index][include_mask],
+            vy[j_index, i_index][include_mask],
+            dt[include_mask]
+        )
+
+
 @nb.jit(nopython=True)
 def cube_filter_iteration(vp, dt, mad_std_ratio):
     """
@@ -258,8 +329,7 @@ def cube_filter_iteration(vp, dt, mad_std_ratio):
     return (maxdt, invalid)
 
 
-# Can't compile with numba as exclude_sensor_groups are of Python object type
-# @nb.jit(nopython=True, parallel=True)
+@nb.jit(nopython=True, parallel=True)
 def cube_filter(vp, dt, mad_std_ratio, current_sensor_group, exclude_sensor_groups):
     """
     Filter data cube by dt (date separation) between the images for the sensor type.
@@ -269,9 +339,10 @@ def cube_filter(vp, dt, mad_std_ratio, current_sensor_group, exclude_sensor_grou
     vp:            Velocity projected to median flow unit vector.
     dt:            Day separation vector.
     mad_std_ratio: Scalar relation between MAD and STD.
-    current_sensor_group: Current sensor to filter by.
-    exclude_sensor_groups: List of sensors that should be excluded from the filter
-                           (per spatial cell).
+    current_sensor_group: Bit of the current sensor group to filter by
+                          (see MissionSensor.BITS).
+    exclude_sensor_groups: Bitmask of sensor groups that should be excluded
+                           from the filter (per spatial cell).
 
     Return:
     =======
@@ -281,33 +352,30 @@ def cube_filter(vp, dt, mad_std_ratio, current_sensor_group, exclude_sensor_grou
     """
     # Initialize output
     y_len, x_len, t_len = vp.shape
-    dims = [y_len, x_len]
-    maxdt = np.full(dims, np.nan)
-    sensor_include = np.ones(dims)
+    maxdt = np.full((y_len, x_len), np.nan)
+    sensor_include = np.ones((y_len, x_len))
 
-    # dims = (y_len, x_len, np.sum(sensor_mask))
-    invalid = np.zeros_like(vp, dtype=np.bool_)
+    invalid = np.zeros(vp.shape, dtype=np.bool_)
 
     # Loop through all spatial points
-    for j_index in range(0, y_len):
-        for i_index in range(0, x_len):
-            # Check if filter should be skipped due to exclude_sensor_groups
-            if len(exclude_sensor_groups[j_index, i_index]) and \
-               current_sensor_group in exclude_sensor_groups[j_index, i_index]:
-                # logging.info(f'DEBUG: exclude_sensors: {exclude_sensor_groups[j_index, i_index]}')
-                # logging.info(f'j={j_index} i={i_index}: skipping {current_sensor_group} due to exclude_groups={exclude_sensor_groups[j_index, i_index]}')
-                invalid[j_index, i_index, :] = True
-                sensor_include[j_index, i_index] = 0
-                continue
-
-            maxdt[j_index, i_index], invalid[j_index, i_index, :] = cube_filter_iteration(
-                vp[j_index, i_index],
-                dt,
-                mad_std_ratio
-            )
-            # logging.info(f'DEBUG: j={j_index} i={i_index} after cube_filter: maxdt={maxdt[j_index, i_index]}')
+    for index in nb.prange(y_len * x_len):
+        j_index = index // x_len
+        i_index = index % x_len
+
+        # Check if filter should be skipped due to exclude_sensor_groups
+        if exclude_sensor_groups[j_index, i_index] & current_sensor_group:
+            invalid[j_index, i_index, :] = True
+            sensor_include[j_index, i_index] = 0
+            continue
+
+        point_maxdt, point_invalid = cube_filter_iteration(
+            vp[j_index, i_index],
+            dt,
+            mad_std_ratio
+        )
+        maxdt[j_index, i_index] = point_maxdt
+        invalid[j_index, i_index, :] = point_invalid
 
-    # logging.info(f'DEBUG: Excluded sensors: {sensor_include}')
     return invalid, maxdt, sensor_include
 
 
@@ -323,39 +391,102 @@ def weighted_std(values, weights):
     return np.sqrt(variance)
 
 
+# Compact representation of the M matrix of percentages of years corresponding
+# to each displacement measurement (layer): each layer overlaps with "span"
+# consecutive years starting with "start_index" year, all years but first and
+# last are covered by the layer completely. "weights" store fractions of the
+# first and last years covered by the layer.
+CompactM = collections.namedtuple("CompactM", ['start_index', 'span', 'weights'])
+
+
 @nb.jit(nopython=True)
-def create_M(y1, start_year, stop_year, dyr):
+def create_M_compact(y1, start_year, stop_year, dyr):
     """
-    Make matrix of percentages of years corresponding to each displacement measurement
+    Make compact representation of the matrix of percentages of years
+    corresponding to each displacement measurement: index of the first year,
+    number of years and weights of the first and last years per measurement.
     """
-    M = np.zeros((len(dyr), len(y1)))
+    start_index = (np.floor(start_year) - y1[0]).astype(np.int16)
+    span = (np.floor(stop_year) - y1[0] + 1).astype(np.int16) - start_index
+
+    weights = np.empty((len(dyr), 2), dtype=np.float32)
+
+    for i in range(len(dyr)):
+        if span[i] == 1:
+            # Within year
+            weights[i, 0] = dyr[i]
+            weights[i, 1] = dyr[i]
+
+        else:
+            # Started during the first year and ends during the last year
+            weights[i, 0] = y1[start_index[i]] + 1 - start_year[i]
+            weights[i, 1] = stop_year[i] - y1[start_index[i] + span[i] - 1]
 
-    # Loop through each year:
-    # for k in range(len(y1)):
-    for k in nb.prange(len(y1)):
-        # Set all measurements that begin before the first day of the year and end after the last
-        # day of the year to 1:
-        y1_value = y1[k]
-        y1_next_value = y1_value + 1
+    return (start_index, span, weights)
 
-        ind = np.logical_and(start_year <= y1_value, stop_year >= y1_next_value)
-        M[ind, k] = 1
 
-        # Within year:
-        ind = np.logical_and(start_year >= y1_value, stop_year < y1_next_value)
-        M[ind, k] = dyr[ind]
+@nb.jit(nopython=True)
+def expand_M(start_index, span, weights, first_year_index, num_years):
+    """
+    Build M matrix (see CompactM) for the measurements of compact representation
+    and num_years years starting with first_year_index year.
+    """
+    M = np.zeros((len(start_index), num_years))
 
-        # Started before the beginning of the year and ends during the year:
-        ind = np.logical_and(start_year < y1_value, np.logical_and(stop_year >= y1_value, stop_year < y1_next_value))
-        M[ind, k] = stop_year[ind] - y1_value
+    for i in range(len(start_index)):
+        first = start_index[i] - first_year_index
+        last = first + span[i] - 1
 
-        # Started during the year and ends the next year:
-        ind = np.logical_and(start_year >= y1_value, np.logical_and(start_year < y1_next_value, stop_year >= y1_next_value))
-        M[ind, k] = y1_next_value - start_year[ind]
+        for k in range(max(first, 0), min(last, num_years - 1) + 1):
+            if k == first:
+                M[i, k] = weights[i, 0]
+
+            elif k == last:
+                M[i, k] = weights[i, 1]
+
+            else:
+                M[i, k] = 1
 
     return M
 
 
+def compact_M_entries(start_index, span, weights):
+    """
+    Non-zero entries of M matrix out of its compact representation (see CompactM):
+    a tuple of layer index, year index and value per entry.
+    """
+    span = span.astype(np.int64)
+    layers = np.repeat(np.arange(len(span)), span)
+
+    # Index of each entry within the years covered by its layer
+    offsets = np.arange(len(layers)) - np.repeat(np.cumsum(span) - span, span)
+
+    values = np.ones(len(layers))
+    last = (offsets == span[layers] - 1)
+    values[last] = weights[layers[last], 1]
+    first = (offsets == 0)
+    values[first] = weights[layers[first], 0]
+
+    # Layer does not contribute to its last year if it stops at the beginning of the year
+    nonzero = values > 0
+
+    return (layers[nonzero], (start_index[layers] + offsets)[nonzero], values[nonzero])
+
+
+def compact_M_product(values, M_entries, num_years):
+    """
+    Product of [num_points, layers] values and M matrix given by its non-zero
+    entries (see compact_M_entries()): values of the layers are scatter-added to
+    the years the layers overlap with.
+    """
+    layers, years, weights = M_entries
+
+    product = np.zeros((values.shape[0], num_years))
+    np.add.at(product.T, years, (values[:, layers] * weights).T)
+
+    return product
+
+
 # Disable numba as its wrapper for lstsq does not support "rcond" input parameter for LSQ fit
 # @nb.jit(nopython=True)
 def itslive_lsqfit_iteration(var_name, start_year, stop_year, M, w_d, d_obs):
@@ -427,7 +558,7 @@ def itersect_years(all_years, select_years):
 
 
 @nb.jit(nopython=True)
-def init_lsq_fit1(v_input, v_err_input, start_dec_year, stop_dec_year, dec_dt, M_input):
+def init_lsq_fit1(v_input, v_err_input, start_dec_year, stop_dec_year, dec_dt):
     """
     Initialize variables for LSQ fit.
 
@@ -439,11 +570,11 @@ def init_lsq_fit1(v_input, v_err_input, start_dec_year, stop_dec_year, dec_dt, M
                     This flag has to be introduced in order to use numba compilation
                     otherwise numba-compiled code fails when using empty mask (pure
                     Python code does not).
-    start_year, stop_year, v_in, v_err_in, dyr, totalnum, M_in: Filtered by data validity mask
+    start_year, stop_year, v_in, v_err_in, dyr, totalnum: Filtered by data validity mask
                     and sorted by mid_date all input data variables.
+    layers_in: Indices of filtered and sorted layers into input data variables.
     """
     # start_time = timeit.default_timer()
-    # logging.info(f"Start init of itslive_lsqfit_annual: M_input.shape={M_input.shape}")
 
     # Ensure we're starting with finite data
     isf_mask = np.isfinite(v_input) & np.isfinite(v_err_input)
@@ -455,7 +586,7 @@ def init_lsq_fit1(v_input, v_err_input, start_dec_year, stop_dec_year, dec_dt, M
         # Can't use input variables as they are read-only which makes numba unhappy
         dy_out = np.zeros_like(start_dec_year)
 
-        return (results_valid, dy_out, dy_out, np.zeros_like(v_input), np.zeros_like(v_err_input), np.zeros_like(dec_dt), 0, np.zeros_like(M_input))
+        return (results_valid, dy_out, dy_out, np.zeros_like(v_input), np.zeros_like(v_err_input), np.zeros_like(dec_dt), 0, np.zeros(1, dtype=np.int64))
 
     start_year = start_dec_year[isf_mask]
     stop_year = stop_dec_year[isf_mask]
@@ -464,7 +595,7 @@ def init_lsq_fit1(v_input, v_err_input, start_dec_year, stop_dec_year, dec_dt, M
 
     v_in = v_input[isf_mask]
     v_err_in = v_err_input[isf_mask]
-    M_in = M_input[isf_mask]
+    layers_in = np.flatnonzero(isf_mask)
 
     totalnum = len(start_year)
 
@@ -479,13 +610,13 @@ def init_lsq_fit1(v_input, v_err_input, start_dec_year, stop_dec_year, dec_dt, M
 
     v_in = v_in[sort_indices]
     v_err_in = v_err_in[sort_indices]
-    M_in = M_in[sort_indices]
+    layers_in = layers_in[sort_indices]
 
-    return (results_valid, start_year, stop_year, v_in, v_err_in, dyr, totalnum, M_in)
+    return (results_valid, start_year, stop_year, v_in, v_err_in, dyr, totalnum, layers_in)
 
 # FOR_DEBUGGING_ONLY: _enable_debug = True: logging is not working with numba
 @nb.jit(nopython=True)
-def init_lsq_fit2(v_median, v_input, v_err_input, start_dec_year, stop_dec_year, dec_dt, all_years, M_input, mad_thresh, mad_std_ratio, sigma):
+def init_lsq_fit2(v_median, v_input, v_err_input, start_dec_year, stop_dec_year, dec_dt, all_years, layers_input, M_start_index, M_span, M_weights, mad_thresh, mad_std_ratio, sigma):
     """
     Initialize variables for LSQ fit.
 
@@ -499,6 +630,9 @@ def init_lsq_fit2(v_median, v_input, v_err_input, start_dec_year, stop_dec_year,
                     Python code does not).
     start_year, stop_year, v_in, dyr, w_v, w_d, d_obs, y1, M_in: Filtered by data
                     validity mask and pre-processed for LSQ fit input data variables.
+                    M_in is built for the filtered layers (layers_input) only
+                    out of compact representation of M matrix for all layers
+                    (M_start_index, M_span, M_weights).
     """
     _num_valid_points = 30
 
@@ -535,7 +669,7 @@ def init_lsq_fit2(v_median, v_input, v_err_input, start_dec_year, stop_dec_year,
         v_err_out = np.zeros_like(v_err_input)
         dy_out = np.zeros_like(start_dec_year)
 
-        return (results_valid, dy_out, dy_out, v_out, v_err_out, np.zeros_like(dec_dt), v_err_out, v_err_out.astype(np.float64), v_out, np.arange(1, 2), np.zeros_like(M_input))
+        return (results_valid, dy_out, dy_out, v_out, v_err_out, np.zeros_like(dec_dt), v_err_out, v_err_out.astype(np.float64), v_out, np.arange(1, 2), np.zeros((1, 1)))
 
     # remove ouliers from v_in, v_error_in, start_dec_year, stop_dec_year
     start_year = start_dec_year[non_outlier_mask]
@@ -543,7 +677,7 @@ def init_lsq_fit2(v_median, v_input, v_err_input, start_dec_year, stop_dec_year,
     dyr = dec_dt[non_outlier_mask]
     v_in = v_input[non_outlier_mask]
     v_err_in = v_err_input[non_outlier_mask]
-    M_in = M_input[non_outlier_mask]
+    layers_in = layers_input[non_outlier_mask]
 
     # Weights for velocities
     w_v = 1/(v_err_in**2)
@@ -565,9 +699,15 @@ def init_lsq_fit2(v_median, v_input, v_err_input, start_dec_year, stop_dec_year,
     y_max = int(np.floor(stop_year.max())) + 1
     y1 = np.arange(y_min, y_max)
 
-    # Reduce M matrix to the years considered for the spacial point
-    year_indices = np.searchsorted(all_years, y1)
-    M_in = M_in[:, year_indices]
+    # Build M matrix for the years considered for the spacial point
+    first_year_index = np.searchsorted(all_years, y_min)
+    M_in = expand_M(
+        M_start_index[layers_in],
+        M_span[layers_in],
+        M_weights[layers_in],
+        first_year_index,
+        len(y1)
+    )
 
     return (results_valid, start_year, stop_year, v_in, v_err_in, dyr, w_v, w_d, d_obs, y1, M_in)
 
@@ -629,6 +769,7 @@ def itslive_lsqfit_annual(
     Inputs:
     =======
     TODO: ...
+    M_input: Compact representation of M matrix for all layers (see CompactM).
     v0_years: List of years to filter data by for calculations of climatological data
     """
     _two_pi = np.pi * 2
@@ -642,8 +783,8 @@ def itslive_lsqfit_annual(
 
     results_valid = True
 
-    results_valid, start_year_1, stop_year_1, v_1, v_err_1, dyr_1, totalnum, M_1 = init_lsq_fit1(
-        v_input, v_err_input, start_dec_year, stop_dec_year, dec_dt, M_input
+    results_valid, start_year_1, stop_year_1, v_1, v_err_1, dyr_1, totalnum, layers_1 = init_lsq_fit1(
+        v_input, v_err_input, start_dec_year, stop_dec_year, dec_dt
     )
 
     empty_results = []
@@ -683,7 +824,8 @@ def itslive_lsqfit_annual(
     while (lsq_fit_converged is False) and (number_of_attempts < max_number_attempts):
         try:
             results_valid, start_year, stop_year, v, v_err, dyr, w_v, w_d, d_obs, y1, M = init_lsq_fit2(
-                v_median, v_1, v_err_1, start_year_1, stop_year_1, dyr_1, all_years, M_1, _mad_thresh, mad_std_ratio, sigma
+                v_median, v_1, v_err_1, start_year_1, stop_year_1, dyr_1, all_years, layers_1,
+                M_input.start_index, M_input.span, M_input.weights, _mad_thresh, mad_std_ratio, sigma
             )
 
             if not results_valid:
@@ -802,9 +944,7 @@ def itslive_lsqfit_annual(
 
     if v0_ind.size != 0:
         # logging.info(f'DEBUG: LSQ fit error: {error}')
-        yr = np.array([decimal_year(datetime.datetime(each, center_date.month, center_date.day)) for each in y1[v0_ind]])
-        yr0 = decimal_year(center_date)
-        yr = yr - yr0
+        yr = center_date_decimal_years(y1[v0_ind], center_date)
 
         offset, slope, se = weighted_linear_fit(yr, mean[ind][v0_ind], error[ind][v0_ind])
 
@@ -929,6 +1069,278 @@ def itslive_lsqfit_annual(
     return (results_valid, [A, amp_error, ph, offset, slope, se, count_image_pairs], global_i, global_j)
 
 
+def itslive_lsqfit_annual_batch(
+    v_input,
+    v_err_input,
+    start_dec_year,
+    stop_dec_year,
+    dec_dt,
+    all_years,
+    M_input,
+    mad_std_ratio,
+    v0_years,
+    center_date
+):
+    """
+    Batched version of itslive_lsqfit_annual(): computes the same annual and
+    climatology fits for a set of spacial points at once.
+
+    Weighted least-squares problems of all points are solved together over
+    the common design matrix of the datacube: rows that are excluded for the
+    point (invalid values or outliers) get zero weight, and columns of the years
+    with no data for the point are all zeros. Stacked weighted design matrices
+    are solved by SVD, and singular values are cut off as np.linalg.lstsq()
+    does for the design matrix of the point (its rows and columns with data):
+    rank-deficient systems get the same minimum norm solution as
+    itslive_lsqfit_annual() gets. np.linalg.LinAlgError is raised if SVD does
+    not converge for any of the points.
+
+    Inputs:
+    =======
+    v_input: Velocity values for the points [num_points, mid_date].
+    v_err_input: Velocity errors for the points [num_points, mid_date].
+    start_dec_year, stop_dec_year, dec_dt, all_years, M_input, mad_std_ratio,
+    v0_years, center_date: See itslive_lsqfit_annual().
+
+    Return: a tuple of
+    results_valid: Flag if results are valid per point [num_points].
+    results: [A, amp_error, ph, offset, slope, se, count_image_pairs] per point
+        [num_points, 7].
+    mean, error, count: Annual mean, error and count per point and year
+        [num_points, years]: NaN for years with no data.
+    """
+    _two_pi = np.pi * 2
+
+    # Filter parameters for lsq fit for outlier rejections
+    _mad_thresh = 6
+
+    # Apply MAD filter to input v
+    _mad_kernel_size = 15
+
+    # Minimum number of non-outlier points to do the fit
+    _num_valid_points = 30
+
+    # Outlier rejection sigma: itslive_lsqfit_annual() retries with larger
+    # sigma if solver fails
+    sigma = 2.0
+
+    num_points = v_input.shape[0]
+    num_years = len(all_years)
+
+    # Sort data based on the mid_date
+    mid_date = start_dec_year + (stop_dec_year - start_dec_year)/2.0
+    sort_indices = np.argsort(mid_date, kind='stable')
+
+    start_year = start_dec_year[sort_indices]
+    stop_year = stop_dec_year[sort_indices]
+    dyr = dec_dt[sort_indices]
+    mid_date = mid_date[sort_indices]
+
+    # Non-zero entries of M matrix for the sorted layers
+    M_layers, M_years, M_values = compact_M_entries(
+        M_input.start_index[sort_indices],
+        M_input.span[sort_indices],
+        M_input.weights[sort_indices]
+    )
+    M_ones = (M_layers, M_years, np.ones_like(M_values))
+
+    v = v_input[:, sort_indices]
+    v_err = v_err_input[:, sort_indices]
+
+    # Ensure we're starting with finite data
+    isf_mask = np.isfinite(v) & np.isfinite(v_err)
+
+    # Remove outliers based on MAD filter for v: rows of valid data per point
+    rows = np.zeros_like(isf_mask)
+    results_valid = np.zeros(num_points, dtype=bool)
+
+    for each_point in range(num_points):
+        valid_index = np.flatnonzero(isf_mask[each_point])
+        if valid_index.size == 0:
+            continue
+
+        v_valid = v[each_point, valid_index]
+
+        # Apply 15-point moving median to v, subtract from v to get residual
+        v_residual = np.abs(v_valid - ndimage.median_filter(v_valid, _mad_kernel_size))
+
+        # Take median of residual, multiply median of residual * 1.4826 = sigma
+        v_sigma = np.median(v_residual)*mad_std_ratio
+
+        non_outlier_mask = ~(v_residual > (sigma * _mad_thresh * v_sigma))
+
+        # If less than _num_valid_points don't do the fit: not enough observations
+        if np.sum(non_outlier_mask) >= _num_valid_points:
+            results_valid[each_point] = True
+            rows[each_point, valid_index[non_outlier_mask]] = True
+
+    results = np.full((num_points, 7), np.nan)
+    mean = np.full((num_points, num_years), np.nan)
+    error = np.full((num_points, num_years), np.nan)
+    count = np.full((num_points, num_years), np.nan)
+
+    if not np.any(results_valid):
+        return (results_valid, results, mean, error, count)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Weights for velocities
+        w_v = np.where(rows, 1/(v_err**2), 0)
+
+        # Weights (correspond to displacement error, not velocity error)
+        w_d = np.where(rows, 1/(v_err*dyr), 0)
+
+        # Observed displacement in meters
+        d_obs = np.where(rows, v*dyr, 0)
+
+    # Displacement Vandermonde matrix: sinusoid terms
+    D_sin = np.stack(
+        ((np.cos(_two_pi*start_year) - np.cos(_two_pi*stop_year))/_two_pi,
+         (np.sin(_two_pi*stop_year) - np.sin(_two_pi*start_year))/_two_pi),
+        axis=-1
+    )
+
+    def _lsq_fit(fit_rows, fit_hasdata, weights, displacement):
+        """
+        Solve weighted LSQ fit for the points: returns coefficients of sinusoid
+        [num_points, 2], annual means [num_points, years] (zero for the years
+        with no data) and modeled displacements [num_points, layers] per point.
+
+        fit_rows: Rows of the design matrix with data per point.
+        fit_hasdata: Years with data per point.
+        weights, displacement: Weights and observed displacements per point
+            (zero for the rows with no data).
+        """
+        # Design matrix is built only for the layers and the years with data
+        # for any of the points: sinusoid terms and a different constant for
+        # each year (annual mean) set from M entries
+        fit_layers = np.flatnonzero(np.any(fit_rows, axis=0))
+        fit_years = np.flatnonzero(np.any(fit_hasdata, axis=0))
+
+        layer_index = np.full(len(start_year), -1)
+        layer_index[fit_layers] = np.arange(len(fit_layers))
+        year_index = np.full(num_years, -1)
+        year_index[fit_years] = np.arange(len(fit_years))
+
+        D_rows = layer_index[M_layers]
+        D_columns = year_index[M_years]
+        in_fit = (D_rows >= 0) & (D_columns >= 0)
+
+        D = np.zeros((len(fit_layers), 2 + len(fit_years)))
+        D[:, :2] = D_sin[fit_layers]
+        D[D_rows[in_fit], 2 + D_columns[in_fit]] = M_values[in_fit]
+
+        weights = weights[:, fit_layers]
+        weighted_displacement = weights * displacement[:, fit_layers]
+
+        # Singular values cutoff of np.linalg.lstsq(rcond=None) for the design
+        # matrix of the point: columns are sinusoid terms and years with data
+        num_rows = fit_rows.sum(axis=1)
+        num_columns = 2 + fit_hasdata.sum(axis=1)
+
+        # Solve for coefficients of each column in the Vandermonde: stacked
+        # weighted design matrices are limited to LSQ_SVD_MAX_SIZE values
+        p = np.zeros((len(weights), D.shape[1]))
+        svd_points = max(1, LSQ_SVD_MAX_SIZE // D.size)
+
+        for start in range(0, len(weights), svd_points):
+            batch = slice(start, start + svd_points)
+
+            U, s, Vt = np.linalg.svd(weights[batch, :, np.newaxis] * D, full_matrices=False)
+
+            cutoff = np.finfo(s.dtype).eps * np.maximum(num_rows[batch], num_columns[batch]) * s[:, 0]
+
+            s_inv = np.zeros_like(s)
+            nonzero = s > cutoff[:, np.newaxis]
+            s_inv[nonzero] = 1/s[nonzero]
+
+            p[batch] = np.einsum('pkj,pk->pj', Vt, s_inv * np.einsum('ptk,pt->pk', U, weighted_displacement[batch]))
+
+        annual = np.zeros(fit_hasdata.shape)
+        annual[:, fit_years] = p[:, 2:]
+
+        d_model = np.zeros(fit_rows.shape)
+        d_model[:, fit_layers] = p @ D.T
+
+        return p[:, :2], annual, d_model
+
+    # Years with data per point
+    hasdata = compact_M_product(rows, (M_layers, M_years, M_values), num_years) > 0
+
+    _, annual, _ = _lsq_fit(rows, hasdata, w_d, d_obs)
+
+    # Number of equivalent image pairs per year
+    N_int = compact_M_product(rows, M_ones, num_years)
+
+    with np.errstate(divide='ignore'):
+        v_int_err = 1/np.sqrt(compact_M_product(w_v, (M_layers, M_years, M_values), num_years))
+
+    mean = np.where(hasdata, annual, np.nan)
+    error = np.where(hasdata, v_int_err, np.nan)
+    count = np.where(hasdata, N_int, np.nan)
+
+    # Climatology: weighted linear fit to annual means of v0_years
+    v0_years_mask = np.isin(all_years, v0_years)
+    yr = center_date_decimal_years(all_years, center_date)
+
+    for each_point in np.flatnonzero(results_valid):
+        v0_ind = hasdata[each_point] & v0_years_mask
+
+        if np.any(v0_ind):
+            results[each_point, 3:6] = weighted_linear_fit(
+                yr[v0_ind],
+                mean[each_point, v0_ind],
+                error[each_point, v0_ind]
+            )
+
+    #  Reduce number of image pairs only to the provided range: v0_years[0] <= mid_date < v0_years[-1]+1
+    rows &= (mid_date >= v0_years[0]) & (mid_date < (v0_years[-1]+1))
+    w_d = np.where(rows, w_d, 0)
+
+    # Filter sum of each column
+    hasdata = compact_M_product(rows, (M_layers, M_years, M_values), num_years) > 0
+    fit_points = results_valid & np.any(hasdata, axis=1)
+
+    if np.any(fit_points):
+        p, _, d_model = _lsq_fit(rows[fit_points], hasdata[fit_points], w_d[fit_points], d_obs[fit_points])
+
+        w_d = w_d[fit_points]
+        hasdata = hasdata[fit_points]
+        d_resid = np.where(rows[fit_points], d_obs[fit_points] - d_model, 0)
+
+        results[fit_points, 6] = rows[fit_points].sum(axis=1)
+
+        # Amplitude of sinusoid from trig identity a*sin(t) + b*cos(t) = d*sin(t+phi), where d=hypot(a,b) and phi=atan2(b,a).
+        results[fit_points, 0] = np.hypot(p[:, 0], p[:, 1])
+
+        # phase in radians converted such that it reflects the day when value is maximized
+        ph_rad = np.arctan2(p[:, 1], p[:, 0])
+        results[fit_points, 2] = 365.25*((0.25 - ph_rad/_two_pi) % 1)
+
+        # A_err is the *velocity* (not displacement) error, which is the
+        # displacement error divided by the weighted mean dt: weighted std of
+        # residuals per year (rows with no data for the point have zero weight)
+        A_err = np.full(hasdata.shape, np.nan)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for k in np.flatnonzero(np.any(hasdata, axis=0)):
+                ind = M_layers[M_years == k]
+
+                _w_d_ind = w_d[:, ind]
+                _sum_w_d_ind = _w_d_ind.sum(axis=1)
+
+                d_resid_ind = d_resid[:, ind]
+                average = (_w_d_ind * d_resid_ind).sum(axis=1) / _sum_w_d_ind
+                variance = (_w_d_ind * (d_resid_ind - average[:, np.newaxis])**2).sum(axis=1) / _sum_w_d_ind
+
+                A_err[:, k] = np.sqrt(variance) / ((_w_d_ind*dyr[ind]).sum(axis=1) / _sum_w_d_ind)
+
+            # Compute climatology amplitude error based on annual values
+            Nyrs = hasdata.sum(axis=1)
+            results[fit_points, 1] = np.sqrt(np.where(hasdata, A_err**2, 0).sum(axis=1))/(Nyrs-1)
+
+    return (results_valid, results, mean, error, count)
+
+
 @nb.jit(nopython=True)
 def annual_magnitude(
     vx_fit,
@@ -1277,6 +1689,23 @@ class CompositeVariable:
 # Currently processed datacube chunk
 Chunk = collections.namedtuple("Chunk", ['start_x', 'stop_x', 'x_len', 'start_y', 'stop_y', 'y_len'])
 
+# Per-layer time features of the datacube: decimal years of start and stop
+# dates, compact M matrix (relative to the first_year of the datacube) and
+# mission group ids of the layers
+TimeFeatures = collections.namedtuple(
+    "TimeFeatures",
+    [
+        'date_updated',
+        'start_decimal_year',
+        'stop_decimal_year',
+        'first_year',
+        'm_start_index',
+        'm_span',
+        'm_weights',
+        'sensors_group_ids'
+    ]
+)
+
 
 class MissionSensor:
     """
@@ -1319,6 +1748,15 @@ class MissionSensor:
     # Mapping of sensor to the group label
     GROUPS_MISSIONS = {}
 
+    # Mapping of the group label to its bit within the bitmask of mission groups
+    BITS = {}
+
+    # Group labels indexed by the mission group id (index of the group within ALL_GROUPS)
+    MISSIONS = None
+
+    # Data type of the bitmask of mission groups
+    BITMASK_TYPE = np.uint16
+
     @staticmethod
     def _groups():
         """
@@ -1394,9 +1832,45 @@ class MissionSensor:
         return all_sensors
 
 
+    @staticmethod
+    def _bits():
+        """
+        Return mapping of sensor group name to its bit within the bitmask of
+        mission groups: {'L45': 1, 'L7': 2, 'L89': 4, 'S1': 8, 'S2': 16}
+        """
+        return {each_mission: 1 << index for index, each_mission in enumerate(MissionSensor.ALL_GROUPS)}
+
+    @staticmethod
+    def group_ids(sensors):
+        """
+        Map each sensor to the id of the mission group it belongs to: index of
+        the group within MissionSensor.ALL_GROUPS.
+        """
+        mission_ids = {each_mission: index for index, each_mission in enumerate(MissionSensor.ALL_GROUPS)}
+
+        # Map unique sensors only: there are only a few of them in the datacube
+        unique_sensors, sensors_index = np.unique(np.asarray(sensors).astype(str), return_inverse=True)
+        unique_ids = np.array(
+            [mission_ids[MissionSensor.GROUPS_MISSIONS[each]] for each in unique_sensors],
+            dtype=np.uint8
+        )
+
+        return unique_ids[sensors_index.ravel()]
+
+    @staticmethod
+    def group_bits(group_ids):
+        """
+        Map mission group ids (see group_ids()) to the bits of the groups
+        within the bitmask of mission groups.
+        """
+        return np.left_shift(1, group_ids.astype(MissionSensor.BITMASK_TYPE)).astype(MissionSensor.BITMASK_TYPE)
+
+
 # Initialize static data of the class
 MissionSensor.GROUPS = MissionSensor._groups()
 MissionSensor.GROUPS_MISSIONS = MissionSensor._groups_missions()
+MissionSensor.BITS = MissionSensor._bits()
+MissionSensor.MISSIONS = np.array(list(MissionSensor.ALL_GROUPS))
 
 
 class SensorExcludeFilter:
@@ -1424,11 +1898,16 @@ class SensorExcludeFilter:
     # Multiplier of standard error to use in comparison
     SESCALE = 3
 
+    # Number of spacial points to process at once by exclude_groups():
+    # each of the [points, layers] float64 temporaries is
+    # POINTS_BLOCK_SIZE * num_layers * 8 bytes (~40Mb for 50K layers)
+    POINTS_BLOCK_SIZE = 100
+
     def __init__(
         self,
         acquisition_start_time,
         acquisition_stop_time,
-        sensors,
+        sensors_group_ids,
         sensors_groups
     ):
         """
@@ -1436,9 +1915,9 @@ class SensorExcludeFilter:
 
         Inputs:
         =======
-        acquisition_start_time - Acquisition datetime for the first image of timeseries.
-        acquisition_stop_time - Acquisition datetime for the second image of timeseries.
-        sensors - Sensors for the timeseries.
+        acquisition_start_time - Acquisition datetime64 for the first image of timeseries.
+        acquisition_stop_time - Acquisition datetime64 for the second image of timeseries.
+        sensors_group_ids - Mission group ids (see MissionSensor.group_ids()) for the timeseries.
         sensors_groups - List of identified sensor groups in timeseries.
         """
         # Flag if filter should be applied to timeseries
@@ -1453,7 +1932,8 @@ class SensorExcludeFilter:
 
         # Map each sensor to its mission group
         # Use homogeneous type as keys (numba allows for key values of the same type only)
-        self.sensors_str = SensorExcludeFilter.map_sensor_to_group(sensors)
+        self.sensors_str = MissionSensor.MISSIONS[sensors_group_ids]
+        self.sensors_group_ids = sensors_group_ids
 
         # Identify if reference sensor group is present in timeseries
         if SensorExcludeFilter.REF_SENSOR in sensors_groups:
@@ -1470,13 +1950,13 @@ class SensorExcludeFilter:
                 #     # logging.info(f'DEBUG: Update mask with {each} as part of the sensor group')
                 #     mask |= (sensors == each)
 
-                start_date = np.array(acquisition_start_time)[mask]
-                stop_date = np.array(acquisition_stop_time)[mask]
+                start_date = acquisition_start_time[mask].min().astype('datetime64[D]')
+                stop_date = acquisition_stop_time[mask].max().astype('datetime64[D]')
 
-                logging.info(f'Identified reference "{SensorExcludeFilter.REF_SENSOR.mission}" sensor group: start_date={start_date.min().date()} end_date={stop_date.max().date()}')
+                logging.info(f'Identified reference "{SensorExcludeFilter.REF_SENSOR.mission}" sensor group: start_date={start_date} end_date={stop_date}')
                 self.binedges = np.arange(
-                    start_date.min().date(),
-                    stop_date.max().date(),
+                    start_date,
+                    stop_date,
                     np.timedelta64(73, '[D]'),  # 73 D is 1/5 of a year
                     dtype="datetime64[D]"
                 )
@@ -1558,44 +2038,183 @@ class SensorExcludeFilter:
 
         Returns:
         ========
-        Array of lists of sensors to exclude per each spacial point.
+        Bitmask of sensor groups (see MissionSensor.BITS) to exclude per each spacial point.
         """
         y_len, x_len, _ = ds_vx.shape
         dims = (y_len, x_len)
-        exclude_sensors = np.frompyfunc(list, 0, 1)(np.empty(dims, dtype=object))
+        exclude_bitmask = np.zeros(dims, dtype=MissionSensor.BITMASK_TYPE)
 
         if self.apply:
-            # # SensorExcludeFilter should only be applied if land_ice 2km inbuffer mask == 0.
-            # # Find such indices in data
-            if ds_land_ice_mask is not None:
-                valid_mask_ind = np.argwhere(ds_land_ice_mask == 0)
-                logging.info(f'Applying SensorExcludeFilter to {len(valid_mask_ind)} points.')
-
-                for each_index in valid_mask_ind:
-                    j_index = each_index[0]
-                    i_index = each_index[1]
-
-                    exclude_sensors[j_index, i_index] = self.iteration(
-                        ds_date_dt,
-                        ds_vx[j_index, i_index, :],
-                        ds_vy[j_index, i_index, :],
-                        ds_mid_date
-                    )
+            # SensorExcludeFilter should only be applied if land_ice 2km inbuffer mask == 0,
+            # otherwise apply filter to all points
+            valid_mask = np.full(dims, True) if ds_land_ice_mask is None else (ds_land_ice_mask == 0)
+            logging.info(f'Applying SensorExcludeFilter to {np.sum(valid_mask)} points.')
+
+            exclude_bitmask[valid_mask] = self.exclude_groups(
+                ds_date_dt,
+                ds_vx[valid_mask],
+                ds_vy[valid_mask],
+                ds_mid_date
+            )
 
-            else:
-                # Apply filter to all points
-                for j_index in range(0, y_len):
-                    for i_index in range(0, x_len):
-                        exclude_sensors[j_index, i_index] = self.iteration(
-                            ds_date_dt,
-                            ds_vx[j_index, i_index, :],
-                            ds_vy[j_index, i_index, :],
-                            ds_mid_date
-                        )
+        return exclude_bitmask
+
+    def exclude_groups(self, ds_date_dt, ds_vx, ds_vy, ds_mid_date):
+        """
+        Returns bitmask of sensor groups to exclude based on the timeseries for
+        each of the spacial points. This is a vectorized version of iteration()
+        which processes POINTS_BLOCK_SIZE points at once: per-(point, sensor group, bin)
+        means are computed as grouped sums over the layers sorted by their
+        sensor group and bin.
+
+        Inputs:
+        =======
+        ds_date_dt: date_dt timeseries
+        ds_vx:      vx timeseries for the spacial points [points, mid_date]
+        ds_vy:      vy timeseries for the spacial points [points, mid_date]
+        ds_mid_date: mid_date timeseries
+
+        Returns bitmask of sensor groups to exclude per each spacial point.
+        """
+        num_points = ds_vx.shape[0]
+        exclude_bitmask = np.zeros(num_points, dtype=MissionSensor.BITMASK_TYPE)
+
+        num_bins = len(self.binedges) - 1
+
+        if num_points == 0 or num_bins < 1:
+            return exclude_bitmask
+
+        # Trim data to reduce computations
+        dt_index = np.flatnonzero(ds_date_dt <= SensorExcludeFilter.MAX_DT)
+
+        if dt_index.size == 0:
+            return exclude_bitmask
+
+        # Bin index of each layer: layers outside of bin edges contribute
+        # only to the sensor group statistics and go into extra "num_bins" bin
+        bin_index = np.searchsorted(
+            self.binedges.astype(ds_mid_date.dtype),
+            ds_mid_date[dt_index],
+            side='right'
+        ) - 1
+        bin_index[(bin_index < 0) | (bin_index >= num_bins)] = num_bins
+
+        # Sort layers by (sensor group, bin) to reduce each group of layers
+        # as a continuous segment
+        group_bin = self.sensors_group_ids[dt_index].astype(np.int64)*(num_bins + 1) + bin_index
+        sort_index = np.argsort(group_bin, kind='stable')
+        group_bin = group_bin[sort_index]
+        layers = dt_index[sort_index]
+
+        segment_group_bin, segment_start, segment_layers = np.unique(group_bin, return_index=True, return_inverse=True)
+        segment_layers = segment_layers.ravel()
+        segment_group, segment_bin = np.divmod(segment_group_bin, num_bins + 1)
+
+        # Process points in blocks to bound memory footprint of the
+        # [points, layers] temporaries
+        for block_start in range(0, num_points, SensorExcludeFilter.POINTS_BLOCK_SIZE):
+            block = slice(block_start, block_start + SensorExcludeFilter.POINTS_BLOCK_SIZE)
+            exclude_bitmask[block] = SensorExcludeFilter.exclude_groups_block(
+                ds_vx[block, layers],
+                ds_vy[block, layers],
+                segment_start,
+                segment_group,
+                segment_bin,
+                segment_layers,
+                num_bins
+            )
+
+        return exclude_bitmask
+
+    @staticmethod
+    def exclude_groups_block(vx, vy, segment_start, segment_group, segment_bin, segment_layers, num_bins):
+        """
+        Returns bitmask of sensor groups to exclude for the block of spacial points.
+
+        Inputs:
+        =======
+        vx:             vx timeseries for the block of points sorted by (sensor group, bin) [points, layers]
+        vy:             vy timeseries for the block of points sorted by (sensor group, bin) [points, layers]
+        segment_start:  Start index of each (sensor group, bin) segment of layers.
+        segment_group:  Sensor group index of each segment.
+        segment_bin:    Bin index of each segment.
+        segment_layers: Segment index of each layer.
+        num_bins:       Number of bins.
+
+        Returns:
+        ========
+        Bitmask of sensor groups to exclude per each spacial point of the block.
+        """
+        num_points = vx.shape[0]
+        num_groups = len(MissionSensor.ALL_GROUPS)
+        exclude_bitmask = np.zeros(num_points, dtype=MissionSensor.BITMASK_TYPE)
+
+        valid = ~np.isnan(vx)
+        vx = np.where(valid, vx, 0)
+        vy = np.where(valid, vy, 0)
+
+        def _group_sum(values):
+            """
+            Sum values over each of (sensor group, bin) segments.
+            """
+            return np.add.reduceat(values, segment_start, axis=1)
+
+        def _to_groups(values):
+            """
+            Place per-segment values into [points, sensor groups, bins + 1] array.
+            """
+            all_values = np.zeros((num_points, num_groups, num_bins + 1))
+            all_values[:, segment_group, segment_bin] = values
+
+            return all_values
 
-                    # logging.info(f'Excluded sensors: {exclude_sensors[j_index, i_index]}')
+        count = _to_groups(_group_sum(valid.astype(np.int32)))
 
-        return exclude_sensors
+        # Mean velocity vector per sensor group
+        group_count = count.sum(axis=2)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vx0 = _to_groups(_group_sum(vx)).sum(axis=2) / group_count
+            vy0 = _to_groups(_group_sum(vy)).sum(axis=2) / group_count
+            v0 = np.sqrt(np.power(vx0, 2.0) + np.power(vy0, 2.0))
+
+            # Flow acceleration in direction of unit flow vector of the sensor group
+            layer_group = segment_group[segment_layers]
+            vp = np.where(
+                valid,
+                (vx0 / v0)[:, layer_group] * vx + (vy0 / v0)[:, layer_group] * vy,
+                0
+            )
+
+            # Mean of vp per bin
+            vbin = _to_groups(_group_sum(vp))[..., :num_bins] / count[..., :num_bins]
+
+        vbin[count[..., :num_bins] < SensorExcludeFilter.MIN_COUNT] = np.nan
+
+        # Compare each sensor group to the reference sensor group
+        ref_index = list(MissionSensor.ALL_GROUPS).index(SensorExcludeFilter.REF_SENSOR.mission)
+        ref_vbin = vbin[:, ref_index:ref_index+1, :]
+
+        covalid = (~np.isnan(ref_vbin)) & (~np.isnan(vbin))
+        num_covalid = covalid.sum(axis=2)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = np.where(covalid, vbin - ref_vbin, 0)
+            delta_mean = delta.sum(axis=2) / num_covalid
+            delta_std = np.sqrt(
+                np.where(covalid, np.power(delta - delta_mean[..., np.newaxis], 2.0), 0).sum(axis=2) / num_covalid
+            )
+            se = delta_std / np.sqrt(num_covalid - 1)
+
+            disagree_with_refsensor = (num_covalid > 3) & ((delta_mean + (se * SensorExcludeFilter.SESCALE)) < 0)
+
+        # No need to check on reference sensor
+        disagree_with_refsensor[:, ref_index] = False
+
+        for index, each_mission in enumerate(MissionSensor.ALL_GROUPS):
+            exclude_bitmask[disagree_with_refsensor[:, index]] |= MissionSensor.BITS[each_mission]
+
+        return exclude_bitmask
 
     def iteration(self, ds_date_dt, ds_vx, ds_vy, ds_mid_date, plot=False):
         """
@@ -1934,39 +2553,68 @@ class StableShiftFilter:
 
         return return_data
 
-    def apply(self, vx, vy):
+    def storage_layout(self, sort_index):
         """
-        Apply stable_shift corrections to the datacube's vx and vy variables and
-        remove excluded granules if any.
+        Map filter decisions made for the datacube layers sorted by date_dt
+        back to the layers as they are stored in the datacube, so vx and vy
+        can be read from the store chunk by chunk.
 
         Inputs:
         =======
-        vx: VX data
-        vy: VY data
+        sort_index: Indices of stored layers in the sorted order.
 
         Returns:
         ========
-        Updated vx and vy data or original data if no corrections are required.
+        layer_index: Position of each stored layer within the filtered layers,
+            -1 for excluded layers.
+        vx_stable_shift, vy_stable_shift: stable_shift to add back to each
+            stored layer, zero if stable_shift should not be reversed.
         """
-        return_vx = vx.copy()
-        return_vy = vy.copy()
+        num_layers = len(sort_index)
+
+        layer_index = np.full(num_layers, -1)
+        layer_index[sort_index[self.keep_granule_mask]] = np.arange(num_layers - self.num_exclude_granules)
+
+        vx_stable_shift = np.zeros(num_layers)
+        vy_stable_shift = np.zeros(num_layers)
 
         if self.num_reverse_stable_shift_mask > 0:
-            _, y_len, x_len = vx.shape
+            vx_stable_shift[sort_index[self.reverse_stable_shift_mask]] = self.vx_stable_shift.ravel()
+            vy_stable_shift[sort_index[self.reverse_stable_shift_mask]] = self.vy_stable_shift.ravel()
 
-            # Update vx and vy values as we process each chunk of datacube data
-            vx_stable_shift = np.broadcast_to(self.vx_stable_shift, (self.num_reverse_stable_shift_mask, y_len, x_len))
-            return_vx[self.reverse_stable_shift_mask] += vx_stable_shift
+        return (layer_index, vx_stable_shift, vy_stable_shift)
 
-            vy_stable_shift = np.broadcast_to(self.vy_stable_shift, (self.num_reverse_stable_shift_mask, y_len, x_len))
-            return_vy[self.reverse_stable_shift_mask] += vy_stable_shift
 
-        if self.num_exclude_granules > 0:
-            # Exclude some of the granules
-            return_vx = return_vx[self.keep_granule_mask, :, :]
-            return_vy = return_vy[self.keep_granule_mask, :, :]
+# Composite being generated: set for the duration of parallel processing of the
+# datacube chunks to be inherited by the forked worker processes
+_composite = None
+
+
+def _init_cube_time_mean_worker(num_threads):
+    """
+    Limit number of Dask and Numba threads used by the worker process: all
+    worker processes together should not use more threads than there are CPUs.
+    """
+    ITSLiveComposite.NUM_DASK_THREADS = num_threads
+    dask.config.set(num_workers=num_threads)
+    nb.set_num_threads(num_threads)
+
 
-        return (return_vx, return_vy)
+def _cube_time_mean_worker(start_x, num_x, start_y, num_y):
+    """
+    Compute time average for the datacube chunk within the worker process.
+
+    Return chunk location and populated output arrays for the chunk.
+    """
+    _composite.cube_time_mean(start_x, num_x, start_y, num_y)
+    gc.collect()
+
+    chunk_arrays = {
+        each_name: each_array[start_y:start_y+num_y, start_x:start_x+num_x]
+        for each_name, each_array in _composite.output_arrays().items()
+    }
+
+    return (start_x, num_x, start_y, num_y, chunk_arrays)
 
 
 class ITSLiveComposite:
@@ -1978,6 +2626,13 @@ class ITSLiveComposite:
     # Number of threads to use by Dask parallezation
     NUM_DASK_THREADS = 4
 
+    # Number of spacial points to solve LSQ fit for at once
+    LSQ_BATCH_SIZE = 16
+
+    # Number of processes to compute datacube chunks in parallel with: if 1,
+    # chunks are processed sequentially by the current process
+    NUM_PROCESSES = 1
+
     # Flag is valid v[xy]_error_slow should be used in place of v[xy]_error
     USE_ERROR_SLOW = False
 
@@ -2028,6 +2683,7 @@ class ITSLiveComposite:
     START_DECIMAL_YEAR = None
     STOP_DECIMAL_YEAR = None
     DECIMAL_DT = None
+    # Compact representation of M matrix (see CompactM)
     M = None
 
     # Dimensions that correspond to the currently processed datacube chunk
@@ -2039,10 +2695,6 @@ class ITSLiveComposite:
     # and to process in one "chunk"
     NUM_TO_PROCESS = 100
 
-    # Dimensions order of the data to guarantee continuous memory in time dimension
-    # Original data as stored in [time, y, x] dimension order.
-    CONT_TIME_ORDER = [1, 2, 0]
-
     # Scale factor for amplitude comparison b/w LSQ fit using all data and
     # LSQ fit excluding S2 data
     LSQ_AMP_SCALE = 2
@@ -2058,6 +2710,22 @@ class ITSLiveComposite:
     # This flag is used for debugging purposes to understand the data.
     V0_YEARS = []
 
+    # Local directory or S3 URL to cache per-layer time features of the datacubes in.
+    # Local cache is re-used only by the runs on the same host, use S3 URL to
+    # share the cache between short-lived containers.
+    # If empty, time features are computed for each run.
+    TIME_FEATURES_CACHE_DIR = ''
+
+    # Flag to read vx and vy from time series optimized companion store of the
+    # datacube if it exists (see tools/create_timeseries_datacube.py)
+    USE_TIME_SERIES_STORE = True
+
+    # State of the previous composite (local file or S3 URL of CompOutput.STATE_FILE)
+    # to update composite incrementally for the layers appended to the datacube
+    # since previous composite was created. If empty, composite is created from
+    # all layers of the datacube.
+    PREVIOUS_STATE = ''
+
     def __init__(self, cube_store: str, s3_bucket: str):
         """
         Initialize composites.
@@ -2070,6 +2738,17 @@ class ITSLiveComposite:
             read_skipped_granules_flag
         )
 
+        # Time series optimized companion store of the datacube to read vx and vy from
+        self.time_series_store = None
+        self.time_series_ds = None
+
+        if ITSLiveComposite.USE_TIME_SERIES_STORE:
+            self.time_series_store, self.time_series_ds = ITSLiveComposite.open_time_series_store(
+                cube_store,
+                s3_bucket,
+                self.cube_ds
+            )
+
         cube_projection = int(self.cube_ds.attrs[CubeOutput.PROJECTION])
 
         # Find corresponding to EPSG land ice mask file for the cube
@@ -2146,13 +2825,12 @@ class ITSLiveComposite:
 
         ITSLiveComposite.MID_DATE_LEN = self.cube_sizes[Coords.MID_DATE]
 
-        # Need to keep original datacube dimensions to revert stable_shift, if any.
-        # Then remove any granules for these data variables if any are identified
-        # by the StableShiftFilter.
-        self.data = cube_ds[[
-            DataVars.VX,
-            DataVars.VY
-        ]]
+        # vx and vy are read directly from the datacube as stored: keep
+        # positions of stored layers within the sorted (as by sortby() above)
+        # and reduced by StableShiftFilter layers, and stable_shift to revert
+        # for each of the stored layers, if any.
+        sort_index = np.lexsort((self.cube_ds[DataVars.ImgPairInfo.DATE_DT].values,))
+        self.layer_index, self.vx_stable_shift, self.vy_stable_shift = self.stable_shift_filter.storage_layout(sort_index)
 
         # From this point on initialize all data based on "reduced" by StableShiftFilter
         # datacube. Only vx and vy data need to be read in full, reversed stable_shift
@@ -2191,13 +2869,32 @@ class ITSLiveComposite:
             self.vx_error[mask] += error
             self.vy_error[mask] += error
 
-        # Images acquisition times and middle_date of each layer as datetime.datetime objects
-        acq_datetime_img1 = [t.astype('M8[ms]').astype('O') for t in self.stable_shift_filter.exclude(cube_ds[DataVars.ImgPairInfo.ACQUISITION_DATE_IMG1].values)]
-        acq_datetime_img2 = [t.astype('M8[ms]').astype('O') for t in self.stable_shift_filter.exclude(cube_ds[DataVars.ImgPairInfo.ACQUISITION_DATE_IMG2].values)]
+        # Images acquisition times of each layer
+        acq_datetime_img1 = cube_ds[DataVars.ImgPairInfo.ACQUISITION_DATE_IMG1].values
+        acq_datetime_img2 = cube_ds[DataVars.ImgPairInfo.ACQUISITION_DATE_IMG2].values
+
+        # Sensor data for the cube's layers
+        sensors = cube_ds[DataVars.ImgPairInfo.SATELLITE_IMG1].values
 
-        # Compute decimal year representation for start and end dates of each velocity pair
-        ITSLiveComposite.START_DECIMAL_YEAR = np.array([decimal_year(each) for each in acq_datetime_img1])
-        ITSLiveComposite.STOP_DECIMAL_YEAR = np.array([decimal_year(each) for each in acq_datetime_img2])
+        # Per-layer time features of the whole datacube: these don't depend on
+        # the granules excluded by StableShiftFilter, so can be re-used by
+        # composites of any mission group
+        start_time = timeit.default_timer()
+        time_features = ITSLiveComposite.init_time_features(
+            cube_store,
+            self.cube_ds.attrs[CubeOutput.DATE_UPDATED],
+            acq_datetime_img1,
+            acq_datetime_img2,
+            sensors
+        )
+        logging.info(f'Initialized time features (took {timeit.default_timer() - start_time} seconds)')
+
+        acq_datetime_img1 = self.stable_shift_filter.exclude(acq_datetime_img1)
+        acq_datetime_img2 = self.stable_shift_filter.exclude(acq_datetime_img2)
+
+        # Decimal year representation for start and end dates of each velocity pair
+        ITSLiveComposite.START_DECIMAL_YEAR = self.stable_shift_filter.exclude(time_features.start_decimal_year)
+        ITSLiveComposite.STOP_DECIMAL_YEAR = self.stable_shift_filter.exclude(time_features.stop_decimal_year)
         ITSLiveComposite.DECIMAL_DT = ITSLiveComposite.STOP_DECIMAL_YEAR - ITSLiveComposite.START_DECIMAL_YEAR
 
         # DEBUG:
@@ -2230,15 +2927,13 @@ class ITSLiveComposite:
         ITSLiveComposite.YEARS_LEN = ITSLiveComposite.YEARS.size
         logging.info(f'Years for composite: {ITSLiveComposite.YEARS.tolist()}')
 
-        # Create M matrix for the cube:
-        start_time = timeit.default_timer()
-        ITSLiveComposite.M = create_M(
-            ITSLiveComposite.YEARS,
-            ITSLiveComposite.START_DECIMAL_YEAR,
-            ITSLiveComposite.STOP_DECIMAL_YEAR,
-            ITSLiveComposite.DECIMAL_DT
+        # M matrix for the cube: first year of the composites might be later
+        # than the first year of the whole datacube
+        ITSLiveComposite.M = CompactM(
+            self.stable_shift_filter.exclude(time_features.m_start_index) - (start_year - int(time_features.first_year)),
+            self.stable_shift_filter.exclude(time_features.m_span),
+            self.stable_shift_filter.exclude(time_features.m_weights)
         )
-        logging.info(f'Computed M (took {timeit.default_timer() - start_time} seconds)')
 
         # Day separation between images (sorted per cube.sortby() call above)
         ITSLiveComposite.DATE_DT = self.stable_shift_filter.exclude(cube_ds[DataVars.ImgPairInfo.DATE_DT].values)
@@ -2266,7 +2961,9 @@ class ITSLiveComposite:
         self.std_error = CompositeVariable(dims, 'std_error')
 
         # Sensor data for the cube's layers
-        self.sensors = self.stable_shift_filter.exclude(cube_ds[DataVars.ImgPairInfo.SATELLITE_IMG1].values)
+        self.sensors = self.stable_shift_filter.exclude(sensors)
+        self.sensors_group_ids = self.stable_shift_filter.exclude(time_features.sensors_group_ids)
+        self.sensors_bits = MissionSensor.group_bits(self.sensors_group_ids)
 
         # Use true "date_center" value for processing since "mid_date" has been
         # adjusted by milliseconds to guarantee uniqueness of the values so we
@@ -2288,7 +2985,7 @@ class ITSLiveComposite:
         self.sensor_filter = SensorExcludeFilter(
             acq_datetime_img1,
             acq_datetime_img2,
-            self.sensors,
+            self.sensors_group_ids,
             self.sensors_groups
         )
 
@@ -2307,8 +3004,252 @@ class ITSLiveComposite:
             self.excludeS2_slope = CompositeVariable(dims, 'slope')
             self.excludeS2_std_error = CompositeVariable(dims, 'std_error')
 
-        # TODO: take care of self.date_updated when support for composites updates
-        # is implemented
+        # Mask of spacial points to compute composite for: if None, composite
+        # is computed for all points of the datacube. Otherwise, the rest of the
+        # points keep the state of the previous composite if any, or stay empty.
+        self.update_mask = None
+
+        if len(ITSLiveComposite.PREVIOUS_STATE):
+            self.init_update(ITSLiveComposite.PREVIOUS_STATE)
+
+        if DataVars.VALID_COUNT in self.cube_ds:
+            # Datacube keeps number of layers with valid data per spacial point:
+            # points without any valid data don't need to be computed
+            valid_mask = (self.cube_ds[DataVars.VALID_COUNT].values > 0)
+            logging.info(f'Datacube has {np.sum(valid_mask)} out of {valid_mask.size} points with valid data')
+
+            self.update_mask = valid_mask if self.update_mask is None else (self.update_mask & valid_mask)
+
+    @staticmethod
+    def init_time_features(cube_store: str, date_updated: str, acq_datetime_img1, acq_datetime_img2, sensors):
+        """
+        Get per-layer time features for all layers of the datacube.
+
+        Features are read from the cache if it exists for the same date_updated
+        of the datacube, otherwise they are computed and written to the cache
+        (if TIME_FEATURES_CACHE_DIR is set). The cache can be a local directory
+        or S3 URL to share it between runs on different hosts.
+
+        Inputs:
+        =======
+        cube_store: Datacube store the features are computed for.
+        date_updated: Date when the datacube was updated.
+        acq_datetime_img1: Acquisition datetime64 for the first image of each layer.
+        acq_datetime_img2: Acquisition datetime64 for the second image of each layer.
+        sensors: Sensors of each layer.
+
+        Returns:
+        ========
+        TimeFeatures for the datacube.
+        """
+        cache_file = None
+        s3 = None
+
+        if len(ITSLiveComposite.TIME_FEATURES_CACHE_DIR):
+            cache_file = os.path.join(
+                ITSLiveComposite.TIME_FEATURES_CACHE_DIR,
+                os.path.basename(cube_store.rstrip('/')).replace(FileExtension.ZARR, FileExtension.TIME_FEATURES)
+            )
+
+            if cache_file.startswith(ITSCube.S3_PREFIX):
+                s3 = s3fs.S3FileSystem(skip_instance_cache=True)
+
+            cached_file = None
+            if s3 is not None:
+                if s3.exists(cache_file):
+                    with s3.open(cache_file, 'rb') as fh:
+                        cached_file = io.BytesIO(fh.read())
+
+            elif os.path.exists(cache_file):
+                cached_file = cache_file
+
+            if cached_file is not None:
+                with np.load(cached_file) as cached:
+                    time_features = TimeFeatures(**{each: cached[each] for each in TimeFeatures._fields})
+
+                if str(time_features.date_updated) == date_updated and \
+                        time_features.start_decimal_year.size == len(acq_datetime_img1):
+                    logging.info(f'Read time features from {cache_file}')
+                    return time_features
+
+                logging.info(f'Ignoring out of date time features in {cache_file}')
+
+        start_decimal_year = decimal_years(acq_datetime_img1)
+        stop_decimal_year = decimal_years(acq_datetime_img2)
+
+        first_year = int(np.floor(np.min(start_decimal_year)))
+        years = np.arange(first_year, int(np.floor(np.max(stop_decimal_year))) + 1)
+
+        time_features = TimeFeatures(
+            date_updated,
+            start_decimal_year,
+            stop_decimal_year,
+            first_year,
+            *create_M_compact(years, start_decimal_year, stop_decimal_year, stop_decimal_year - start_decimal_year),
+            MissionSensor.group_ids(sensors)
+        )
+
+        if s3 is not None:
+            # S3 objects are replaced atomically
+            with s3.open(cache_file, 'wb') as fh:
+                np.savez(fh, **time_features._asdict())
+
+            logging.info(f'Wrote time features to {cache_file}')
+
+        elif cache_file is not None:
+            os.makedirs(ITSLiveComposite.TIME_FEATURES_CACHE_DIR, exist_ok=True)
+
+            # Write to temporary file first: the cache might be shared by
+            # concurrent runs
+            tmp_cache_file = f'{cache_file}.{os.getpid()}'
+            with open(tmp_cache_file, 'wb') as fh:
+                np.savez(fh, **time_features._asdict())
+
+            os.replace(tmp_cache_file, cache_file)
+            logging.info(f'Wrote time features to {cache_file}')
+
+        return time_features
+
+    def state_settings(self):
+        """
+        Settings of the composite that affect per-pixel results: composite
+        state can be re-used only if these are the same.
+        """
+        return {
+            'version': ITSLiveComposite.VERSION,
+            'use_error_slow': ITSLiveComposite.USE_ERROR_SLOW,
+            'v0_years': list(ITSLiveComposite.V0_YEARS),
+            'center_date': str(CENTER_DATE),
+            'keep_mission_group': None if StableShiftFilter.KEEP_MISSION_GROUP is None else StableShiftFilter.KEEP_MISSION_GROUP.mission,
+            'exclude_mission_group': StableShiftFilter.EXCLUDE_MISSION_GROUP,
+            'sizes': [self.cube_sizes[Coords.Y], self.cube_sizes[Coords.X]],
+            'start_year': int(ITSLiveComposite.YEARS[0]),
+            'sensors_groups': [each.mission for each in self.sensors_groups],
+            'exclude_s2_from_lsq': self.sensor_filter.excludeS2FromLSQ,
+            'binedges': [] if self.sensor_filter.binedges is None else [str(each) for each in self.sensor_filter.binedges],
+            'land_ice_mask': None if self.land_ice_mask is None else hashlib.sha1(np.ascontiguousarray(self.land_ice_mask)).hexdigest()
+        }
+
+    def layers_hash(self, num_layers: int):
+        """
+        Hash of the first num_layers of the datacube as stored: to detect if
+        previously processed layers have been changed.
+        """
+        return hashlib.sha1(self.cube_ds[Coords.MID_DATE].values[:num_layers].tobytes()).hexdigest()
+
+    def save_state(self, state_file: str):
+        """
+        Save per-pixel state of the composite to the file to be able to update
+        composite incrementally when new layers are added to the datacube.
+        """
+        num_layers = len(self.layer_index)
+
+        np.savez_compressed(
+            state_file,
+            settings=json.dumps(self.state_settings()),
+            num_layers=num_layers,
+            layers_hash=self.layers_hash(num_layers),
+            years=ITSLiveComposite.YEARS,
+            date_created=self.date_created,
+            **self.state_arrays()
+        )
+        logging.info(f'Wrote composite state to {state_file}')
+
+    @staticmethod
+    def read_state(state_path: str):
+        """
+        Read state of the previous composite from local file or S3 bucket.
+
+        Returns:
+        ========
+        Dictionary of the state values, or None if state does not exist.
+        """
+        state_file = state_path
+
+        if state_path.startswith(ITSCube.S3_PREFIX):
+            s3 = s3fs.S3FileSystem(skip_instance_cache=True)
+            if not s3.exists(state_path):
+                return None
+
+            with s3.open(state_path, 'rb') as fh:
+                state_file = io.BytesIO(fh.read())
+
+        elif not os.path.exists(state_path):
+            return None
+
+        with np.load(state_file) as state:
+            return {each: state[each] for each in state.files}
+
+    def init_update(self, state_path: str):
+        """
+        Initialize incremental update of the previous composite: restore
+        per-pixel state of the previous composite and identify spacial points
+        that have valid data in the layers added to the datacube since previous
+        composite was created. Only these points are re-computed.
+
+        Layers are appended to the datacube by its updates, so any spacial
+        point without new valid data would get the same results as stored in
+        the previous composite. If any setting that affects per-pixel results
+        (sensor groups, SensorExcludeFilter bins, etc.) or any of the previously
+        processed layers changed, composite is computed for all points.
+
+        Inputs:
+        =======
+        state_path: Local file or S3 URL of the previous composite state.
+        """
+        state = ITSLiveComposite.read_state(state_path)
+
+        if state is None:
+            logging.info(f'Previous composite state {state_path} does not exist, computing all points')
+            return
+
+        num_layers = len(self.layer_index)
+        prev_num_layers = int(state['num_layers'])
+        prev_settings = json.loads(str(state['settings']))
+        settings = self.state_settings()
+
+        reason = None
+        if prev_settings != settings:
+            changed = [each for each in settings if prev_settings.get(each) != settings[each]]
+            reason = f'composite settings changed: {changed}'
+
+        elif prev_num_layers > num_layers:
+            reason = f'datacube has fewer layers ({num_layers}) than previous composite ({prev_num_layers})'
+
+        elif str(state['layers_hash']) != self.layers_hash(prev_num_layers):
+            reason = 'previously processed datacube layers changed'
+
+        elif state['years'].size > ITSLiveComposite.YEARS_LEN:
+            reason = f'previous composite has more years ({state["years"].tolist()})'
+
+        if reason is not None:
+            logging.info(f'Computing all points: {reason}')
+            return
+
+        # Restore state of all points: previous composite might have fewer years
+        for each_name, each_data in self.state_arrays().items():
+            prev_data = state[each_name]
+            each_data[tuple(slice(0, each) for each in prev_data.shape)] = prev_data
+
+        self.date_created = str(state['date_created'])
+
+        # Identify points with valid data in the added layers which are kept
+        # by StableShiftFilter
+        self.update_mask = np.full((self.cube_sizes[Coords.Y], self.cube_sizes[Coords.X]), False)
+
+        keep_mask = (self.layer_index[prev_num_layers:] >= 0)
+        logging.info(f'Datacube has {np.sum(keep_mask)} new layers since previous composite')
+
+        if np.any(keep_mask):
+            cube_vx = self.cube_ds[DataVars.VX]
+
+            for start_y in range(0, self.cube_sizes[Coords.Y], ITSLiveComposite.NUM_TO_PROCESS):
+                stop_y = min(start_y + ITSLiveComposite.NUM_TO_PROCESS, self.cube_sizes[Coords.Y])
+
+                values = cube_vx[prev_num_layers:num_layers, start_y:stop_y, :].values
+                self.update_mask[start_y:stop_y, :] = np.any(~np.isnan(values[keep_mask]), axis=0)
+
+        logging.info(f'Updating {np.sum(self.update_mask)} out of {self.update_mask.size} points of previous composite')
 
     def create(self, output_store: str):
         """
@@ -2361,6 +3302,9 @@ class ITSLiveComposite:
 
         # x_num_to_process = self.cube_sizes[Coords.X] - x_start
 
+        # Chunks of the datacube to process: (start_x, num_x, start_y, num_y)
+        chunks = []
+
         while x_num_to_process > 0:
             # How many tasks to process at a time
             x_num_tasks = ITSLiveComposite.NUM_TO_PROCESS if x_num_to_process > ITSLiveComposite.NUM_TO_PROCESS else x_num_to_process
@@ -2406,8 +3350,7 @@ class ITSLiveComposite:
             while y_num_to_process > 0:
                 y_num_tasks = ITSLiveComposite.NUM_TO_PROCESS if y_num_to_process > ITSLiveComposite.NUM_TO_PROCESS else y_num_to_process
 
-                self.cube_time_mean(x_start, x_num_tasks, y_start, y_num_tasks)
-                gc.collect()
+                chunks.append((x_start, x_num_tasks, y_start, y_num_tasks))
 
                 y_num_to_process -= y_num_tasks
                 y_start += y_num_tasks
@@ -2415,11 +3358,117 @@ class ITSLiveComposite:
             x_num_to_process -= x_num_tasks
             x_start += x_num_tasks
 
+        if self.update_mask is not None:
+            # Process only chunks with the points to compute
+            num_chunks = len(chunks)
+            chunks = [
+                (start_x, num_x, start_y, num_y) for start_x, num_x, start_y, num_y in chunks
+                if np.any(self.update_mask[start_y:start_y+num_y, start_x:start_x+num_x])
+            ]
+            logging.info(f'Processing {len(chunks)} out of {num_chunks} chunks')
+
+        if ITSLiveComposite.NUM_PROCESSES > 1 and len(chunks):
+            self.cube_time_mean_parallel(chunks)
+
+        else:
+            for each_chunk in chunks:
+                self.cube_time_mean(*each_chunk)
+                gc.collect()
+
+        # Save composite state before output arrays are converted for the Zarr store
+        state_file = f'{output_store.rstrip("/")}_{CompOutput.STATE_FILE}'
+        self.save_state(state_file)
+
         # Save data to Zarr store
         self.to_zarr(output_store)
 
+        # Keep composite state within the store
+        shutil.move(state_file, os.path.join(output_store, CompOutput.STATE_FILE))
+
+    def output_arrays(self):
+        """
+        Return composite output arrays that are populated per datacube chunk:
+        a dictionary of array name to [y, x, ...] array.
+        """
+        arrays = {
+            'outlier_fraction': self.outlier_fraction,
+            'max_dt': self.max_dt,
+            'sensor_include': self.sensor_include
+        }
+
+        for each_name, each_value in vars(self).items():
+            if isinstance(each_value, CompositeVariable):
+                arrays[f'{each_name}.v'] = each_value.v
+                arrays[f'{each_name}.vx'] = each_value.vx
+                arrays[f'{each_name}.vy'] = each_value.vy
+
+        return arrays
+
+    def state_arrays(self):
+        """
+        Return composite output arrays that define per-pixel state of the
+        composite: intermediate results of LSQ fit excluding S2 data are not
+        part of the state.
+        """
+        return {
+            each_name: each_value for each_name, each_value in self.output_arrays().items()
+            if not each_name.startswith('excludeS2_')
+        }
+
+    def cube_time_mean_parallel(self, chunks: list):
+        """
+        Compute time average for the datacube chunks in parallel by the pool of
+        processes.
+
+        Worker processes are forked from the current process: datacube store,
+        per-layer vectors (START_DECIMAL_YEAR, DECIMAL_DT, M, DATE_DT, errors, etc.)
+        are shared with the workers copy-on-write. Each worker reads its own
+        vx and vy chunk from the datacube, and returns populated output arrays
+        for the chunk to be copied into the composite.
+
+        Number of processes is capped at the number of CPUs, and Dask and Numba
+        threads of each worker are limited to ITSLiveComposite.NUM_DASK_THREADS
+        or its share of CPUs, whichever is smaller, so that processes don't
+        oversubscribe CPUs.
+
+        chunks: List of (start_x, num_x, start_y, num_y) chunks to process.
+        """
+        global _composite
+        _composite = self
+
+        arrays = self.output_arrays()
+
+        num_cpus = mp.cpu_count()
+        num_workers = min(ITSLiveComposite.NUM_PROCESSES, len(chunks), num_cpus)
+        num_threads = max(1, min(ITSLiveComposite.NUM_DASK_THREADS, num_cpus // num_workers))
+
+        logging.info(f'Processing {len(chunks)} chunks with {num_workers} processes, {num_threads} threads each')
+        start_time = timeit.default_timer()
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=mp.get_context('fork'),
+                initializer=_init_cube_time_mean_worker,
+                initargs=(num_threads,)
+            ) as executor:
+                futures = [executor.submit(_cube_time_mean_worker, *each_chunk) for each_chunk in chunks]
+
+                for each_future in as_completed(futures):
+                    start_x, num_x, start_y, num_y, chunk_arrays = each_future.result()
+
+                    for each_name, each_data in chunk_arrays.items():
+                        arrays[each_name][start_y:start_y+num_y, start_x:start_x+num_x] = each_data
+
+                    logging.info(f'Done with chunk start_x={start_x} start_y={start_y}')
+
+        finally:
+            _composite = None
+
+        logging.info(f'Processed {len(chunks)} chunks (took {timeit.default_timer() - start_time} seconds)')
+
     @staticmethod
-    def project_v_to_median_flow(ds_vx, ds_vy, ds_date_dt, ds_sensors_str, exclude_sensors):
+    def project_v_to_median_flow(ds_vx, ds_vy, ds_date_dt, ds_sensors_bits, exclude_sensors):
         """
         Project valid velocity values to median flow unit vector.
 
@@ -2428,32 +3477,129 @@ class ITSLiveComposite:
         ds_vx: 3d block of vx values.
         ds_vy: 3d block of vy values.
         ds_date_dt: day separation for velocity image pairs.
-        ds_sensors: Current sensors for the datacube.
-        exclude_sensors: 2d "map" of sensors to exclude from calculations (one list per each [y, x] point).
+        ds_sensors_bits: Bits of the sensor groups (see MissionSensor.BITS) for the datacube layers.
+        exclude_sensors: 2d "map" of sensors to exclude from calculations (bitmask of
+            sensor groups per each [y, x] point).
         """
         vp = np.full_like(ds_vx, np.nan)
 
-        dims = ds_vx.shape
-        y_len = dims[0]
-        x_len = dims[1]
+        project_v_to_median_flow_kernel(ds_vx, ds_vy, ds_date_dt, ds_sensors_bits, exclude_sensors, vp)
 
-        for j_index in range(0, y_len):
-            for i_index in range(0, x_len):
-                # Exclude all identified invalid sensor groups per [y, x] point
-                exclude_mask = np.zeros((len(ds_sensors_str)), dtype=np.bool_)
+        return vp
 
-                for each in exclude_sensors[j_index, i_index]:
-                    # logging.info(f'DEBUG: j={j_index} i={i_index}: exclude {each} as part of {exclude_sensors[j_index, i_index]}')
-                    exclude_mask |= (ds_sensors_str == each)
-                    # logging.info(f'exclude_mask.sum={exclude_mask.sum()}')
+    @staticmethod
+    def num_store_chunks(start: int, stop: int, chunk_size: int):
+        """
+        Number of store chunks of chunk_size the [start:stop] range of the
+        dimension spans.
+        """
+        return (stop - 1) // chunk_size - start // chunk_size + 1
 
-                include_mask = ~exclude_mask
-                x_in = ds_vx[j_index, i_index, include_mask]
-                y_in = ds_vy[j_index, i_index, include_mask]
-                dt = ds_date_dt[include_mask]
-                vp[j_index, i_index, include_mask] = create_projected_velocity(x_in, y_in, dt)
+    @staticmethod
+    def open_time_series_store(cube_store: str, s3_bucket: str, cube_ds: xr.Dataset):
+        """
+        Open time series optimized companion store of the datacube (as created
+        by tools/create_timeseries_datacube.py) if it exists and is up to date
+        with the datacube.
 
-        return vp
+        Returns:
+        ========
+        Tuple of the store and xr.Dataset for the companion store, or
+        (None, None) if datacube should be read instead.
+        """
+        store_path = cube_store.rstrip('/').replace(FileExtension.ZARR, FileExtension.TIME_SERIES)
+
+        if not ITSCube.exists(store_path, s3_bucket):
+            logging.info(f'Time series store {store_path} does not exist, reading datacube')
+            return (None, None)
+
+        read_skipped_granules_flag = False
+        _, store_in, store_ds, _ = ITSCube.init_input_store(store_path, s3_bucket, read_skipped_granules_flag)
+
+        if store_ds.attrs.get(CubeOutput.DATE_UPDATED) != cube_ds.attrs[CubeOutput.DATE_UPDATED] or \
+                store_ds.sizes[Coords.MID_DATE] != cube_ds.sizes[Coords.MID_DATE]:
+            logging.warning(f'Time series store {store_path} is out of date with the datacube, reading datacube')
+            return (None, None)
+
+        logging.info(f'Reading vx and vy from time series store {store_path}')
+        return (store_in, store_ds)
+
+    def load_chunk(self, var_name: str, stable_shift):
+        """
+        Load data variable for currently processed datacube chunk as time
+        continuous [y, x, mid_date] array.
+
+        Data is read one chunk of the store at a time from the time series
+        companion store if available, or from the datacube otherwise:
+        stable_shift is reverted and each of the layers is placed into its
+        position within sorted and reduced by StableShiftFilter layers.
+
+        Inputs:
+        =======
+        var_name: Name of the data variable to load.
+        stable_shift: stable_shift to add back to each of the stored layers.
+        """
+        chunk = ITSLiveComposite.Chunk
+        data = np.full((chunk.y_len, chunk.x_len, ITSLiveComposite.MID_DATE_LEN), np.nan)
+
+        if self.time_series_ds is not None:
+            # Companion store is stored as [y, x, mid_date]
+            store_var = self.time_series_ds[var_name]
+            y_chunk_size, x_chunk_size, _ = store_var.encoding[Output.CHUNKS_ATTR]
+
+            keep_mask = (self.layer_index >= 0)
+            layer_index = self.layer_index[keep_mask]
+            reverse_mask = (stable_shift != 0)
+
+            start_j = chunk.start_y
+            while start_j < chunk.stop_y:
+                stop_j = min((start_j // y_chunk_size + 1) * y_chunk_size, chunk.stop_y)
+
+                values = store_var[start_j:stop_j, chunk.start_x:chunk.stop_x, :].astype(np.float32).values
+
+                if np.any(reverse_mask):
+                    values[..., reverse_mask] += stable_shift[reverse_mask]
+
+                data[start_j - chunk.start_y:stop_j - chunk.start_y, :, layer_index] = values[..., keep_mask]
+                start_j = stop_j
+
+            num_reads = ITSLiveComposite.num_store_chunks(chunk.start_y, chunk.stop_y, y_chunk_size) * \
+                ITSLiveComposite.num_store_chunks(chunk.start_x, chunk.stop_x, x_chunk_size)
+
+        else:
+            # Datacube is stored as [mid_date, y, x]
+            store_var = self.cube_ds[var_name]
+            num_layers = len(self.layer_index)
+            time_chunk_size, y_chunk_size, x_chunk_size = store_var.encoding.get(
+                Output.CHUNKS_ATTR,
+                (ITSCube.TIME_CHUNK_VALUE, ITSCube.X_Y_CHUNK_VALUE, ITSCube.X_Y_CHUNK_VALUE)
+            )
+            num_time_chunks = 0
+
+            for start_t in range(0, num_layers, time_chunk_size):
+                stop_t = min(start_t + time_chunk_size, num_layers)
+
+                layer_index = self.layer_index[start_t:stop_t]
+                keep_mask = (layer_index >= 0)
+                if not np.any(keep_mask):
+                    continue
+
+                values = store_var[start_t:stop_t, chunk.start_y:chunk.stop_y, chunk.start_x:chunk.stop_x].astype(np.float32).values
+
+                reverse_mask = (stable_shift[start_t:stop_t] != 0)
+                if np.any(reverse_mask):
+                    values[reverse_mask] += stable_shift[start_t:stop_t][reverse_mask].reshape((-1, 1, 1))
+
+                data[:, :, layer_index[keep_mask]] = np.moveaxis(values[keep_mask], 0, -1)
+                num_time_chunks += 1
+
+            num_reads = num_time_chunks * \
+                ITSLiveComposite.num_store_chunks(chunk.start_y, chunk.stop_y, y_chunk_size) * \
+                ITSLiveComposite.num_store_chunks(chunk.start_x, chunk.stop_x, x_chunk_size)
+
+        logging.info(f'Read {var_name} from {num_reads} store chunks')
+
+        return data
 
     def cube_time_mean(self, start_x, num_x, start_y, num_y):
         """
@@ -2482,25 +3628,29 @@ class ITSLiveComposite:
 
         # ATTN: don't use native xarray functionality is much slower,
         # convert data to numpy types and use numpy only
+        # Read data continuous in time, with stable_shift reversed and granules
+        # excluded if any are identified by the StableShiftFilter
         logging.info(f'Loading vx[:, {start_y}:{stop_y}, {start_x}:{stop_x}] out of [{self.cube_sizes[Coords.MID_DATE]}, {self.cube_sizes[Coords.Y]}, {self.cube_sizes[Coords.X]}]...')
-        vx_org = self.data.vx[:, start_y:stop_y, start_x:stop_x].astype(np.float32).values
-        logging.info(f'vx shape={vx_org.shape}')
+        vx = self.load_chunk(DataVars.VX, self.vx_stable_shift)
+        logging.info(f'vx shape={vx.shape}')
 
         logging.info(f'Loading vy[:, {start_y}:{stop_y}, {start_x}:{stop_x}] out of [{self.cube_sizes[Coords.MID_DATE]}, {self.cube_sizes[Coords.Y]}, {self.cube_sizes[Coords.X]}]...')
-        vy_org = self.data.vy[:, start_y:stop_y, start_x:stop_x].astype(np.float32).values
-        logging.info(f'vy shape={vy_org.shape}')
-
-        # Reverse stable_shift and exclude granules if any are identified by the
-        # StableShiftFilter
-        vx_org, vy_org = self.stable_shift_filter.apply(vx_org, vy_org)
-        logging.info(f'After StableShiftFilter.apply: vx.shape={vx_org.shape} vy.shape={vy_org.shape}')
-
-        # Transpose data to make it continuous in time
-        vx = np.zeros((ITSLiveComposite.Chunk.y_len, ITSLiveComposite.Chunk.x_len, ITSLiveComposite.MID_DATE_LEN))
-        vx.flat = np.transpose(vx_org, ITSLiveComposite.CONT_TIME_ORDER)
-
-        vy = np.zeros((ITSLiveComposite.Chunk.y_len, ITSLiveComposite.Chunk.x_len, ITSLiveComposite.MID_DATE_LEN))
-        vy.flat = np.transpose(vy_org, ITSLiveComposite.CONT_TIME_ORDER)
+        vy = self.load_chunk(DataVars.VY, self.vy_stable_shift)
+        logging.info(f'vy shape={vy.shape}')
+
+        # Points of the chunk which are not computed keep state of the previous
+        # composite or stay empty: exclude their data from processing
+        keep_mask = None
+        keep_state = None
+
+        if self.update_mask is not None:
+            keep_mask = ~self.update_mask[start_y:stop_y, start_x:stop_x]
+            keep_state = {
+                each_name: each_data[start_y:stop_y, start_x:stop_x][keep_mask] for each_name, each_data in self.state_arrays().items()
+            }
+            vx[keep_mask] = np.nan
+            vy[keep_mask] = np.nan
+            logging.info(f'Not computing {np.sum(keep_mask)} points')
 
         # Call filter to exclude sensors if any
         logging.info('Sensor exclude filter...')
@@ -2533,11 +3683,12 @@ class ITSLiveComposite:
         count_mask = ~np.isnan(vx[..., _v0_year_mask])
         count0_vx = count_mask.sum(axis=2)
 
-        copy_vx = None
+        count1_vx = None
         if self.sensor_filter.excludeS2FromLSQ:
-            # Need to save original vx values before any filters are applied
-            # if second LSQ fit iteration will be invoked
-            copy_vx = vx.copy()
+            # Need to count original vx values excluding S2 data before any
+            # filters are applied if second LSQ fit iteration will be invoked
+            ref_sensor_mask = (self.sensor_filter.sensors_str == SensorExcludeFilter.REF_SENSOR.mission)
+            count1_vx = np.sum(~np.isnan(vx[..., ~ref_sensor_mask]), axis=2)
 
         start_time = timeit.default_timer()
         logging.info('Project velocity to median flow unit vector...')
@@ -2546,7 +3697,7 @@ class ITSLiveComposite:
             vx,
             vy,
             ITSLiveComposite.DATE_DT,
-            self.sensor_filter.sensors_str,
+            self.sensors_bits,
             exclude_sensors
         )
         logging.info(f'Done with velocity projection to median flow unit vector (took {timeit.default_timer() - start_time} seconds)')
@@ -2575,7 +3726,7 @@ class ITSLiveComposite:
                     vp[..., mask],
                     ITSLiveComposite.DATE_DT[mask],
                     ITSLiveComposite.MAD_STD_RATIO,
-                    sensor_group.mission,
+                    MissionSensor.BITS[sensor_group.mission],
                     exclude_sensors
                 )
             logging.info(f'Done with dt filter for projected v (took {timeit.default_timer() - start_time} seconds)')
@@ -2706,8 +3857,6 @@ class ITSLiveComposite:
                 vx[:, :, mask] = np.nan
                 vy[:, :, mask] = np.nan
 
-                # Exclude S2 granules from total number of granules
-                copy_vx[:, :, mask] = np.nan
                 logging.info(f'Excluding {np.sum(mask)} S2 points')
 
                 # logging.info(f'DEBUG: Excluded S2 {self.sensors[mask]}')
@@ -2854,8 +4003,7 @@ class ITSLiveComposite:
 
                     # Update total granule count only for the cells that are
                     # updated by the 2nd LSQ fit calculations
-                    count_mask = ~np.isnan(copy_vx)
-                    count0_vx[amp_mask] = count_mask.sum(axis=2)[amp_mask]
+                    count0_vx[amp_mask] = count1_vx[amp_mask]
 
                 else:
                     logging.info(f'Not using LSQ fit results after excluding {SensorExcludeFilter.REF_SENSOR.mission} data')
@@ -2898,6 +4046,11 @@ class ITSLiveComposite:
         self.amplitude.vx[invalid_mask] = np.nan
         self.amplitude.vy[invalid_mask] = np.nan
 
+        if keep_state is not None:
+            # Restore state for the points that are not computed
+            for each_name, each_data in self.state_arrays().items():
+                each_data[start_y:stop_y, start_x:stop_x][keep_mask] = keep_state[each_name]
+
     def to_zarr(self, output_store: str):
         """
         Store datacube annual composite to the Zarr store.
@@ -3656,6 +4809,73 @@ class ITSLiveComposite:
         ds.to_zarr(output_store, encoding=encoding_settings, consolidated=True)
 
 
+def cubelsqfit2_batch(var_name, v, v_err, points_j, points_i, mean, error, count):
+    """
+    LSQ fit for the batch of spacial points of the currently processed chunk.
+
+    Populate annual [mean, error, count] of the points, and return a list of
+    (results_valid, results, global_i, global_j) per point as
+    itslive_lsqfit_annual() does.
+
+    If batched solver fails for the points, each point is re-processed by
+    itslive_lsqfit_annual(), which retries the fit with larger outlier
+    rejection sigma.
+    """
+    global_i = points_i + ITSLiveComposite.Chunk.start_x
+    global_j = points_j + ITSLiveComposite.Chunk.start_y
+
+    try:
+        results_valid, results, batch_mean, batch_error, batch_count = itslive_lsqfit_annual_batch(
+            v[points_j, points_i, :],
+            v_err[points_j, points_i, :],
+            ITSLiveComposite.START_DECIMAL_YEAR,
+            ITSLiveComposite.STOP_DECIMAL_YEAR,
+            ITSLiveComposite.DECIMAL_DT,
+            ITSLiveComposite.YEARS,
+            ITSLiveComposite.M,
+            ITSLiveComposite.MAD_STD_RATIO,
+            ITSLiveComposite.V0_YEARS,
+            CENTER_DATE
+        )
+
+    except np.linalg.LinAlgError:
+        logging.info(f'Got np.linalg.LinAlgError exception for batch of {len(points_j)} points, fit each point separately...')
+
+        return [
+            itslive_lsqfit_annual(
+                var_name,
+                v[j, i, :],
+                v_err[j, i, :],
+                ITSLiveComposite.START_DECIMAL_YEAR,
+                ITSLiveComposite.STOP_DECIMAL_YEAR,
+                ITSLiveComposite.DECIMAL_DT,
+                ITSLiveComposite.YEARS,
+                ITSLiveComposite.M,
+                ITSLiveComposite.MAD_STD_RATIO,
+                ITSLiveComposite.V0_YEARS,
+                CENTER_DATE,
+                mean[each_j, each_i, :],
+                error[each_j, each_i, :],
+                count[each_j, each_i, :],
+                each_i,
+                each_j
+            ) for j, i, each_j, each_i in zip(points_j, points_i, global_j, global_i)
+        ]
+
+    for index in np.flatnonzero(results_valid):
+        # Update annual values only for the years with data
+        hasdata = ~np.isnan(batch_mean[index])
+
+        mean[global_j[index], global_i[index], hasdata] = batch_mean[index, hasdata]
+        error[global_j[index], global_i[index], hasdata] = batch_error[index, hasdata]
+        count[global_j[index], global_i[index], hasdata] = batch_count[index, hasdata]
+
+    return [
+        (results_valid[index], list(results[index]), global_i[index], global_j[index])
+        for index in range(len(points_j))
+    ]
+
+
 def cubelsqfit2(
     var_name,
     # chunk,
@@ -3711,41 +4931,27 @@ def cubelsqfit2(
 
     use_dask = True
     if use_dask:
-        tasks = []
-
-        for j in tqdm(range(0,  ITSLiveComposite.Chunk.y_len), ascii=True, desc='cubelsqfit2: y'):
-            for i in range(0,  ITSLiveComposite.Chunk.x_len):
-                mask = ~np.isnan(v[j, i, :])
-                if mask.sum() < _num_valid_points:
-                    # Skip the point, return no outliers
-                    continue
-
-                global_i = i +  ITSLiveComposite.Chunk.start_x
-                global_j = j +  ITSLiveComposite.Chunk.start_y
-
-                tasks.append(
-                    dask.delayed(itslive_lsqfit_annual)(
-                        var_name,
-                        v[j, i, :],
-                        v_err[j, i, :],
-                        ITSLiveComposite.START_DECIMAL_YEAR,
-                        ITSLiveComposite.STOP_DECIMAL_YEAR,
-                        ITSLiveComposite.DECIMAL_DT,
-                        ITSLiveComposite.YEARS,
-                        ITSLiveComposite.M,
-                        ITSLiveComposite.MAD_STD_RATIO,
-                        ITSLiveComposite.V0_YEARS,
-                        CENTER_DATE,
-                        mean[global_j, global_i, :],
-                        error[global_j, global_i, :],
-                        count[global_j, global_i, :],
-                        global_i, global_j
-                    )
-                )
+        # Collect spacial points with enough valid values for LSQ fit, skip
+        # the rest of the points (return no outliers)
+        points_j, points_i = np.nonzero((~np.isnan(v)).sum(axis=2) >= _num_valid_points)
+
+        # Solve LSQ fits for batches of spacial points
+        tasks = [
+            dask.delayed(cubelsqfit2_batch)(
+                var_name,
+                v,
+                v_err,
+                points_j[start:start + ITSLiveComposite.LSQ_BATCH_SIZE],
+                points_i[start:start + ITSLiveComposite.LSQ_BATCH_SIZE],
+                mean,
+                error,
+                count
+            ) for start in range(0, len(points_j), ITSLiveComposite.LSQ_BATCH_SIZE)
+        ]
 
         dask_results = None
 
-        logging.info(f'Using {ITSLiveComposite.NUM_DASK_THREADS} Dask threads')
+        logging.info(f'Using {ITSLiveComposite.NUM_DASK_THREADS} Dask threads for {len(points_j)} points')
         with ProgressBar():
             # Display progress bar
             dask_results = dask.compute(
@@ -3754,7 +4960,7 @@ def cubelsqfit2(
                 num_workers=ITSLiveComposite.NUM_DASK_THREADS
             )
 
-        for each_result in dask_results[0]:
+        for each_result in itertools.chain.from_iterable(dask_results[0]):
             # logging.info(each_result)
 
             results_valid, results, global_i, global_j = each_result
@@ -3821,7 +5027,6 @@ def cubelsqfit2(
 if __name__ == '__main__':
     import argparse
     import warnings
-    import shutil
     import subprocess
     import sys
     import time
@@ -3901,6 +5106,38 @@ if __name__ == '__main__':
         action='store_false',
         help=f"Disable use of valid v[xy]_error_slow instead of v[xy]_error values [False]."
     )
+    parser.add_argument(
+        '--numProcesses',
+        type=int,
+        default=1,
+        help="Number of processes to compute datacube chunks in parallel with [%(default)s]. "
+            "Number of processes is capped at number of CPUs, and each of the processes uses up to "
+            "numDaskThreads Dask and Numba threads so that total number of threads does not exceed number of CPUs."
+    )
+    parser.add_argument(
+        '--disableTimeSeriesStore',
+        action='store_false',
+        dest='useTimeSeriesStore',
+        help=f"Disable reading of vx and vy from time series companion store of the datacube if it exists "
+            f"[use the store: {ITSLiveComposite.USE_TIME_SERIES_STORE}]."
+    )
+    parser.add_argument(
+        '--timeFeaturesCacheDir',
+        type=str,
+        default='',
+        help="Local directory or S3 URL to cache per-layer time features of the datacube in to re-use by "
+            "repeated composites runs [%(default)s]. Local cache is re-used only by runs on the same host, "
+            "use S3 URL to share the cache between AWS Batch jobs. Caching is disabled if not provided."
+    )
+    parser.add_argument(
+        '--previousState',
+        type=str,
+        default='',
+        help=f"Local path or S3 URL of the previous composite state ({CompOutput.STATE_FILE} within the composite store) "
+            "to update the composite incrementally for the layers added to the datacube since previous composite "
+            "was created [%(default)s]. Composite is computed for all points of the datacube if the state does not "
+            "exist or is not compatible with the datacube."
+    )
     parser.add_argument(
         '--numDaskThreads',
         type=int,
@@ -3925,6 +5162,10 @@ if __name__ == '__main__':
 
     # Set number of threads for the Dask processing
     ITSLiveComposite.NUM_DASK_THREADS = args.numDaskThreads
+    ITSLiveComposite.NUM_PROCESSES = args.numProcesses
+    ITSLiveComposite.TIME_FEATURES_CACHE_DIR = args.timeFeaturesCacheDir
+    ITSLiveComposite.USE_TIME_SERIES_STORE = args.useTimeSeriesStore
+    ITSLiveComposite.PREVIOUS_STATE = args.previousState
 
     # Read shape file with ice masks information in
     ITSLiveComposite.SHAPE_FILE = ITSCube.read_shapefile(args.shapeFile)
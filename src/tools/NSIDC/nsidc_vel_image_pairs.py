@@ -49,7 +49,6 @@ from botocore.exceptions import ClientError
 import collections
 import dask
 from dask.diagnostics import ProgressBar
-from datetime import datetime
 import gc
 import json
 import logging
@@ -61,6 +60,7 @@ import sys
 import xarray as xr
 
 # Local imports
+import granule_filename
 from itscube_types import DataVars
 from nsidc_types import Mapping
 
@@ -81,29 +81,12 @@ def get_tokens_from_filename(filename):
     """
     # ATTN: Optical format granules have different file naming convention than radar
     # format granules
-    url_files = os.path.basename(filename).split('_X_')
+    url_tokens_1, url_tokens_2 = granule_filename.split_filename(os.path.basename(filename))
 
-    # Get tokens for the first image name
-    url_tokens_1 = url_files[0].split('_')
-
-    if len(url_tokens_1) < 9:
-        # Optical format granule
-        # Get acquisition/processing dates and path&row for both images
-        first_date_1 = datetime.strptime(url_tokens_1[3], DATE_FORMAT)
-        second_date_1 = datetime.strptime(url_tokens_1[4], DATE_FORMAT)
-        key_1 = url_tokens_1[2]
-
-        # Extract info from second part of the granule's filename
-        url_tokens_2 = url_files[1].split('_')
-        first_date_2 = datetime.strptime(url_tokens_2[3], DATE_FORMAT)
-        second_date_2 = datetime.strptime(url_tokens_2[4], DATE_FORMAT)
-        key_2 = url_tokens_2[2]
-
-    else:
+    if len(url_tokens_1) >= granule_filename.NUM_OPTICAL_TOKENS:
         logging.info(f'Unexpected filename format: {filename}')
 
-    # first_date_1, second_date_1, key_1, first_date_2, second_date_2, key_2
-    return (url_tokens_1, url_tokens_2)
+    return (list(url_tokens_1), list(url_tokens_2))
 
 def get_attr_value(h5_attr: str):
     """
@@ -197,8 +180,8 @@ class NSIDCMeta:
         url_tokens_2: Parsed out filename tokens that correspond to the second image of the pair
         """
         # Get acquisition dates for both images
-        begin_date = datetime.strptime(url_tokens_1[3], DATE_FORMAT)
-        end_date = datetime.strptime(url_tokens_2[3], DATE_FORMAT)
+        begin_date = granule_filename.to_date(url_tokens_1[3])
+        end_date = granule_filename.to_date(url_tokens_2[3])
 
         sensor1 = url_tokens_1[0]
         if sensor1 not in NSIDCMeta.ShortName:
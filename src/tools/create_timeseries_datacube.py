@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+"""
+Create time series optimized companion store for ITS_LIVE datacube.
+
+Datacubes are chunked as [mid_date, y, x] = [20000, 10, 10], so reading all of
+the time series for a block of spacial points (as composites generation does)
+requires to read every time chunk of each of 10x10 spacial chunks. The companion
+store keeps velocity components in pixel-major [y, x, mid_date] order with the
+whole time series of the spacial points in one chunk: each block of spacial
+points is read with few requests to the store. The layers are stored in the
+same order as in the datacube.
+
+The companion store is written next to the datacube with the ".timeseries.zarr"
+extension and records "date_updated" of the datacube it was created from, so
+its consumers can detect out of date store.
+
+ATTN: This script should run from AWS EC2 instance to have fast access to the S3
+bucket.
+"""
+import argparse
+import dask
+from dask.diagnostics import ProgressBar
+import logging
+import numpy as np
+import os
+import shutil
+import subprocess
+import time
+import zarr
+
+from itscube import ITSCube
+from itscube_types import Coords, CubeOutput, DataVars, FileExtension, Output
+
+
+class TimeSeriesDatacube:
+    """
+    Class to create time series optimized companion store of the datacube.
+    """
+    # Data variables to store in the companion store: these are read in full
+    # time extend by composites generation
+    VARS = [DataVars.VX, DataVars.VY]
+
+    # Target size (uncompressed) of the companion store chunk in bytes
+    CHUNK_BYTES = 64 * 1024 * 1024
+
+    # Encoding attributes of the datacube variables to keep for the companion store
+    KEEP_ENCODING = [
+        Output.DTYPE_ATTR,
+        Output.FILL_VALUE_ATTR,
+        Output.MISSING_VALUE_ATTR,
+        Output.SCALE_FACTOR,
+        Output.ADD_OFFSET
+    ]
+
+    def __init__(self, cube_store: str, s3_bucket: str):
+        """
+        Initialize object.
+
+        Inputs:
+        =======
+        cube_store: Datacube store to create companion store for.
+        s3_bucket: S3 bucket the datacube resides in (empty for local datacube).
+        """
+        self.cube_store = cube_store
+
+        read_skipped_granules_flag = False
+        self.s3, self.cube_store_in, self.cube_ds, _ = ITSCube.init_input_store(
+            cube_store,
+            s3_bucket,
+            read_skipped_granules_flag
+        )
+
+    @staticmethod
+    def store_name(cube_store: str):
+        """
+        Name of the companion store for the datacube store.
+        """
+        return cube_store.rstrip('/').replace(FileExtension.ZARR, FileExtension.TIME_SERIES)
+
+    @staticmethod
+    def xy_chunk_size(num_layers: int, itemsize: int):
+        """
+        Number of X and Y coordinates in the companion store chunk which stores
+        all layers of the spacial points.
+        """
+        return max(1, int(np.sqrt(TimeSeriesDatacube.CHUNK_BYTES / (num_layers * itemsize))))
+
+    def __call__(self, output_store: str, num_dask_workers: int):
+        """
+        Write companion store of the datacube to the local Zarr store.
+        """
+        num_layers = self.cube_ds.sizes[Coords.MID_DATE]
+        xy_chunk = TimeSeriesDatacube.xy_chunk_size(num_layers, np.dtype(np.float32).itemsize)
+        logging.info(f'Chunking for {num_layers} layers: [y={xy_chunk}, x={xy_chunk}, {Coords.MID_DATE}={num_layers}]')
+
+        # Dimensions of the datacube store, which might have longer mid_date
+        # dimension if it has been updated, are not relevant
+        ds = self.cube_ds[TimeSeriesDatacube.VARS].transpose(Coords.Y, Coords.X, Coords.MID_DATE)
+        ds = ds.chunk({Coords.Y: xy_chunk, Coords.X: xy_chunk, Coords.MID_DATE: -1})
+
+        ds.attrs = {
+            CubeOutput.DATE_UPDATED: self.cube_ds.attrs[CubeOutput.DATE_UPDATED]
+        }
+
+        if CubeOutput.URL in self.cube_ds.attrs:
+            ds.attrs[CubeOutput.URL] = self.cube_ds.attrs[CubeOutput.URL]
+
+        compressor = zarr.Blosc(cname="zlib", clevel=2, shuffle=1)
+        encoding_settings = {}
+
+        for each in TimeSeriesDatacube.VARS:
+            cube_encoding = self.cube_ds[each].encoding
+            encoding_settings[each] = {
+                each_attr: cube_encoding[each_attr] for each_attr in TimeSeriesDatacube.KEEP_ENCODING if each_attr in cube_encoding
+            }
+            encoding_settings[each].update({
+                Output.COMPRESSOR_ATTR: compressor,
+                Output.CHUNKS_ATTR: (xy_chunk, xy_chunk, num_layers)
+            })
+
+            ds[each].encoding = {}
+
+        for each in [Coords.MID_DATE, Coords.X, Coords.Y]:
+            ds[each].encoding = {}
+            encoding_settings[each] = {Output.FILL_VALUE_ATTR: None}
+
+        logging.info(f'Writing {output_store}...')
+        start_time = time.time()
+
+        with dask.config.set(scheduler='threads', num_workers=num_dask_workers):
+            with ProgressBar():
+                ds.to_zarr(output_store, encoding=encoding_settings, consolidated=True)
+
+        logging.info(f'Wrote {output_store} (took {time.time() - start_time} seconds)')
+
+
+def copy_to_s3(local_store: str, target_url: str):
+    """
+    Copy local Zarr store to the S3 bucket.
+    """
+    # Use "subprocess" as s3fs.S3FileSystem leaves unclosed connections
+    # resulting in as many error messages as there are files in Zarr store
+    # to copy
+    command_line = [
+        "awsv2", "s3", "cp", "--recursive",
+        local_store,
+        target_url,
+        "--acl", "bucket-owner-full-control"
+    ]
+
+    logging.info(' '.join(command_line))
+
+    file_is_copied = False
+    num_retries = 0
+    command_return = None
+    env_copy = os.environ.copy()
+
+    while not file_is_copied and num_retries < ITSCube.NUM_AWS_COPY_RETRIES:
+        logging.info(f"Attempt #{num_retries+1} to copy {local_store} to {target_url}")
+
+        command_return = subprocess.run(
+            command_line,
+            env=env_copy,
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT
+        )
+
+        if command_return.returncode != 0:
+            # Report the whole stdout stream as one logging message
+            logging.warning(f"Failed to copy {local_store} to {target_url} with returncode={command_return.returncode}: {command_return.stdout}")
+
+            num_retries += 1
+            # If failed due to AWS SlowDown error, retry
+            if num_retries != ITSCube.NUM_AWS_COPY_RETRIES and \
+               ITSCube.AWS_SLOW_DOWN_ERROR in command_return.stdout.decode('utf-8'):
+                # Sleep if it's not a last attempt to copy
+                time.sleep(ITSCube.AWS_COPY_SLEEP_SECONDS)
+
+            else:
+                # Don't retry otherwise
+                num_retries = ITSCube.NUM_AWS_COPY_RETRIES
+
+        else:
+            file_is_copied = True
+
+    if not file_is_copied:
+        raise RuntimeError(f"Failed to copy {local_store} to {target_url} with command.returncode={command_return.returncode}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n')[0],
+        epilog=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        '-i', '--inputCube',
+        type=str,
+        required=True,
+        help="Input Zarr datacube store to create time series store for."
+    )
+    parser.add_argument(
+        '-b', '--inputBucket',
+        type=str,
+        default='',
+        help="S3 bucket with input datacube Zarr store [%(default)s]."
+    )
+    parser.add_argument(
+        '-o', '--outputStore',
+        type=str,
+        default=None,
+        help="Local Zarr store to write time series store to [<inputCube basename> with "
+             f"{FileExtension.TIME_SERIES} extension]."
+    )
+    parser.add_argument(
+        '-c', '--chunkBytes',
+        type=int,
+        default=TimeSeriesDatacube.CHUNK_BYTES,
+        help="Target size in bytes of the time series store chunk [%(default)d]."
+    )
+    parser.add_argument(
+        '-w', '--dask-workers',
+        type=int,
+        default=4,
+        help='Number of Dask parallel workers [%(default)d]'
+    )
+
+    args = parser.parse_args()
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%m/%d/%Y %I:%M:%S %p', level=logging.INFO)
+
+    logging.info(f"Args: {args}")
+
+    TimeSeriesDatacube.CHUNK_BYTES = args.chunkBytes
+
+    output_store = args.outputStore
+    if output_store is None:
+        output_store = os.path.basename(TimeSeriesDatacube.store_name(args.inputCube))
+
+    if os.path.exists(output_store):
+        logging.info(f"Removing existing local {output_store}")
+        shutil.rmtree(output_store)
+
+    timeseries_cube = TimeSeriesDatacube(args.inputCube, args.inputBucket)
+    timeseries_cube(output_store, args.dask_workers)
+
+    if len(args.inputBucket):
+        try:
+            # Companion store resides next to the datacube
+            copy_to_s3(output_store, os.path.join(args.inputBucket, TimeSeriesDatacube.store_name(args.inputCube)))
+
+        finally:
+            logging.info(f"Removing local copy of {output_store}")
+            shutil.rmtree(output_store)
+
+
+if __name__ == '__main__':
+    main()
+    logging.info("Done.")
@@ -1,13 +1,16 @@
 """
 Script to generate catalog geojson file for ITS_LIVE granule dataset.
 
+The script uses granule_filename module from the parent src/ directory, so
+src/ needs to be on PYTHONPATH to run it:
+    PYTHONPATH=<path_to>/src python make_geojson_features_for_imagepairs_v1p1.py ...
+
 Authors: Mark Fahnestock, Masha Liukis
 """
 
 import argparse
 import dask
 from dask.diagnostics import ProgressBar
-from datetime import datetime
 import geojson
 import h5py
 import json
@@ -24,6 +27,7 @@ from shapely.geometry import mapping
 import xarray as xr
 
 # from itscube import ITSCube
+import granule_filename
 
 # Date format as it appears in granules filenames of optical format:
 # LC08_L1TP_011002_20150821_20170405_01_T1_X_LC08_L1TP_011002_20150720_20170406_01_T1_G0240V01_P038.nc
@@ -39,50 +43,11 @@ def get_tokens_from_filename(filename):
     optical granule filename, or start/end date/time and product unique ID for
     radar granule filename.
     """
-    # Optical format granules have different file naming convention than radar
-    # format granules
-    is_optical = True
-    url_files = os.path.basename(filename).split('_X_')
-
-    # Get tokens for the first image name
-    url_tokens = url_files[0].split('_')
-
-    if len(url_tokens) < 9:
-        # Optical format granule
-        # Get acquisition/processing dates and path&row for both images
-        first_date_1 = datetime.strptime(url_tokens[3], DATE_FORMAT)
-        second_date_1 = datetime.strptime(url_tokens[4], DATE_FORMAT)
-        key_1 = url_tokens[2]
-
-        url_tokens = url_files[1].split('_')
-        first_date_2 = datetime.strptime(url_tokens[3], DATE_FORMAT)
-        second_date_2 = datetime.strptime(url_tokens[4], DATE_FORMAT)
-        key_2 = url_tokens[2]
+    tokens = dict(zip(granule_filename.GRANULE_DTYPE.names, granule_filename.parse_filename(filename)))
 
-    else:
-        # Radar format granule
-        # Get start/end date/time and product unique ID for both images
-        is_optical = False
-
-        url_tokens = url_files[0].split('_')
-        # Start date and time
-        first_date_1 = datetime.strptime(url_tokens[-5], DATE_TIME_FORMAT)
-        # Stop date and time
-        second_date_1 = datetime.strptime(url_tokens[-4], DATE_TIME_FORMAT)
-        # Product unique identifier
-        key_1 = url_tokens[-1]
-
-        # Get tokens for the second image name: there are two extra tokens
-        # at the end of the filename which are specific to ITS_LIVE filename
-        url_tokens = url_files[1].split('_')
-        # Start date and time
-        first_date_2 = datetime.strptime(url_tokens[-7], DATE_TIME_FORMAT)
-        # Stop date and time
-        second_date_2 = datetime.strptime(url_tokens[-6], DATE_TIME_FORMAT)
-        # Product unique identifier
-        key_2 = url_tokens[-3]
-
-    return is_optical, first_date_1, second_date_1, key_1, first_date_2, second_date_2, key_2
+    return tokens['is_optical'], \
+        tokens['first_date_1'], tokens['second_date_1'], tokens['key_1'], \
+        tokens['first_date_2'], tokens['second_date_2'], tokens['key_2']
 
 def skip_duplicate_granules(found_urls: list):
     """
@@ -644,11 +609,11 @@ if __name__ == '__main__':
         # if GranuleCatalog.REMOVE_DUPLICATE_GRANULES:
         #     infiles, skipped_granules = ITSCube.skip_duplicate_l89_granules(infiles)
 
-        #     granule_filename = os.path.join(args.catalog_dir, args.skipped_granules_file)
-        #     with s3_out.open(granule_filename, 'w') as outf:
+        #     granules_file_path = os.path.join(args.catalog_dir, args.skipped_granules_file)
+        #     with s3_out.open(granules_file_path, 'w') as outf:
         #         geojson.dump(skipped_granules, outf)
 
-        #     logging.info(f"Wrote skipped granules to '{granule_filename}'")
+        #     logging.info(f"Wrote skipped granules to '{granules_file_path}'")
 
         #     # ATTN: If any of the skipped granules are already cataloged by
         #     # previous catalog generation, need to exclude them from existing
@@ -657,11 +622,11 @@ if __name__ == '__main__':
         #         logging.info(f'WARNING: Need to check on exlusion of skipped granules from existing catalogs')
 
         # Write all unique granules to the file
-        granule_filename = os.path.join(args.catalog_dir, args.catalog_granules_file)
-        with s3_out.open(granule_filename, 'w') as outf:
+        granules_file_path = os.path.join(args.catalog_dir, args.catalog_granules_file)
+        with s3_out.open(granules_file_path, 'w') as outf:
             geojson.dump(infiles, outf)
 
-        logging.info(f"Wrote catalog granules to '{granule_filename}'")
+        logging.info(f"Wrote catalog granules to '{granules_file_path}'")
 
 
     logging.info('Done.')
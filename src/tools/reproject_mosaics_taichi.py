@@ -1504,70 +1504,68 @@ class MosaicsReproject:
             else:
                 logging.info(f"reproject_velocity: Original {v_error_var}: min={np.nanmin(_v_error[verbose_mask])} max={np.nanmax(_v_error[verbose_mask])}")
 
-        for y, x in tqdm(
-            zip(self.valid_cell_indices_y, self.valid_cell_indices_x),
-            ascii=True,
-            desc=f"Re-projecting {vx_var}, {vy_var}, {vx_error_var}, {vy_error_var}..."
-        ):
-            t_matrix = self.transformation_matrix[y, x]
+        # Re-project all cells that have transformation matrix at once:
+        # look up original cells in input ij-projection
+        valid_y = self.valid_cell_indices_y
+        valid_x = self.valid_cell_indices_x
 
-            # Look up original cell in input ij-projection
-            i, j = self.original_ij_index[y, x]
+        t_matrix = self.transformation_matrix[valid_y, valid_x]
+        i = self.original_ij_index[valid_y, valid_x, 0]
+        j = self.original_ij_index[valid_y, valid_x, 1]
 
-            # Re-project velocity variables
-            dv = [_vx[j, i], _vy[j, i]]
+        logging.info(f"Re-projecting {vx_var}, {vy_var}, {vx_error_var}, {vy_error_var} for {len(valid_y)} cells...")
 
-            # Some points get NODATA for vx but valid vy and vx.
-            if (not math.isnan(dv[0])) and (not math.isnan(dv[1])):
-                # Apply transformation matrix to (vx, vy) values converted to pixel displacement
-                xy_v = np.matmul(t_matrix, dv)
+        # Re-project velocity variables
+        dv = np.stack((_vx[j, i], _vy[j, i]), axis=-1)
+
+        # Some points get NODATA for vx but valid vy and v.v.
+        valid_mask = ~np.any(np.isnan(dv), axis=-1)
+
+        valid_y = valid_y[valid_mask]
+        valid_x = valid_x[valid_mask]
+        t_matrix = t_matrix[valid_mask]
+        i = i[valid_mask]
+        j = j[valid_mask]
+        dv = dv[valid_mask]
+
+        # Apply transformation matrix to (vx, vy) values converted to pixel displacement
+        xy_v = np.einsum('nij,nj->ni', t_matrix, dv)
+
+        vx[valid_y, valid_x] = xy_v[:, 0]
+        vy[valid_y, valid_x] = xy_v[:, 1]
+
+        # Compute v: sqrt(vx^2 + vy^2)
+        v[valid_y, valid_x] = np.sqrt(xy_v[:, 0]**2 + xy_v[:, 1]**2)
+
+        # Look up original velocity values to compute the scale factor
+        # for v_error: scale_factor = v_new / v_old
+        v_ij_value = _v[j, i]
+        v_new = v[valid_y, valid_x]
+
+        # Set re-projected v to zero where original v is zero - non-zero vx and vy values are
+        # introduced by warping (we don't warp input values anymore though - still need it?)
+        zero_mask = (v_ij_value == 0) & (v_new != 0)
+        vx[valid_y[zero_mask], valid_x[zero_mask]] = 0
+        vy[valid_y[zero_mask], valid_x[zero_mask]] = 0
+        v[valid_y[zero_mask], valid_x[zero_mask]] = 0
+
+        # Apply scale factor to the error value
+        v_error_ij_value = _v_error[j, i]
+        error_mask = (v_ij_value != 0) & ~np.isnan(v_error_ij_value)
+        v_error[valid_y[error_mask], valid_x[error_mask]] = v_error_ij_value[error_mask]*(v_new[error_mask]/v_ij_value[error_mask])
+
+        dv = np.stack((_vx_error[j, i], _vy_error[j, i]), axis=-1)
+
+        # If any of the values is NODATA, don't re-project, leave them as NODATA
+        error_mask = ~np.any(np.isnan(dv), axis=-1)
+
+        # vx_error and vy_error must be positive:
+        # use absolute values of transformation matrix to avoid
+        # negative re-projected vx_error and vy_error values
+        xy_v_error = np.einsum('nij,nj->ni', np.abs(t_matrix[error_mask]), dv[error_mask])
 
-                vx[y, x] = xy_v[0]
-                vy[y, x] = xy_v[1]
-
-                # # Compute v: sqrt(vx^2 + vy^2)
-                v[y, x] = np.sqrt(xy_v[0]**2 + xy_v[1]**2)
-
-                # Look up original velocity value to compute the scale factor
-                # for v_error: scale_factor = v_old / v_new
-                v_ij_value = _v[j, i]
-
-                scale_factor = 1.0
-                if v_ij_value != 0:
-                    scale_factor = v[y, x]/v_ij_value
-
-                elif v[y, x] != 0:
-                    # Set re-projected v to zero - non-zero vx and vy values are
-                    # introduced by warping (we don't warp input values anymore though - still need it?)
-                    vx[y, x] = 0
-                    vy[y, x] = 0
-                    v[y, x] = 0
-
-                # if v_ij_value and (not np.any(np.isnan(_v_error[j, i]))):
-                if v_ij_value and (not math.isnan(_v_error[j, i])):
-                    # Apply scale factor to the error value
-                    v_error[y, x] = _v_error[j, i]*scale_factor
-
-                    # For debugging only:
-                    # Track large differences in v_error values in case they happen. If observed,
-                    # most likely need to reduce error threshold for the gdal.warp()
-                    # if np.abs(v_error[y, x] - _v_error[j, i]) > 100:
-                    #     logging.warning(f"Computed {v_error_var}={v_error[y, x]} vs. {v_error_var}_in={_v_error[j, i]}")
-                    #     logging.info(f"--->indices: i={i} j={j} vs. x={x} y={y}")
-                    #     logging.info(f"--->{v_var}: {v_var}_in={v_ij_value} {v_var}_out={v[y, x]}")
-                    #     logging.info(f"--->in:     {vx_var}={_vx[j, i]} {vy_var}={_vy[j, i]}")
-                    #     logging.info(f"--->out:    {vx_var}={vx[y, x]} {vy_var}={vy[y, x]}")
-                    #     logging.info(f"--->transf_matrix: {t_matrix}")
-
-                dv = [_vx_error[j, i], _vy_error[j, i]]
-
-                # If any of the values is NODATA, don't re-project, leave them as NODATA
-                # if not np.any(np.isnan(dv)):
-                if (not math.isnan(dv[0])) and (not math.isnan(dv[1])):
-                    # vx_error and vy_error must be positive:
-                    # use absolute values of transformation matrix to avoid
-                    # negative re-projected vx_error and vy_error values
-                    vx_error[y, x], vy_error[y, x] = np.matmul(np.abs(t_matrix), dv)
+        vx_error[valid_y[error_mask], valid_x[error_mask]] = xy_v_error[:, 0]
+        vy_error[valid_y[error_mask], valid_x[error_mask]] = xy_v_error[:, 1]
 
         if MosaicsReproject.VERBOSE:
             verbose_mask = np.isfinite(vx)
@@ -0,0 +1,116 @@
+"""
+Tests for the batched annual LSQ fit of the composites: itslive_lsqfit_annual_batch()
+should give the same results as itslive_lsqfit_annual() does per spacial point.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+
+itslive_composite = pytest.importorskip('itslive_composite')
+
+# Parameters of the fit as used by ITSLiveComposite
+MAD_STD_RATIO = 1.4826
+V0_YEARS = np.arange(2014, 2023)
+
+
+def synthetic_cube(rng, start_year, stop_year, num_points):
+    """
+    Velocity time series with seasonal cycle, trend, noise, missing values and
+    outliers for num_points spacial points over provided layers.
+    """
+    mid_date = (start_year + stop_year)/2
+
+    v = np.empty((num_points, len(start_year)))
+    v_err = rng.uniform(2, 10, v.shape)
+
+    for each_point in range(num_points):
+        v[each_point] = 100 + 50*each_point + 10*np.sin(2*np.pi*mid_date) + 3*(mid_date - 2018) + \
+            rng.normal(0, 5, len(start_year))
+
+    # Missing values and outliers
+    v[rng.random(v.shape) < 0.3] = np.nan
+    v[rng.random(v.shape) < 0.02] += 500
+
+    return v, v_err
+
+
+def assert_batch_matches_per_point(start_year, stop_year, v, v_err):
+    """
+    Compare results of the batched fit to the per point fit.
+    """
+    dt = stop_year - start_year
+    years = np.arange(int(np.floor(start_year.min())), int(np.floor(stop_year.max())) + 1)
+    M = itslive_composite.CompactM(*itslive_composite.create_M_compact(years, start_year, stop_year, dt))
+
+    results_valid, results, mean, error, count = itslive_composite.itslive_lsqfit_annual_batch(
+        v, v_err, start_year, stop_year, dt, years, M, MAD_STD_RATIO, V0_YEARS, itslive_composite.CENTER_DATE
+    )
+
+    for each_point in range(v.shape[0]):
+        point_mean = np.full(len(years), np.nan)
+        point_error = np.full(len(years), np.nan)
+        point_count = np.full(len(years), np.nan)
+
+        point_valid, point_results, _, _ = itslive_composite.itslive_lsqfit_annual(
+            'v', v[each_point], v_err[each_point], start_year, stop_year, dt, years, M,
+            MAD_STD_RATIO, V0_YEARS, itslive_composite.CENTER_DATE,
+            point_mean, point_error, point_count, 0, 0
+        )
+
+        assert results_valid[each_point] == point_valid
+        if not point_valid:
+            continue
+
+        np.testing.assert_allclose(results[each_point], np.array(point_results, dtype=float), rtol=1e-6, atol=1e-8)
+        np.testing.assert_allclose(mean[each_point], point_mean, rtol=1e-6, atol=1e-8)
+        np.testing.assert_allclose(error[each_point], point_error, rtol=1e-6)
+        np.testing.assert_array_equal(count[each_point], point_count)
+
+    return results_valid
+
+
+def test_batch_matches_per_point_fit():
+    rng = np.random.default_rng(2)
+    num_layers = 3000
+
+    start_year = rng.uniform(2014, 2022, num_layers)
+    stop_year = start_year + rng.choice([16/365, 32/365, 0.2, 0.5, 1.0, 2.5], num_layers) + rng.uniform(0, 0.05, num_layers)
+
+    v, v_err = synthetic_cube(rng, start_year, stop_year, 8)
+
+    # No data, too few values, and no data within part of the years
+    mid_date = (start_year + stop_year)/2
+    v[0] = np.nan
+    v[1, :-20] = np.nan
+    v[2, mid_date < 2019] = np.nan
+
+    results_valid = assert_batch_matches_per_point(start_year, stop_year, v, v_err)
+    assert np.count_nonzero(results_valid) == 6
+
+
+def test_batch_matches_per_point_fit_rank_deficient():
+    rng = np.random.default_rng(7)
+
+    # Layers that cover exactly 2015 and 2016 years are the only data for
+    # these years: annual means of 2015 and 2016 can't be resolved separately,
+    # and the fit has to fall back to the minimum norm solution
+    num_long = 200
+    num_short = 1000
+
+    start_year = np.concatenate((
+        np.full(num_long, 2015.0),
+        rng.uniform(2017, 2021, num_short)
+    ))
+    stop_year = np.concatenate((
+        np.full(num_long, 2017.0),
+        start_year[num_long:] + rng.choice([16/365, 32/365, 0.2], num_short)
+    ))
+
+    v, v_err = synthetic_cube(rng, start_year, stop_year, 4)
+
+    results_valid = assert_batch_matches_per_point(start_year, stop_year, v, v_err)
+    assert np.all(results_valid)